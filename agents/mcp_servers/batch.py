@@ -0,0 +1,101 @@
+"""JSON-RPC batch endpoint shared by the MCP servers.
+
+The streamable-http transport accepts one JSON-RPC message per POST and wants
+an initialize handshake per session, so N tool calls cost about 3N requests.
+``POST /mcp/batch`` takes a JSON array of ``tools/call`` requests, runs them
+concurrently without a session, and answers with a JSON array of responses in
+request order.  Each item succeeds or fails on its own: tool failures come
+back as ``isError`` results (as on ``/mcp``), malformed items as JSON-RPC
+errors.
+
+Each call's duration goes to ``mcp_tool_seconds`` (transport ``batch``).  A
+``traceparent`` header from the caller is logged with it, so slow tools can be
+matched to the backend trace that issued them.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any
+
+from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.exceptions import ToolError
+from pydantic import BaseModel
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from mcp_servers.metrics import observe_tool
+
+logger = logging.getLogger(__name__)
+
+BATCH_PATH = "/mcp/batch"
+MAX_BATCH_SIZE = int(os.getenv("MCP_BATCH_MAX_SIZE", "32"))
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+
+
+def _error(request_id: Any, code: int, message: str) -> dict:
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+def _content(result: Any) -> list[dict]:
+    # FastMCP returns content blocks, or (blocks, structured output) when the tool declares an output schema
+    if isinstance(result, tuple):
+        result = result[0]
+    if isinstance(result, dict):
+        return [{"type": "text", "text": json.dumps(result)}]
+    return [
+        block.model_dump(mode="json", exclude_none=True) if isinstance(block, BaseModel) else block for block in result
+    ]
+
+
+async def _call(mcp: FastMCP, item: Any, traceparent: str | None = None) -> dict:
+    if not isinstance(item, dict) or item.get("jsonrpc") != "2.0":
+        return _error(item.get("id") if isinstance(item, dict) else None, INVALID_REQUEST, "Invalid request")
+    request_id = item.get("id")
+    if item.get("method") != "tools/call":
+        return _error(request_id, METHOD_NOT_FOUND, f"Only tools/call can be batched, got {item.get('method')!r}")
+    params = item.get("params") or {}
+    if not isinstance(params, dict) or not isinstance(params.get("name"), str):
+        return _error(request_id, INVALID_REQUEST, "params.name is required")
+
+    start = time.perf_counter()
+    ok = False
+    try:
+        result = await mcp.call_tool(params["name"], params.get("arguments") or {})
+        ok = True
+    except ToolError as e:
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "result": {"content": [{"type": "text", "text": str(e)}], "isError": True},
+        }
+    finally:
+        elapsed = time.perf_counter() - start
+        observe_tool(mcp.name, params["name"], ok, elapsed, "batch")
+        if traceparent:
+            logger.info("tool %s %.1fms traceparent=%s", params["name"], elapsed * 1000, traceparent)
+    return {"jsonrpc": "2.0", "id": request_id, "result": {"content": _content(result), "isError": False}}
+
+
+def install_batch_route(mcp: FastMCP) -> None:
+    """Serve ``POST /mcp/batch`` next to the streamable-http endpoint of *mcp*."""
+
+    @mcp.custom_route(BATCH_PATH, methods=["POST"], include_in_schema=False)
+    async def batch(request: Request) -> JSONResponse:
+        try:
+            items = json.loads(await request.body())
+        except json.JSONDecodeError as e:
+            return JSONResponse(_error(None, PARSE_ERROR, f"Parse error: {e}"), status_code=400)
+        if not isinstance(items, list) or not items:
+            return JSONResponse(_error(None, INVALID_REQUEST, "Expected a non-empty JSON array"), status_code=400)
+        if len(items) > MAX_BATCH_SIZE:
+            return JSONResponse(
+                _error(None, INVALID_REQUEST, f"Batch too large ({len(items)} > {MAX_BATCH_SIZE})"), status_code=413
+            )
+        traceparent = request.headers.get("traceparent")
+        return JSONResponse(list(await asyncio.gather(*(_call(mcp, item, traceparent) for item in items))))
@@ -0,0 +1,137 @@
+"""File-backed, indexed, read-only catalogs for the MCP servers.
+
+Catalog data lives in JSON Lines files under ``MCP_DATA_DIR`` (default
+``mcp_servers/data``).  A ``Catalog`` reads its files, hands the rows to a
+server-specific builder that indexes them (by city, style, route pair, ...),
+and publishes the result as one immutable object.  A daemon thread polls the
+files and, when one changes, builds a fresh index and swaps the reference;
+in-flight tool calls keep the snapshot they started with, and a bad file
+leaves the previous index in place.
+
+Tool calls are dict lookups or bisects over precomputed sorted views, so
+latency stays flat as catalogs grow.  Records are shared between calls and
+must not be mutated; build new dicts for responses.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from collections.abc import Callable, Hashable, Iterable
+from operator import itemgetter
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(os.getenv("MCP_DATA_DIR") or Path(__file__).parent / "data")
+RELOAD_INTERVAL = float(os.getenv("MCP_DATA_RELOAD_INTERVAL", "5"))
+
+
+class SortedView:
+    """Records sorted by one numeric field, with O(log n) range queries."""
+
+    __slots__ = ("_keys", "items")
+
+    def __init__(self, records: Iterable[dict], key: str):
+        self.items: tuple[dict, ...] = tuple(sorted(records, key=itemgetter(key)))
+        self._keys = [record[key] for record in self.items]
+
+    def between(self, low: float | None = None, high: float | None = None) -> tuple[dict, ...]:
+        """Records with ``low <= key <= high`` (either bound optional), in key order."""
+        start = 0 if low is None else bisect_left(self._keys, low)
+        stop = len(self._keys) if high is None else bisect_right(self._keys, high)
+        return self.items[start:stop]
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __bool__(self) -> bool:
+        return bool(self.items)
+
+
+EMPTY_VIEW = SortedView((), key="")
+
+
+def group_by(records: Iterable[dict], key: Callable[[dict], Hashable]) -> dict[Any, tuple[dict, ...]]:
+    """Bucket *records* by ``key(record)``, preserving input order within each bucket."""
+    groups: dict[Any, list[dict]] = defaultdict(list)
+    for record in records:
+        groups[key(record)].append(record)
+    return {k: tuple(v) for k, v in groups.items()}
+
+
+def sorted_views(records: Iterable[dict], key: Callable[[dict], Hashable], sort_field: str) -> dict[Any, SortedView]:
+    """``group_by`` with each bucket turned into a ``SortedView`` on *sort_field*."""
+    return {k: SortedView(v, sort_field) for k, v in group_by(records, key).items()}
+
+
+def read_jsonl(path: Path) -> list[dict]:
+    """Rows of a JSON Lines file; blank lines are skipped."""
+    with path.open(encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def without(record: dict, *keys: str) -> dict:
+    """Copy of *record* minus grouping keys that are implied by the index."""
+    return {k: v for k, v in record.items() if k not in keys}
+
+
+class Catalog:
+    """Data files plus an index builder, rebuilt and swapped when the files change.
+
+    *files* maps a name to a path relative to ``DATA_DIR``; *build* receives
+    ``{name: rows}`` and returns the index object served by ``.index``.
+    """
+
+    def __init__(self, name: str, files: dict[str, str], build: Callable[[dict[str, list[dict]]], Any]):
+        self.name = name
+        self._paths = {key: DATA_DIR / rel for key, rel in files.items()}
+        self._build = build
+        self._lock = threading.Lock()
+        self._watcher: threading.Thread | None = None
+        self._signature = self._stat()
+        self._index = self._load()
+
+    @property
+    def index(self) -> Any:
+        # A single attribute read: callers get either the old or the new index, never a mix
+        return self._index
+
+    def _stat(self) -> tuple:
+        stats = [path.stat() for path in self._paths.values()]
+        return tuple((st.st_mtime_ns, st.st_size) for st in stats)
+
+    def _load(self) -> Any:
+        return self._build({key: read_jsonl(path) for key, path in self._paths.items()})
+
+    def reload_if_changed(self) -> bool:
+        """Rebuild the index if any file changed since the last load; True if swapped."""
+        with self._lock:
+            try:
+                signature = self._stat()
+                if signature == self._signature:
+                    return False
+                index = self._load()
+            except (OSError, ValueError, KeyError, TypeError):
+                logger.exception("Reload of %s catalog failed; keeping the current index", self.name)
+                return False
+            self._index, self._signature = index, signature
+        logger.info("Reloaded %s catalog", self.name)
+        return True
+
+    def watch(self, interval: float = RELOAD_INTERVAL) -> None:
+        """Poll the data files from a daemon thread (idempotent; 0 disables)."""
+        if interval <= 0 or self._watcher is not None:
+            return
+
+        def run() -> None:
+            while True:
+                time.sleep(interval)
+                self.reload_if_changed()
+
+        self._watcher = threading.Thread(target=run, name=f"catalog-{self.name}", daemon=True)
+        self._watcher.start()
@@ -0,0 +1,159 @@
+"""Fare index for the flights MCP server.
+
+Fares are bucketed by ``(origin, dest, cabin)`` and kept in price order, so a
+search is a dict lookup plus a bisect on price instead of a scan over every
+fare.  A fare may carry a ``date`` (ISO ``YYYY-MM-DD``); undated fares are
+daily schedules that match any date.  Dated fares are also kept in date order
+per route, so a date window is a bisect as well.
+
+Round-trip and multi-city searches take the k cheapest combinations of the
+per-leg price-sorted lists with a heap, without building the cross product.
+
+Records are frozen (``MappingProxyType``) because one index is shared by every
+concurrent tool call; responses copy them into new dicts.
+"""
+
+import heapq
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from datetime import date
+from operator import itemgetter
+from types import MappingProxyType
+from typing import Any
+
+from mcp_servers.catalog import SortedView, group_by
+
+Fare = Mapping[str, Any]
+
+_PRICE = itemgetter("price_usd")
+_ROUTE_KEY = itemgetter("origin", "dest", "cabin")
+
+
+def iso_date(value: str | None) -> str | None:
+    """*value* if it is an ISO date, else None (free text such as "flexible" disables date filtering)."""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        return None
+
+
+@dataclass(frozen=True, slots=True)
+class Leg:
+    origin: str
+    dest: str
+    date: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class RouteFares:
+    by_price: SortedView  # every fare on the route
+    daily: SortedView  # undated fares, by price
+    dated: SortedView  # dated fares, by date
+
+    @classmethod
+    def build(cls, fares: Sequence[Fare]) -> "RouteFares":
+        return cls(
+            by_price=SortedView(fares, "price_usd"),
+            daily=SortedView((f for f in fares if not f.get("date")), "price_usd"),
+            dated=SortedView((f for f in fares if f.get("date")), "date"),
+        )
+
+    def search(
+        self,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> list[Fare]:
+        """Fares in the price range (and date window, if given), cheapest first."""
+        if date_from is None and date_to is None:
+            return list(self.by_price.between(min_price, max_price))
+        in_window = sorted(
+            (
+                f
+                for f in self.dated.between(date_from, date_to)
+                if (min_price is None or f["price_usd"] >= min_price)
+                and (max_price is None or f["price_usd"] <= max_price)
+            ),
+            key=_PRICE,
+        )
+        return list(heapq.merge(self.daily.between(min_price, max_price), in_window, key=_PRICE))
+
+
+class FlightIndex:
+    """Immutable fare index: route buckets plus an id lookup."""
+
+    __slots__ = ("by_id", "routes")
+
+    def __init__(self, fares: Iterable[Mapping]):
+        frozen = [MappingProxyType(dict(f)) for f in fares]
+        self.by_id: dict[str, Fare] = {f["id"]: f for f in frozen}
+        self.routes: dict[tuple[str, str, str], RouteFares] = {
+            key: RouteFares.build(group) for key, group in group_by(frozen, _ROUTE_KEY).items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def search(
+        self,
+        origin: str,
+        dest: str,
+        cabin: str = "economy",
+        *,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> list[Fare]:
+        route = self.routes.get((origin.upper(), dest.upper(), cabin.lower()))
+        if route is None:
+            return []
+        return route.search(min_price, max_price, date_from, date_to)
+
+    def combinations(
+        self,
+        legs: Sequence[Leg],
+        cabin: str = "economy",
+        *,
+        max_total: float | None = None,
+        limit: int = 5,
+    ) -> list[tuple[float, tuple[Fare, ...]]]:
+        """The *limit* cheapest itineraries taking one fare per leg, as ``(total, fares)``.
+
+        Legs are assumed to fly on separate days, so connection times are not checked.
+        """
+        itineraries: list[tuple[float, tuple[Fare, ...]]] = [(0.0, ())]
+        for leg in legs:
+            # The k cheapest combinations never use a fare ranked below k on any leg
+            fares = self.search(leg.origin, leg.dest, cabin, max_price=max_total, date_from=leg.date, date_to=leg.date)
+            itineraries = _cheapest_pairs(itineraries, fares[:limit], limit, max_total)
+            if not itineraries:
+                break
+        return itineraries if legs else []
+
+
+def _cheapest_pairs(
+    itineraries: list[tuple[float, tuple[Fare, ...]]],
+    fares: list[Fare],
+    limit: int,
+    max_total: float | None,
+) -> list[tuple[float, tuple[Fare, ...]]]:
+    """k smallest ``itinerary + fare`` sums of two ascending lists (frontier walk over the grid)."""
+    if not itineraries or not fares:
+        return []
+    heap = [(itineraries[0][0] + fares[0]["price_usd"], 0, 0)]
+    seen = {(0, 0)}
+    result = []
+    while heap and len(result) < limit:
+        total, i, j = heapq.heappop(heap)
+        if max_total is not None and total > max_total:
+            break
+        result.append((total, (*itineraries[i][1], fares[j])))
+        for ni, nj in ((i + 1, j), (i, j + 1)):
+            if ni < len(itineraries) and nj < len(fares) and (ni, nj) not in seen:
+                seen.add((ni, nj))
+                heapq.heappush(heap, (itineraries[ni][0] + fares[nj]["price_usd"], ni, nj))
+    return result
@@ -1,132 +1,25 @@
-"""Flights MCP Server — 2 tools for flight search."""
+"""Flights MCP Server — 3 tools for flight search."""
 
 from mcp.server.fastmcp import FastMCP
 
+from mcp_servers.batch import install_batch_route
+from mcp_servers.catalog import Catalog
+from mcp_servers.flights.index import Fare, FlightIndex, Leg, iso_date
+from mcp_servers.metrics import install_metrics
+
 mcp = FastMCP("Flights", host="0.0.0.0", port=8003)
+install_batch_route(mcp)
+install_metrics(mcp)
+
+NOTE = "Prices are estimates. Book through airline website for actual fares."
+
+# Mock flight database (mcp_servers/data/flights/flights.jsonl, hot-reloaded)
+CATALOG = Catalog("flights", {"flights": "flights/flights.jsonl"}, lambda data: FlightIndex(data["flights"]))
 
-# Mock flight database
-MOCK_FLIGHTS = [
-    {
-        "id": "FL001",
-        "airline": "Japan Airlines",
-        "code": "JL802",
-        "origin": "TPE",
-        "dest": "NRT",
-        "departure": "08:30",
-        "arrival": "12:30",
-        "price_usd": 280,
-        "cabin": "economy",
-        "duration": "3h 0m",
-    },
-    {
-        "id": "FL002",
-        "airline": "ANA",
-        "code": "NH852",
-        "origin": "TPE",
-        "dest": "NRT",
-        "departure": "14:00",
-        "arrival": "18:00",
-        "price_usd": 310,
-        "cabin": "economy",
-        "duration": "3h 0m",
-    },
-    {
-        "id": "FL003",
-        "airline": "EVA Air",
-        "code": "BR198",
-        "origin": "TPE",
-        "dest": "NRT",
-        "departure": "10:00",
-        "arrival": "14:10",
-        "price_usd": 250,
-        "cabin": "economy",
-        "duration": "3h 10m",
-    },
-    {
-        "id": "FL004",
-        "airline": "China Airlines",
-        "code": "CI100",
-        "origin": "TPE",
-        "dest": "NRT",
-        "departure": "07:00",
-        "arrival": "11:10",
-        "price_usd": 240,
-        "cabin": "economy",
-        "duration": "3h 10m",
-    },
-    {
-        "id": "FL005",
-        "airline": "Peach Aviation",
-        "code": "MM922",
-        "origin": "TPE",
-        "dest": "KIX",
-        "departure": "06:00",
-        "arrival": "09:30",
-        "price_usd": 150,
-        "cabin": "economy",
-        "duration": "2h 30m",
-    },
-    {
-        "id": "FL006",
-        "airline": "Japan Airlines",
-        "code": "JL814",
-        "origin": "TPE",
-        "dest": "KIX",
-        "departure": "11:00",
-        "arrival": "14:40",
-        "price_usd": 290,
-        "cabin": "economy",
-        "duration": "2h 40m",
-    },
-    {
-        "id": "FL007",
-        "airline": "ANA",
-        "code": "NH854",
-        "origin": "NRT",
-        "dest": "CTS",
-        "departure": "09:00",
-        "arrival": "10:40",
-        "price_usd": 120,
-        "cabin": "economy",
-        "duration": "1h 40m",
-    },
-    {
-        "id": "FL008",
-        "airline": "Starlux Airlines",
-        "code": "JX800",
-        "origin": "TPE",
-        "dest": "NRT",
-        "departure": "09:15",
-        "arrival": "13:20",
-        "price_usd": 270,
-        "cabin": "economy",
-        "duration": "3h 5m",
-    },
-    {
-        "id": "FL009",
-        "airline": "Thai Airways",
-        "code": "TG632",
-        "origin": "BKK",
-        "dest": "NRT",
-        "departure": "07:35",
-        "arrival": "15:45",
-        "price_usd": 350,
-        "cabin": "economy",
-        "duration": "6h 10m",
-    },
-    {
-        "id": "FL010",
-        "airline": "Singapore Airlines",
-        "code": "SQ636",
-        "origin": "SIN",
-        "dest": "NRT",
-        "departure": "08:00",
-        "arrival": "16:05",
-        "price_usd": 400,
-        "cabin": "economy",
-        "duration": "7h 5m",
-    },
-]
+
+def _priced(fare: Fare, passengers: int) -> dict:
+    # Index records are frozen and shared between calls; responses get their own copy
+    return {**fare, "total_price_usd": fare["price_usd"] * passengers}
 
 
 @mcp.tool()
@@ -138,37 +31,75 @@ def search_flights(
     passengers: int = 1,
     cabin: str = "economy",
     max_price: float | None = None,
+    min_price: float | None = None,
 ) -> dict:
-    """Search for flights between airports."""
-    results = [
-        f
-        for f in MOCK_FLIGHTS
-        if f["origin"] == origin_iata.upper() and f["dest"] == dest_iata.upper() and f["cabin"] == cabin
-    ]
-
-    if max_price is not None:
-        results = [f for f in results if f["price_usd"] <= max_price]
+    """Search for flights between airports, cheapest first. With return_date, return flights are included."""
+    index = CATALOG.index
+    day = iso_date(departure)
+    results = index.search(
+        origin_iata, dest_iata, cabin, min_price=min_price, max_price=max_price, date_from=day, date_to=day
+    )
 
-    # Adjust prices for passengers
-    for flight in results:
-        flight["total_price_usd"] = flight["price_usd"] * passengers
-
-    return {
+    response = {
         "origin": origin_iata,
         "destination": dest_iata,
         "departure_date": departure,
         "return_date": return_date,
         "passengers": passengers,
         "cabin": cabin,
-        "results": sorted(results, key=lambda x: x["price_usd"]),
-        "note": "Prices are estimates. Book through airline website for actual fares.",
+        "results": [_priced(f, passengers) for f in results],
+        "note": NOTE,
+    }
+    if return_date:
+        back = iso_date(return_date)
+        returns = index.search(
+            dest_iata, origin_iata, cabin, min_price=min_price, max_price=max_price, date_from=back, date_to=back
+        )
+        response["return_results"] = [_priced(f, passengers) for f in returns]
+    return response
+
+
+@mcp.tool()
+def search_multi_city_flights(
+    legs: list[dict],
+    passengers: int = 1,
+    cabin: str = "economy",
+    max_price: float | None = None,
+    limit: int = 5,
+) -> dict:
+    """Cheapest combined itineraries over several legs (a round trip is two legs).
+
+    Each leg is {"origin_iata": ..., "dest_iata": ..., "departure": "YYYY-MM-DD"}.
+    max_price caps the per-passenger fare summed over all legs.
+    """
+    try:
+        parsed = [Leg(leg["origin_iata"], leg["dest_iata"], iso_date(leg.get("departure"))) for leg in legs]
+    except (KeyError, TypeError):
+        return {"error": "Each leg needs origin_iata and dest_iata (departure optional)"}
+    if not parsed:
+        return {"error": "At least one leg is required"}
+
+    combos = CATALOG.index.combinations(parsed, cabin, max_total=max_price, limit=max(1, min(limit, 20)))
+    return {
+        "legs": legs,
+        "passengers": passengers,
+        "cabin": cabin,
+        "itineraries": [
+            {
+                "flights": [_priced(f, passengers) for f in fares],
+                "price_usd": total,
+                "total_price_usd": total * passengers,
+            }
+            for total, fares in combos
+        ],
+        "note": NOTE,
     }
 
 
 @mcp.tool()
 def get_flight_details(flight_id: str) -> dict:
     """Get detailed information about a specific flight."""
-    flight = next((f for f in MOCK_FLIGHTS if f["id"] == flight_id), None)
+    flight = CATALOG.index.by_id.get(flight_id)
     if not flight:
         return {"error": "Flight not found"}
 
@@ -182,4 +113,5 @@ def get_flight_details(flight_id: str) -> dict:
 
 
 if __name__ == "__main__":
+    CATALOG.watch()
     mcp.run(transport="streamable-http")
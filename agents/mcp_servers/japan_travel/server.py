@@ -1,8 +1,162 @@
-"""Japan Travel MCP Server — 5 tools for Japan travel planning."""
+"""Japan Travel MCP Server — 7 tools for Japan travel planning."""
+
+from dataclasses import dataclass
+from operator import itemgetter
 
 from mcp.server.fastmcp import FastMCP
 
+from mcp_servers.batch import install_batch_route
+from mcp_servers.catalog import EMPTY_VIEW, Catalog, SortedView, group_by, without
+from mcp_servers.metrics import install_metrics
+from mcp_servers.rail import RailGraph, RailPass, Route, describe, format_minutes, price_itinerary, uncovered_price
+
 mcp = FastMCP("Japan Travel", host="0.0.0.0", port=8001)
+install_batch_route(mcp)
+install_metrics(mcp)
+
+# ─── Static reference data ─────────────────────────────────────────────
+
+ITINERARIES = {
+    "tokyo": {
+        "city": "Tokyo",
+        "suggestions": [
+            {
+                "theme": "Classic Tokyo",
+                "areas": ["Shibuya", "Asakusa", "Akihabara", "Shinjuku", "Harajuku"],
+            },
+            {
+                "theme": "Hidden Tokyo",
+                "areas": ["Yanaka", "Shimokitazawa", "Koenji", "Kagurazaka"],
+            },
+        ],
+        "budget_per_day": {"low": 80, "medium": 150, "high": 300},
+    },
+    "kyoto": {
+        "city": "Kyoto",
+        "suggestions": [
+            {
+                "theme": "Temple Trail",
+                "areas": ["Kiyomizu", "Fushimi Inari", "Arashiyama", "Gion"],
+            },
+            {
+                "theme": "Zen Experience",
+                "areas": ["Ryoan-ji", "Daitoku-ji", "Philosopher's Path"],
+            },
+        ],
+        "budget_per_day": {"low": 70, "medium": 130, "high": 250},
+    },
+    "osaka": {
+        "city": "Osaka",
+        "suggestions": [
+            {"theme": "Food Capital", "areas": ["Dotonbori", "Shinsekai", "Kuromon Market"]},
+            {
+                "theme": "Culture & Fun",
+                "areas": ["Osaka Castle", "Universal Studios", "Sumiyoshi Taisha"],
+            },
+        ],
+        "budget_per_day": {"low": 70, "medium": 140, "high": 280},
+    },
+}
+
+SEASON_TIPS = {
+    "spring": "Cherry blossom season (late March-April). Book early!",
+    "summer": "Hot and humid. Consider mountain areas.",
+    "autumn": "Beautiful foliage (November). Very popular season.",
+    "winter": "Great for skiing and onsen. Less crowded cities.",
+}
+
+HOTEL_BUDGETS = {"low": (0, 60), "medium": (60, 200), "high": (200, 1000)}
+
+DEFAULT_ROUTE = {
+    "method": "JR Line",
+    "duration": "varies",
+    "price_usd": 50,
+    "jr_pass_covered": True,
+}
+
+JR_PASS_INFO = {
+    "7_day_price": 230,
+    "14_day_price": 370,
+    "21_day_price": 470,
+    "note": "JR Pass covers most JR trains including Shinkansen (except Nozomi/Mizuho)",
+}
+
+JR_PASSES = [
+    RailPass(f"JR Pass {days}-day", days, JR_PASS_INFO[f"{days}_day_price"], frozenset({"jr", "shinkansen"}))
+    for days in (7, 14, 21)
+]
+
+# ─── Catalog index (mcp_servers/data/japan/*.jsonl, hot-reloaded) ─────
+
+
+@dataclass(frozen=True, slots=True)
+class JapanIndex:
+    hotels_by_city: dict[str, SortedView]
+    hotels_by_city_style: dict[tuple[str, str], SortedView]
+    festivals_by_region: dict[str, tuple[dict, ...]]
+    festivals_by_region_month: dict[tuple[str, int], tuple[dict, ...]]
+    ski_resorts: tuple[dict, ...]
+    ski_regions: frozenset[str]
+    # (region or None for all, skill level, kids area required) -> matching resorts
+    ski_resorts_by_filter: dict[tuple[str | None, str, bool], tuple[dict, ...]]
+    rail: RailGraph
+
+
+def build_index(data: dict[str, list[dict]]) -> JapanIndex:
+    hotels = {
+        city: [without(h, "city") for h in group]
+        for city, group in group_by(data["hotels"], itemgetter("city")).items()
+    }
+    festivals = {
+        region: tuple(without(f, "region") for f in group)
+        for region, group in group_by(data["festivals"], itemgetter("region")).items()
+    }
+    resorts = tuple(data["ski_resorts"])
+    regions = frozenset(r["region"] for r in resorts)
+    skills = {skill for r in resorts for skill in r["skill_levels"]}
+
+    return JapanIndex(
+        hotels_by_city={city: SortedView(group, "price_per_night") for city, group in hotels.items()},
+        hotels_by_city_style={
+            (city, style): SortedView(styled, "price_per_night")
+            for city, group in hotels.items()
+            for style, styled in group_by(group, itemgetter("style")).items()
+        },
+        festivals_by_region=festivals,
+        festivals_by_region_month={
+            (region, month): monthly
+            for region, group in festivals.items()
+            for month, monthly in group_by(group, itemgetter("month")).items()
+        },
+        ski_resorts=resorts,
+        ski_regions=regions,
+        ski_resorts_by_filter={
+            (region, skill, kids): tuple(
+                r
+                for r in resorts
+                if (region is None or r["region"] == region)
+                and skill in r["skill_levels"]
+                and (r["has_kids_area"] or not kids)
+            )
+            for region in (None, *regions)
+            for skill in skills
+            for kids in (False, True)
+        },
+        rail=RailGraph(data["stations"], data["rail_links"]),
+    )
+
+
+CATALOG = Catalog(
+    "japan",
+    {
+        "hotels": "japan/hotels.jsonl",
+        "festivals": "japan/festivals.jsonl",
+        "ski_resorts": "japan/ski_resorts.jsonl",
+        "stations": "japan/stations.jsonl",
+        "rail_links": "japan/rail_links.jsonl",
+    },
+    build_index,
+)
 
 
 @mcp.tool()
@@ -14,49 +168,7 @@ def search_japan_itinerary(
     season: str = "spring",
 ) -> dict:
     """Search for Japan itinerary suggestions based on city, duration, and preferences."""
-    itineraries = {
-        "tokyo": {
-            "city": "Tokyo",
-            "suggestions": [
-                {
-                    "theme": "Classic Tokyo",
-                    "areas": ["Shibuya", "Asakusa", "Akihabara", "Shinjuku", "Harajuku"],
-                },
-                {
-                    "theme": "Hidden Tokyo",
-                    "areas": ["Yanaka", "Shimokitazawa", "Koenji", "Kagurazaka"],
-                },
-            ],
-            "budget_per_day": {"low": 80, "medium": 150, "high": 300},
-        },
-        "kyoto": {
-            "city": "Kyoto",
-            "suggestions": [
-                {
-                    "theme": "Temple Trail",
-                    "areas": ["Kiyomizu", "Fushimi Inari", "Arashiyama", "Gion"],
-                },
-                {
-                    "theme": "Zen Experience",
-                    "areas": ["Ryoan-ji", "Daitoku-ji", "Philosopher's Path"],
-                },
-            ],
-            "budget_per_day": {"low": 70, "medium": 130, "high": 250},
-        },
-        "osaka": {
-            "city": "Osaka",
-            "suggestions": [
-                {"theme": "Food Capital", "areas": ["Dotonbori", "Shinsekai", "Kuromon Market"]},
-                {
-                    "theme": "Culture & Fun",
-                    "areas": ["Osaka Castle", "Universal Studios", "Sumiyoshi Taisha"],
-                },
-            ],
-            "budget_per_day": {"low": 70, "medium": 140, "high": 280},
-        },
-    }
-
-    city_data = itineraries.get(city.lower(), itineraries["tokyo"])
+    city_data = ITINERARIES.get(city.lower(), ITINERARIES["tokyo"])
     daily_budget = city_data["budget_per_day"].get(budget_level, 150)
 
     return {
@@ -67,12 +179,7 @@ def search_japan_itinerary(
         "daily_budget_usd": daily_budget,
         "total_budget_usd": daily_budget * duration,
         "itinerary_options": city_data["suggestions"],
-        "season_tips": {
-            "spring": "Cherry blossom season (late March-April). Book early!",
-            "summer": "Hot and humid. Consider mountain areas.",
-            "autumn": "Beautiful foliage (November). Very popular season.",
-            "winter": "Great for skiing and onsen. Less crowded cities.",
-        }.get(season, ""),
+        "season_tips": SEASON_TIPS.get(season, ""),
     }
 
 
@@ -86,85 +193,14 @@ def search_japan_hotels(
     style: str = "hotel",
 ) -> dict:
     """Search for hotels in Japanese cities."""
-    hotels = {
-        "tokyo": [
-            {
-                "name": "Hotel Gracery Shinjuku",
-                "area": "Shinjuku",
-                "price_per_night": 120,
-                "style": "hotel",
-                "rating": 4.3,
-            },
-            {
-                "name": "Dormy Inn Premium Ginza",
-                "area": "Ginza",
-                "price_per_night": 95,
-                "style": "hotel",
-                "rating": 4.2,
-            },
-            {
-                "name": "Nui. HOSTEL & BAR LOUNGE",
-                "area": "Kuramae",
-                "price_per_night": 35,
-                "style": "hostel",
-                "rating": 4.5,
-            },
-            {
-                "name": "Hoshinoya Tokyo",
-                "area": "Otemachi",
-                "price_per_night": 450,
-                "style": "ryokan",
-                "rating": 4.8,
-            },
-        ],
-        "kyoto": [
-            {
-                "name": "Hotel Kanra Kyoto",
-                "area": "Gojo",
-                "price_per_night": 180,
-                "style": "hotel",
-                "rating": 4.5,
-            },
-            {
-                "name": "Ryokan Shimizu",
-                "area": "Gion",
-                "price_per_night": 250,
-                "style": "ryokan",
-                "rating": 4.7,
-            },
-            {
-                "name": "Piece Hostel Sanjo",
-                "area": "Sanjo",
-                "price_per_night": 30,
-                "style": "hostel",
-                "rating": 4.4,
-            },
-        ],
-        "osaka": [
-            {
-                "name": "Cross Hotel Osaka",
-                "area": "Shinsaibashi",
-                "price_per_night": 100,
-                "style": "hotel",
-                "rating": 4.3,
-            },
-            {
-                "name": "Swissotel Nankai Osaka",
-                "area": "Namba",
-                "price_per_night": 200,
-                "style": "hotel",
-                "rating": 4.5,
-            },
-        ],
-    }
+    index = CATALOG.index
+    city_key = city.lower() if city.lower() in index.hotels_by_city else "tokyo"
+    city_hotels = index.hotels_by_city.get(city_key, EMPTY_VIEW)
+    min_p, max_p = HOTEL_BUDGETS.get(budget, (0, 1000))
 
-    city_hotels = hotels.get(city.lower(), hotels["tokyo"])
-    budget_range = {"low": (0, 60), "medium": (60, 200), "high": (200, 1000)}
-    min_p, max_p = budget_range.get(budget, (0, 1000))
-
-    filtered = [h for h in city_hotels if min_p <= h["price_per_night"] <= max_p]
+    filtered = city_hotels.between(min_p, max_p)
     if style != "any":
-        styled = [h for h in filtered if h["style"] == style]
+        styled = index.hotels_by_city_style.get((city_key, style), EMPTY_VIEW).between(min_p, max_p)
         if styled:
             filtered = styled
 
@@ -173,73 +209,22 @@ def search_japan_hotels(
         "checkin": checkin,
         "checkout": checkout,
         "guests": guests,
-        "results": filtered or city_hotels[:2],
+        "results": list(filtered or city_hotels.items[:2]),
     }
 
 
 @mcp.tool()
 def search_japan_festivals(region: str, month: int, year: int = 2025) -> dict:
     """Search for festivals and events in Japan by region and month."""
-    festivals = {
-        "tokyo": [
-            {
-                "month": 3,
-                "name": "Cherry Blossom Festival",
-                "location": "Ueno Park",
-                "dates": "Late March - Early April",
-            },
-            {
-                "month": 7,
-                "name": "Sumida River Fireworks",
-                "location": "Sumida River",
-                "dates": "Last Saturday of July",
-            },
-            {
-                "month": 11,
-                "name": "Tori-no-Ichi Fair",
-                "location": "Otori Shrine",
-                "dates": "November",
-            },
-        ],
-        "kyoto": [
-            {"month": 4, "name": "Miyako Odori", "location": "Gion", "dates": "April 1-30"},
-            {
-                "month": 7,
-                "name": "Gion Matsuri",
-                "location": "Downtown Kyoto",
-                "dates": "July 1-31",
-            },
-            {
-                "month": 10,
-                "name": "Jidai Matsuri",
-                "location": "Imperial Palace",
-                "dates": "October 22",
-            },
-        ],
-        "hokkaido": [
-            {
-                "month": 2,
-                "name": "Sapporo Snow Festival",
-                "location": "Odori Park",
-                "dates": "Early February",
-            },
-            {
-                "month": 7,
-                "name": "Furano Lavender Festival",
-                "location": "Farm Tomita",
-                "dates": "July",
-            },
-        ],
-    }
-
-    region_festivals = festivals.get(region.lower(), [])
-    monthly = [f for f in region_festivals if f["month"] == month]
+    index = CATALOG.index
+    region_key = region.lower()
+    monthly = index.festivals_by_region_month.get((region_key, month))
 
     return {
         "region": region,
         "month": month,
         "year": year,
-        "festivals": monthly or region_festivals,
+        "festivals": list(monthly or index.festivals_by_region.get(region_key, ())),
     }
 
 
@@ -251,75 +236,27 @@ def search_japan_ski_resorts(
     dates: str = "",
 ) -> dict:
     """Search for ski resorts in Japan."""
-    resorts = [
-        {
-            "name": "Niseko Grand Hirafu",
-            "region": "hokkaido",
-            "skill_levels": ["beginner", "intermediate", "advanced"],
-            "has_kids_area": True,
-            "daily_pass_usd": 65,
-            "snow_quality": "legendary powder",
-        },
-        {
-            "name": "Niseko Village",
-            "region": "hokkaido",
-            "skill_levels": ["intermediate", "advanced"],
-            "has_kids_area": True,
-            "daily_pass_usd": 60,
-            "snow_quality": "legendary powder",
-        },
-        {
-            "name": "Furano",
-            "region": "hokkaido",
-            "skill_levels": ["beginner", "intermediate", "advanced"],
-            "has_kids_area": True,
-            "daily_pass_usd": 50,
-            "snow_quality": "excellent powder",
-        },
-        {
-            "name": "Hakuba Valley",
-            "region": "nagano",
-            "skill_levels": ["intermediate", "advanced"],
-            "has_kids_area": True,
-            "daily_pass_usd": 55,
-            "snow_quality": "great powder",
-        },
-        {
-            "name": "Nozawa Onsen",
-            "region": "nagano",
-            "skill_levels": ["beginner", "intermediate", "advanced"],
-            "has_kids_area": False,
-            "daily_pass_usd": 45,
-            "snow_quality": "excellent",
-        },
-        {
-            "name": "Myoko Kogen",
-            "region": "niigata",
-            "skill_levels": ["beginner", "intermediate"],
-            "has_kids_area": True,
-            "daily_pass_usd": 40,
-            "snow_quality": "deep snow",
-        },
-    ]
-
-    filtered = resorts
-    if region:
-        region_filtered = [r for r in filtered if r["region"] == region.lower()]
-        if region_filtered:
-            filtered = region_filtered
-    if has_kids_area:
-        filtered = [r for r in filtered if r["has_kids_area"]]
-    filtered = [r for r in filtered if skill_level in r["skill_levels"]]
+    index = CATALOG.index
+    region_key = region.lower() if region and region.lower() in index.ski_regions else None
+    filtered = index.ski_resorts_by_filter.get((region_key, skill_level, has_kids_area), ())
 
     return {
         "region": region,
         "skill_level": skill_level,
         "has_kids_area": has_kids_area,
         "dates": dates,
-        "resorts": filtered or resorts[:3],
+        "resorts": list(filtered or index.ski_resorts[:3]),
     }
 
 
+def _route_info(rail: RailGraph, route: Route) -> dict:
+    return {**describe(route, rail.names), "jr_pass_covered": all(link.pass_covered for link in route.links)}
+
+
+def _fare(route: Route, jr_pass: bool, passengers: int) -> float:
+    return (uncovered_price(route) if jr_pass else route.price_usd) * passengers
+
+
 @mcp.tool()
 def plan_japan_train_route(
     origin: str,
@@ -328,91 +265,78 @@ def plan_japan_train_route(
     jr_pass: bool = True,
     passengers: int = 1,
 ) -> dict:
-    """Plan a train route in Japan using JR and other rail systems."""
-    routes = {
-        ("tokyo", "kyoto"): {
-            "method": "Shinkansen Nozomi",
-            "duration": "2h 15m",
-            "price_usd": 120,
-            "jr_pass_covered": True,
-            "note": "Nozomi not covered by JR Pass, use Hikari instead (2h 40m)",
-        },
-        ("tokyo", "osaka"): {
-            "method": "Shinkansen Nozomi",
-            "duration": "2h 30m",
-            "price_usd": 130,
-            "jr_pass_covered": True,
-        },
-        ("tokyo", "hakone"): {
-            "method": "Odakyu Romance Car",
-            "duration": "1h 25m",
-            "price_usd": 18,
-            "jr_pass_covered": False,
-        },
-        ("tokyo", "nikko"): {
-            "method": "Tobu Railway",
-            "duration": "2h",
-            "price_usd": 25,
-            "jr_pass_covered": False,
-        },
-        ("kyoto", "nara"): {
-            "method": "JR Nara Line",
-            "duration": "45m",
-            "price_usd": 7,
-            "jr_pass_covered": True,
-        },
-        ("osaka", "kyoto"): {
-            "method": "JR Special Rapid",
-            "duration": "30m",
-            "price_usd": 5,
-            "jr_pass_covered": True,
-        },
-        ("tokyo", "hiroshima"): {
-            "method": "Shinkansen Nozomi",
-            "duration": "4h",
-            "price_usd": 170,
-            "jr_pass_covered": True,
-        },
-        ("tokyo", "sapporo"): {
-            "method": "Shinkansen + Hokkaido Shinkansen",
-            "duration": "8h",
-            "price_usd": 250,
-            "jr_pass_covered": True,
-            "note": "Consider flying (1.5h, ~$100)",
-        },
-    }
-
-    key = (origin.lower(), destination.lower())
-    route = routes.get(
-        key,
-        {
-            "method": "JR Line",
-            "duration": "varies",
-            "price_usd": 50,
-            "jr_pass_covered": True,
-        },
-    )
+    """Plan a train route in Japan using JR and other rail systems (fastest path over the rail network)."""
+    rail = CATALOG.index.rail
+    start, end = rail.resolve(origin), rail.resolve(destination)
+    route = rail.route(start, end) if start and end and start != end else None
 
-    total_price = route["price_usd"] * passengers
-    if jr_pass and route.get("jr_pass_covered"):
-        total_price = 0  # Covered by JR Pass
+    if route is None:
+        route_info = DEFAULT_ROUTE
+        total_price = 0 if jr_pass else DEFAULT_ROUTE["price_usd"] * passengers
+    else:
+        route_info = _route_info(rail, route)
+        total_price = _fare(route, jr_pass, passengers)  # JR Pass covers JR segments only
 
     return {
         "origin": origin,
         "destination": destination,
         "date": date,
-        "route": route,
+        "route": route_info,
         "passengers": passengers,
         "jr_pass": jr_pass,
         "total_price_usd": total_price,
-        "jr_pass_info": {
-            "7_day_price": 230,
-            "14_day_price": 370,
-            "21_day_price": 470,
-            "note": "JR Pass covers most JR trains including Shinkansen (except Nozomi/Mizuho)",
-        },
+        "jr_pass_info": JR_PASS_INFO,
+    }
+
+
+@mcp.tool()
+def plan_japan_rail_itinerary(
+    cities: list[str],
+    return_to_start: bool = False,
+    keep_last_city: bool = False,
+    jr_pass: bool = True,
+    passengers: int = 1,
+) -> dict:
+    """Order the cities of a Japan trip to minimise rail time. The first city is the start;
+    keep_last_city fixes the final stop, return_to_start makes it a loop."""
+    rail = CATALOG.index.rail
+    stations = [rail.resolve(city) for city in cities]
+    unknown = [city for city, station in zip(cities, stations, strict=True) if station is None]
+    if unknown:
+        return {"error": f"Unknown stations: {unknown}", "known_stations": sorted(rail.names.values())}
+
+    planned = rail.order_stops(stations, return_to_start=return_to_start, fixed_end=keep_last_city)
+    if planned is None:
+        return {"error": "Some cities are not connected by rail"}
+    order, routes = planned
+
+    return {
+        "cities": cities,
+        "order": [rail.names[station] for station in order],
+        "legs": [
+            {"from": rail.names[r.stations[0]], "to": rail.names[r.stations[-1]], **_route_info(rail, r)}
+            for r in routes
+        ],
+        "total_duration": format_minutes(sum(r.minutes for r in routes)),
+        "passengers": passengers,
+        "jr_pass": jr_pass,
+        "total_price_usd": round(sum(_fare(r, jr_pass, passengers) for r in routes), 2),
+        "jr_pass_info": JR_PASS_INFO,
     }
 
 
+@mcp.tool()
+def optimize_japan_rail_passes(legs: list[dict], passengers: int = 1) -> dict:
+    """Cheapest mix of point-to-point tickets and 7/14/21-day JR Passes for a whole trip.
+
+    Each leg is {"origin": ..., "destination": ..., "date": "YYYY-MM-DD"}.
+    """
+    result = price_itinerary(CATALOG.index.rail, legs, JR_PASSES, passengers)
+    if "error" not in result:
+        result["jr_pass_info"] = JR_PASS_INFO
+    return result
+
+
 if __name__ == "__main__":
+    CATALOG.watch()
     mcp.run(transport="streamable-http")
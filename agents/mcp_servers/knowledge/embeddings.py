@@ -0,0 +1,82 @@
+"""Query embeddings for the knowledge server, with an in-process LRU cache.
+
+Agents re-ask near-identical questions within a planning session, so queries
+are normalized (NFKC, case-folded, whitespace collapsed) and their vectors
+kept in a bounded LRU.  Concurrent misses for the same query share a single
+embeddings API request.
+"""
+
+import asyncio
+import os
+import re
+import unicodedata
+from collections import OrderedDict
+
+import httpx
+
+OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "openai/text-embedding-3-small")
+CACHE_SIZE = int(os.getenv("KNOWLEDGE_EMBEDDING_CACHE_SIZE", "2048"))
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_cache: OrderedDict[str, list[float]] = OrderedDict()
+_inflight: dict[str, asyncio.Future] = {}
+stats = {"hits": 0, "misses": 0}
+
+
+def normalize_query(query: str) -> str:
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", query).casefold()).strip()
+
+
+async def _request_embedding(text: str) -> list[float]:
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        resp = await client.post(
+            f"{OPENROUTER_BASE_URL}/embeddings",
+            headers={"Authorization": f"Bearer {OPENROUTER_API_KEY}"},
+            json={"model": EMBEDDING_MODEL, "input": text},
+        )
+        resp.raise_for_status()
+        return resp.json()["data"][0]["embedding"]
+
+
+async def embed_query(query: str) -> list[float]:
+    """Embedding for *query*, from the LRU when possible."""
+    key = normalize_query(query)
+    if key in _cache:
+        stats["hits"] += 1
+        _cache.move_to_end(key)
+        return _cache[key]
+
+    if key in _inflight:
+        future = _inflight[key]
+        try:
+            # Shielded so a cancelled follower leaves the shared request alone
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+        # The leading caller was cancelled; start a request of our own
+        return await embed_query(query)
+
+    stats["misses"] += 1
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        vector = await _request_embedding(key)
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # mark retrieved when nobody else is waiting
+        raise
+    except BaseException:
+        future.cancel()
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+    future.set_result(vector)
+    _cache[key] = vector
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return vector
@@ -2,90 +2,57 @@
 
 from mcp.server.fastmcp import FastMCP
 
+from mcp_servers.batch import install_batch_route
+from mcp_servers.knowledge.embeddings import embed_query
+from mcp_servers.knowledge.store import get_pool, search_packages, search_passages
+from mcp_servers.metrics import install_metrics
+
 mcp = FastMCP("Knowledge", host="0.0.0.0", port=8005)
+install_batch_route(mcp)
+install_metrics(mcp)
 
 
 @mcp.tool()
-def semantic_search_packages(
+async def semantic_search_packages(
     query: str,
     destination: str | None = None,
     limit: int = 5,
 ) -> dict:
     """Search travel packages using semantic similarity.
 
-    In production, this queries pgvector embeddings.
-    Currently returns mock results.
+    Queries pgvector embeddings of published packages; *destination*
+    (e.g. "Japan", "Taiwan") narrows the search inside the database.
     """
-    mock_results = [
-        {
-            "title": "Tokyo Explorer: 5-Day Urban Adventure",
-            "destination": "Japan",
-            "similarity": 0.92,
-            "slug": "tokyo-explorer-5day",
-        },
-        {
-            "title": "Kyoto & Osaka Cultural Journey",
-            "destination": "Japan",
-            "similarity": 0.88,
-            "slug": "kyoto-osaka-cultural-7day",
-        },
-        {
-            "title": "Taipei City Break: 4 Days",
-            "destination": "Taiwan",
-            "similarity": 0.85,
-            "slug": "taipei-city-break-4day",
-        },
-        {
-            "title": "Hokkaido Winter Ski Paradise",
-            "destination": "Japan",
-            "similarity": 0.82,
-            "slug": "hokkaido-ski-6day",
-        },
-        {
-            "title": "Taiwan Night Market Food Trail",
-            "destination": "Taiwan",
-            "similarity": 0.80,
-            "slug": "taiwan-night-market-food-5day",
-        },
-    ]
-
-    results = mock_results
-    if destination:
-        results = [r for r in results if r["destination"].lower() == destination.lower()]
+    limit = max(1, min(limit, 20))
+    embedding = await embed_query(query)
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        results = await search_packages(conn, embedding, destination=destination, limit=limit)
 
     return {
         "query": query,
         "destination_filter": destination,
-        "results": results[:limit],
+        "results": results,
     }
 
 
 @mcp.tool()
-def query_knowledge_graph(query: str, group_id: str | None = None) -> dict:
-    """Query the knowledge graph for travel-related information.
+async def query_knowledge_graph(query: str, group_id: str | None = None, limit: int = 5) -> dict:
+    """Query the travel knowledge base for information relevant to *query*.
 
-    In production, this queries the Graphiti (Neo4j) knowledge graph.
-    Currently returns mock data.
+    Returns the closest knowledge passages (travel notes, itinerary days)
+    from pgvector.  *group_id* is reserved for per-user Graphiti graphs.
     """
+    limit = max(1, min(limit, 20))
+    embedding = await embed_query(query)
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        passages = await search_passages(conn, embedding, limit=limit)
+
     return {
         "query": query,
         "group_id": group_id,
-        "entities": [
-            {
-                "type": "destination",
-                "name": "Tokyo",
-                "properties": {"country": "Japan", "best_season": "spring"},
-            },
-            {
-                "type": "activity",
-                "name": "Cherry Blossom Viewing",
-                "properties": {"season": "spring", "cost": "free"},
-            },
-        ],
-        "relationships": [
-            {"from": "Tokyo", "to": "Cherry Blossom Viewing", "type": "HAS_ACTIVITY"},
-        ],
-        "note": "Knowledge graph integration pending. Results are illustrative.",
+        "passages": passages,
     }
 
 
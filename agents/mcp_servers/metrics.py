@@ -0,0 +1,53 @@
+"""Prometheus metrics shared by the MCP servers.
+
+``install_metrics(mcp)`` serves ``GET /metrics`` and times every tool call on
+the streamable-http endpoint; ``/mcp/batch`` records its calls itself (see
+``batch._call``).  Both land in ``mcp_tool_seconds``, labelled by server,
+tool, outcome and transport, so the backend's ``mcp_call_seconds`` (which
+includes the network and MCP session overhead) can be compared with the time
+spent inside the tool.
+"""
+
+import time
+from collections.abc import Sequence
+from typing import Any
+
+from mcp.server.fastmcp import FastMCP
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Histogram, generate_latest
+from starlette.requests import Request
+from starlette.responses import Response
+
+METRICS_PATH = "/metrics"
+
+tool_seconds = Histogram(
+    "mcp_tool_seconds",
+    "MCP tool execution time",
+    ["server", "tool", "outcome", "transport"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+
+def observe_tool(server: str, tool: str, ok: bool, seconds: float, transport: str) -> None:
+    tool_seconds.labels(server, tool, "ok" if ok else "error", transport).observe(seconds)
+
+
+def install_metrics(mcp: FastMCP) -> None:
+    """Serve ``GET /metrics`` for *mcp* and time its ``/mcp`` tool calls."""
+    call_tool = mcp.call_tool
+
+    async def timed_call_tool(name: str, arguments: dict[str, Any]) -> Sequence[Any] | dict[str, Any]:
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = await call_tool(name, arguments)
+            ok = True
+            return result
+        finally:
+            observe_tool(mcp.name, name, ok, time.perf_counter() - start, "mcp")
+
+    # Replaces the handler FastMCP registered for tools/call in its constructor
+    mcp._mcp_server.call_tool(validate_input=False)(timed_call_tool)
+
+    @mcp.custom_route(METRICS_PATH, methods=["GET"], include_in_schema=False)
+    async def metrics(request: Request) -> Response:
+        return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,417 @@
+"""Rail network routing shared by the Japan and Taiwan MCP servers.
+
+A ``RailGraph`` is built from two catalog files: stations (id, display name,
+aliases, hub flag) and links (two stations, line, kind, minutes, fare, pass
+coverage).  Links are undirected.  Routes are fastest-first Dijkstra over the
+links, optionally excluding kinds of service (e.g. no HSR).  Shortest-path
+trees from every hub are computed once at build time, so the common
+hub-to-anywhere query is a tree walk rather than a search.
+
+``order_stops`` sequences the cities of an itinerary to minimise total travel
+time: exact Held-Karp for up to ``EXACT_ORDER_LIMIT`` stops, nearest neighbour
+plus 2-opt beyond that.  ``cheapest_passes`` prices the dated legs of a trip
+as the cheapest mix of point-to-point tickets and consecutive-day passes.
+"""
+
+import heapq
+import itertools
+from bisect import bisect_right
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, replace
+from datetime import date, timedelta
+
+EXACT_ORDER_LIMIT = 10
+
+
+def station_key(name: str) -> str:
+    return name.strip().lower().replace(" ", "_").replace("-", "_")
+
+
+def format_minutes(minutes: float) -> str:
+    """90 -> "1h 30m", 120 -> "2h", 45 -> "45m" (the catalogs' duration style)."""
+    hours, mins = divmod(round(minutes), 60)
+    if hours and mins:
+        return f"{hours}h {mins}m"
+    return f"{hours}h" if hours else f"{mins}m"
+
+
+@dataclass(frozen=True, slots=True)
+class Link:
+    origin: str
+    dest: str
+    line: str
+    kind: str
+    minutes: int
+    price_usd: float
+    pass_covered: bool = False
+    note: str | None = None
+
+    def reversed(self) -> "Link":
+        return replace(self, origin=self.dest, dest=self.origin)
+
+
+@dataclass(frozen=True, slots=True)
+class Segment:
+    """Consecutive links on the same line, ridden without changing trains."""
+
+    line: str
+    kind: str
+    stations: tuple[str, ...]
+    minutes: int
+    price_usd: float
+    pass_covered: bool
+
+
+@dataclass(frozen=True, slots=True)
+class Route:
+    links: tuple[Link, ...]
+
+    @property
+    def stations(self) -> list[str]:
+        return [self.links[0].origin, *(link.dest for link in self.links)] if self.links else []
+
+    @property
+    def minutes(self) -> int:
+        return sum(link.minutes for link in self.links)
+
+    @property
+    def price_usd(self) -> float:
+        return round(sum(link.price_usd for link in self.links), 2)
+
+    @property
+    def notes(self) -> list[str]:
+        return list(dict.fromkeys(link.note for link in self.links if link.note))
+
+    def segments(self) -> list[Segment]:
+        segments: list[Segment] = []
+        for line, group in itertools.groupby(self.links, key=lambda link: link.line):
+            group = list(group)
+            segments.append(
+                Segment(
+                    line=line,
+                    kind=group[0].kind,
+                    stations=(group[0].origin, *(link.dest for link in group)),
+                    minutes=sum(link.minutes for link in group),
+                    price_usd=round(sum(link.price_usd for link in group), 2),
+                    pass_covered=all(link.pass_covered for link in group),
+                )
+            )
+        return segments
+
+
+def describe(route: Route, names: dict[str, str]) -> dict:
+    """Route as a tool response: method/duration/price_usd like the old catalog entries, plus stops and segments."""
+    segments = route.segments()
+    payload = {
+        "method": " + ".join(segment.line for segment in segments),
+        "duration": format_minutes(route.minutes),
+        "price_usd": route.price_usd,
+        "stops": [names[station] for station in route.stations],
+        "segments": [
+            {
+                "line": segment.line,
+                "from": names[segment.stations[0]],
+                "to": names[segment.stations[-1]],
+                "duration": format_minutes(segment.minutes),
+                "price_usd": segment.price_usd,
+                "pass_covered": segment.pass_covered,
+            }
+            for segment in segments
+        ],
+    }
+    if route.notes:
+        payload["note"] = " ".join(route.notes)
+    return payload
+
+
+def uncovered_price(route: Route) -> float:
+    """Fare still payable by a rail-pass holder."""
+    return round(sum(link.price_usd for link in route.links if not link.pass_covered), 2)
+
+
+# Shortest-path tree: station -> (minutes from the root, link used to arrive)
+Tree = dict[str, tuple[float, Link | None]]
+
+
+class RailGraph:
+    """Immutable rail network with fastest-route queries and precomputed hub trees."""
+
+    __slots__ = ("_adjacency", "_aliases", "_hub_trees", "names")
+
+    def __init__(self, stations: Iterable[dict], links: Iterable[dict]):
+        self.names: dict[str, str] = {}
+        self._aliases: dict[str, str] = {}
+        hubs = []
+        for station in stations:
+            sid = station["id"]
+            self.names[sid] = station.get("name", sid.replace("_", " ").title())
+            for alias in (sid, self.names[sid], *station.get("aliases", ())):
+                self._aliases[station_key(alias)] = sid
+            if station.get("hub"):
+                hubs.append(sid)
+
+        adjacency: dict[str, list[Link]] = defaultdict(list)
+        for row in links:
+            link = Link(
+                origin=row["from"],
+                dest=row["to"],
+                line=row["line"],
+                kind=row["kind"],
+                minutes=int(row["minutes"]),
+                price_usd=float(row["price_usd"]),
+                pass_covered=bool(row.get("pass_covered", False)),
+                note=row.get("note"),
+            )
+            if link.origin not in self.names or link.dest not in self.names:
+                raise KeyError(f"Link {link.origin}-{link.dest} references an unknown station")
+            adjacency[link.origin].append(link)
+            adjacency[link.dest].append(link.reversed())
+        self._adjacency = {sid: tuple(out) for sid, out in adjacency.items()}
+        self._hub_trees = {hub: self._search(hub, frozenset()) for hub in hubs}
+
+    def resolve(self, name: str) -> str | None:
+        """Station id for a name or alias ("Shin-Osaka", "osaka"), or None."""
+        return self._aliases.get(station_key(name))
+
+    def _search(self, source: str, excluded: frozenset[str], target: str | None = None) -> Tree:
+        tree: Tree = {source: (0, None)}
+        heap = [(0, source)]
+        done = set()
+        while heap:
+            dist, station = heapq.heappop(heap)
+            if station in done:
+                continue
+            done.add(station)
+            if station == target:
+                break
+            for link in self._adjacency.get(station, ()):
+                if link.kind in excluded:
+                    continue
+                candidate = dist + link.minutes
+                if link.dest not in tree or candidate < tree[link.dest][0]:
+                    tree[link.dest] = (candidate, link)
+                    heapq.heappush(heap, (candidate, link.dest))
+        return tree
+
+    @staticmethod
+    def _walk(tree: Tree, target: str) -> list[Link] | None:
+        if target not in tree:
+            return None
+        path = []
+        link = tree[target][1]
+        while link is not None:
+            path.append(link)
+            link = tree[link.origin][1]
+        path.reverse()
+        return path
+
+    def route(self, origin: str, dest: str, exclude_kinds: Iterable[str] = ()) -> Route | None:
+        """Fastest route between two station ids, or None if unreachable."""
+        excluded = frozenset(exclude_kinds)
+        if not excluded:
+            if origin in self._hub_trees:
+                path = self._walk(self._hub_trees[origin], dest)
+                return None if path is None else Route(tuple(path))
+            if dest in self._hub_trees:
+                path = self._walk(self._hub_trees[dest], origin)
+                return None if path is None else Route(tuple(link.reversed() for link in reversed(path)))
+        path = self._walk(self._search(origin, excluded, target=dest), dest)
+        return None if path is None else Route(tuple(path))
+
+    def order_stops(
+        self,
+        stops: Sequence[str],
+        *,
+        return_to_start: bool = False,
+        fixed_end: bool = False,
+        exclude_kinds: Iterable[str] = (),
+    ) -> tuple[list[str], list[Route]] | None:
+        """Visit order (first stop fixed) minimising total minutes, with the route for each leg.
+
+        None if some pair of stops is not connected.
+        """
+        stops = list(dict.fromkeys(stops))
+        if len(stops) < 2:
+            return stops, []
+        routes: dict[tuple[str, str], Route] = {}
+        for a, b in itertools.permutations(stops, 2):
+            found = self.route(a, b, exclude_kinds)
+            if found is None:
+                return None
+            routes[a, b] = found
+
+        def cost(a: str, b: str) -> int:
+            return routes[a, b].minutes
+
+        middle = stops[1:-1] if fixed_end else stops[1:]
+        end = stops[-1] if fixed_end else (stops[0] if return_to_start else None)
+        if len(middle) <= EXACT_ORDER_LIMIT:
+            order = _held_karp(stops[0], middle, end, cost)
+        else:
+            order = _two_opt(_nearest_neighbour(stops[0], middle, cost), end, cost)
+        if end is not None:
+            order.append(end)
+        return order, [routes[a, b] for a, b in itertools.pairwise(order)]
+
+
+def _held_karp(start: str, middle: list[str], end: str | None, cost) -> list[str]:
+    """Exact shortest path from *start* through every stop in *middle* (then to *end*, if given)."""
+    n = len(middle)
+    # best[(mask, i)] = (minutes, previous index) for paths covering mask that finish at middle[i]
+    best: dict[tuple[int, int], tuple[float, int]] = {(1 << i, i): (cost(start, middle[i]), -1) for i in range(n)}
+    for size in range(2, n + 1):
+        for subset in itertools.combinations(range(n), size):
+            mask = sum(1 << i for i in subset)
+            for last in subset:
+                prev_mask = mask & ~(1 << last)
+                best[mask, last] = min(
+                    (best[prev_mask, prev][0] + cost(middle[prev], middle[last]), prev)
+                    for prev in subset
+                    if prev != last
+                )
+    if n == 0:
+        return [start]
+    full = (1 << n) - 1
+    last = min(range(n), key=lambda i: best[full, i][0] + (cost(middle[i], end) if end is not None else 0))
+    order, mask = [], full
+    while last != -1:
+        order.append(middle[last])
+        mask, last = mask & ~(1 << last), best[mask, last][1]
+    return [start, *reversed(order)]
+
+
+def _nearest_neighbour(start: str, middle: list[str], cost) -> list[str]:
+    order, remaining = [start], set(middle)
+    while remaining:
+        nearest = min(remaining, key=lambda stop: cost(order[-1], stop))
+        order.append(nearest)
+        remaining.remove(nearest)
+    return order
+
+
+def _two_opt(order: list[str], end: str | None, cost) -> list[str]:
+    """Reverse sub-sequences while that shortens the path (start stays first)."""
+
+    def length(path: list[str]) -> float:
+        tail = [end] if end is not None else []
+        return sum(cost(a, b) for a, b in itertools.pairwise([*path, *tail]))
+
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, len(order) - 1):
+            for j in range(i + 1, len(order)):
+                candidate = order[:i] + order[i : j + 1][::-1] + order[j + 1 :]
+                if length(candidate) < length(order):
+                    order, improved = candidate, True
+    return order
+
+
+@dataclass(frozen=True, slots=True)
+class RailPass:
+    """Unlimited rides on links of *kinds* for *days* consecutive days."""
+
+    name: str
+    days: int
+    price_usd: float
+    kinds: frozenset[str]
+
+    def fare(self, route: Route) -> float:
+        """What is still payable on *route* while holding this pass."""
+        return round(sum(link.price_usd for link in route.links if link.kind not in self.kinds), 2)
+
+
+@dataclass(frozen=True, slots=True)
+class PassChoice:
+    rail_pass: RailPass | None  # None: point-to-point tickets for one travel day
+    start: date
+    end: date
+    legs: tuple[int, ...]  # indices into the legs passed to cheapest_passes
+    cost: float  # pass price plus fares it does not cover
+
+
+def cheapest_passes(legs: Sequence[tuple[date, Route]], passes: Sequence[RailPass]) -> tuple[float, list[PassChoice]]:
+    """Cheapest per-person cost of the dated *legs*, and the tickets/passes that achieve it.
+
+    Dynamic programme over the distinct travel days: from each day, either buy
+    tickets for that day or start a pass there (starting on a non-travel day
+    never helps) and continue from the first day it no longer covers.
+    """
+    days = sorted({day for day, _ in legs})
+    legs_on: dict[date, list[int]] = defaultdict(list)
+    for i, (day, _) in enumerate(legs):
+        legs_on[day].append(i)
+
+    # best[i] = (cost of days[i:], choice made on days[i], index of the next undecided day)
+    best: list[tuple[float, PassChoice | None, int]] = [(0.0, None, len(days))] * (len(days) + 1)
+    for i in range(len(days) - 1, -1, -1):
+        day = days[i]
+        today = tuple(legs_on[day])
+        tickets = round(sum(legs[k][1].price_usd for k in today), 2)
+        options = [(tickets + best[i + 1][0], PassChoice(None, day, day, today, tickets), i + 1)]
+        for rail_pass in passes:
+            end = day + timedelta(days=rail_pass.days - 1)
+            j = bisect_right(days, end, lo=i)
+            covered = tuple(k for d in days[i:j] for k in legs_on[d])
+            cost = round(rail_pass.price_usd + sum(rail_pass.fare(legs[k][1]) for k in covered), 2)
+            options.append((cost + best[j][0], PassChoice(rail_pass, day, end, covered, cost), j))
+        best[i] = min(options, key=lambda option: option[0])
+
+    plan, i = [], 0
+    while i < len(days):
+        _, choice, i = best[i]
+        plan.append(choice)
+    return round(best[0][0], 2), plan
+
+
+def price_itinerary(
+    graph: RailGraph,
+    legs: Sequence[dict],
+    passes: Sequence[RailPass],
+    passengers: int = 1,
+    exclude_kinds: Iterable[str] = (),
+) -> dict:
+    """Tool response for ``cheapest_passes`` over legs given as {"origin", "destination", "date"}."""
+    dated: list[tuple[date, Route]] = []
+    for leg in legs:
+        try:
+            day = date.fromisoformat(leg["date"])
+            origin, dest = graph.resolve(leg["origin"]), graph.resolve(leg["destination"])
+        except (KeyError, TypeError, ValueError):
+            return {"error": "Each leg needs origin, destination and an ISO date (YYYY-MM-DD)"}
+        if origin is None or dest is None:
+            return {"error": f"Unknown station in leg {leg['origin']} -> {leg['destination']}"}
+        route = graph.route(origin, dest, exclude_kinds)
+        if route is None:
+            return {"error": f"No rail route for {leg['origin']} -> {leg['destination']}"}
+        dated.append((day, route))
+
+    per_person, plan = cheapest_passes(dated, passes)
+    tickets_only = round(sum(route.price_usd for _, route in dated), 2)
+    return {
+        "legs": [
+            {
+                "from": graph.names[route.stations[0]] if route.links else leg["origin"],
+                "to": graph.names[route.stations[-1]] if route.links else leg["destination"],
+                "date": day.isoformat(),
+                "method": " + ".join(segment.line for segment in route.segments()),
+                "price_usd": route.price_usd,
+            }
+            for leg, (day, route) in zip(legs, dated, strict=True)
+        ],
+        "plan": [
+            {
+                "buy": choice.rail_pass.name if choice.rail_pass else "Point-to-point tickets",
+                "start_date": choice.start.isoformat(),
+                "end_date": choice.end.isoformat(),
+                "legs": list(choice.legs),
+                "price_usd": round(choice.cost * passengers, 2),
+            }
+            for choice in plan
+        ],
+        "passengers": passengers,
+        "total_price_usd": round(per_person * passengers, 2),
+        "tickets_only_price_usd": round(tickets_only * passengers, 2),
+        "savings_usd": round((tickets_only - per_person) * passengers, 2),
+    }
@@ -1,8 +1,133 @@
-"""Taiwan Travel MCP Server — 4 tools for Taiwan travel planning."""
+"""Taiwan Travel MCP Server — 6 tools for Taiwan travel planning."""
+
+from dataclasses import dataclass
+from operator import itemgetter
 
 from mcp.server.fastmcp import FastMCP
 
+from mcp_servers.batch import install_batch_route
+from mcp_servers.catalog import EMPTY_VIEW, Catalog, SortedView, group_by, without
+from mcp_servers.metrics import install_metrics
+from mcp_servers.rail import RailGraph, RailPass, Route, describe, format_minutes, price_itinerary
+
 mcp = FastMCP("Taiwan Travel", host="0.0.0.0", port=8002)
+install_batch_route(mcp)
+install_metrics(mcp)
+
+# ─── Static reference data ─────────────────────────────────────────────
+
+ITINERARIES = {
+    "taipei": {
+        "city": "Taipei",
+        "suggestions": [
+            {
+                "theme": "Classic Taipei",
+                "areas": ["Taipei 101", "Ximending", "Shilin Night Market", "Jiufen"],
+            },
+            {
+                "theme": "Local Life",
+                "areas": ["Dadaocheng", "Yongkang Street", "Maokong", "Beitou"],
+            },
+        ],
+        "budget_per_day": {"low": 40, "medium": 80, "high": 180},
+    },
+    "tainan": {
+        "city": "Tainan",
+        "suggestions": [
+            {
+                "theme": "Heritage Walk",
+                "areas": ["Anping Fort", "Confucius Temple", "Shennong Street"],
+            },
+            {
+                "theme": "Food Trail",
+                "areas": ["Hayashi Department Store", "Garden Night Market"],
+            },
+        ],
+        "budget_per_day": {"low": 30, "medium": 60, "high": 120},
+    },
+    "hualien": {
+        "city": "Hualien",
+        "suggestions": [
+            {
+                "theme": "Taroko Gorge",
+                "areas": ["Shakadang Trail", "Swallow Grotto", "Eternal Spring Shrine"],
+            },
+            {"theme": "Coastal", "areas": ["Qingshui Cliffs", "Shitiping", "East Coast"]},
+        ],
+        "budget_per_day": {"low": 35, "medium": 70, "high": 150},
+    },
+}
+
+SEASON_TIPS = {
+    "spring": "Comfortable but rainy. Bring umbrella.",
+    "summer": "Very hot and humid. Typhoon season June-September.",
+    "autumn": "Best season! October-November is perfect.",
+    "winter": "Mild in south, cool in north. Great for hot springs.",
+}
+
+HOTEL_BUDGETS = {"low": (0, 40), "medium": (40, 160), "high": (160, 1000)}
+
+DEFAULT_ROUTE = {
+    "method": "TRA",
+    "duration": "varies",
+    "price_usd": 15,
+    "hsr": False,
+}
+
+TRAIN_TIPS = {
+    "hsr_discount": "Early bird tickets save 10-35%",
+    "tra_tip": "Reserve Taroko/Puyuma express trains early",
+    "easycard": "EasyCard works on MRT, bus, and some TRA trains",
+}
+
+# Foreign-visitor passes (approximate USD prices)
+RAIL_PASSES = [
+    RailPass("THSR 3-Day Pass", 3, 80, frozenset({"hsr"})),
+    RailPass("TR-PASS 3-day", 3, 56, frozenset({"tra"})),
+    RailPass("TR-PASS 5-day", 5, 72, frozenset({"tra"})),
+]
+
+# ─── Catalog index (mcp_servers/data/taiwan/*.jsonl, hot-reloaded) ────
+
+
+@dataclass(frozen=True, slots=True)
+class TaiwanIndex:
+    hotels_by_city: dict[str, SortedView]
+    festivals_by_region: dict[str, tuple[dict, ...]]
+    festivals_by_region_month: dict[tuple[str, int], tuple[dict, ...]]
+    rail: RailGraph
+
+
+def build_index(data: dict[str, list[dict]]) -> TaiwanIndex:
+    festivals = {
+        region: tuple(without(f, "region") for f in group)
+        for region, group in group_by(data["festivals"], itemgetter("region")).items()
+    }
+    return TaiwanIndex(
+        hotels_by_city={
+            city: SortedView((without(h, "city") for h in group), "price_per_night")
+            for city, group in group_by(data["hotels"], itemgetter("city")).items()
+        },
+        festivals_by_region=festivals,
+        festivals_by_region_month={
+            (region, month): monthly
+            for region, group in festivals.items()
+            for month, monthly in group_by(group, itemgetter("month")).items()
+        },
+        rail=RailGraph(data["stations"], data["rail_links"]),
+    )
+
+
+CATALOG = Catalog(
+    "taiwan",
+    {
+        "hotels": "taiwan/hotels.jsonl",
+        "festivals": "taiwan/festivals.jsonl",
+        "stations": "taiwan/stations.jsonl",
+        "rail_links": "taiwan/rail_links.jsonl",
+    },
+    build_index,
+)
 
 
 @mcp.tool()
@@ -14,49 +139,7 @@ def search_taiwan_itinerary(
     season: str = "autumn",
 ) -> dict:
     """Search for Taiwan itinerary suggestions."""
-    itineraries = {
-        "taipei": {
-            "city": "Taipei",
-            "suggestions": [
-                {
-                    "theme": "Classic Taipei",
-                    "areas": ["Taipei 101", "Ximending", "Shilin Night Market", "Jiufen"],
-                },
-                {
-                    "theme": "Local Life",
-                    "areas": ["Dadaocheng", "Yongkang Street", "Maokong", "Beitou"],
-                },
-            ],
-            "budget_per_day": {"low": 40, "medium": 80, "high": 180},
-        },
-        "tainan": {
-            "city": "Tainan",
-            "suggestions": [
-                {
-                    "theme": "Heritage Walk",
-                    "areas": ["Anping Fort", "Confucius Temple", "Shennong Street"],
-                },
-                {
-                    "theme": "Food Trail",
-                    "areas": ["Hayashi Department Store", "Garden Night Market"],
-                },
-            ],
-            "budget_per_day": {"low": 30, "medium": 60, "high": 120},
-        },
-        "hualien": {
-            "city": "Hualien",
-            "suggestions": [
-                {
-                    "theme": "Taroko Gorge",
-                    "areas": ["Shakadang Trail", "Swallow Grotto", "Eternal Spring Shrine"],
-                },
-                {"theme": "Coastal", "areas": ["Qingshui Cliffs", "Shitiping", "East Coast"]},
-            ],
-            "budget_per_day": {"low": 35, "medium": 70, "high": 150},
-        },
-    }
-
-    city_data = itineraries.get(city.lower(), itineraries["taipei"])
+    city_data = ITINERARIES.get(city.lower(), ITINERARIES["taipei"])
     daily_budget = city_data["budget_per_day"].get(budget_level, 80)
 
     return {
@@ -67,12 +150,7 @@ def search_taiwan_itinerary(
         "daily_budget_usd": daily_budget,
         "total_budget_usd": daily_budget * duration,
         "itinerary_options": city_data["suggestions"],
-        "season_tips": {
-            "spring": "Comfortable but rainy. Bring umbrella.",
-            "summer": "Very hot and humid. Typhoon season June-September.",
-            "autumn": "Best season! October-November is perfect.",
-            "winter": "Mild in south, cool in north. Great for hot springs.",
-        }.get(season, ""),
+        "season_tips": SEASON_TIPS.get(season, ""),
     }
 
 
@@ -85,136 +163,44 @@ def search_taiwan_hotels(
     budget: str = "medium",
 ) -> dict:
     """Search for hotels in Taiwanese cities."""
-    hotels = {
-        "taipei": [
-            {
-                "name": "Amba Taipei Songshan",
-                "area": "Songshan",
-                "price_per_night": 90,
-                "rating": 4.4,
-            },
-            {
-                "name": "Hotel Proverbs Taipei",
-                "area": "Da'an",
-                "price_per_night": 150,
-                "rating": 4.6,
-            },
-            {"name": "Star Hostel Taipei", "area": "Station", "price_per_night": 20, "rating": 4.5},
-            {
-                "name": "Mandarin Oriental Taipei",
-                "area": "Songshan",
-                "price_per_night": 350,
-                "rating": 4.9,
-            },
-            {
-                "name": "CityInn Hotel Taipei Station",
-                "area": "Station",
-                "price_per_night": 55,
-                "rating": 4.2,
-            },
-        ],
-        "tainan": [
-            {
-                "name": "Silks Place Tainan",
-                "area": "West Central",
-                "price_per_night": 120,
-                "rating": 4.5,
-            },
-            {"name": "U.I.J Hotel", "area": "West Central", "price_per_night": 80, "rating": 4.4},
-        ],
-        "hualien": [
-            {
-                "name": "Taroko Village Hotel",
-                "area": "Taroko",
-                "price_per_night": 100,
-                "rating": 4.3,
-            },
-            {"name": "Kadda Hotel", "area": "Downtown", "price_per_night": 70, "rating": 4.2},
-        ],
-    }
+    hotels_by_city = CATALOG.index.hotels_by_city
+    city_hotels = hotels_by_city.get(city.lower()) or hotels_by_city.get("taipei", EMPTY_VIEW)
+    min_p, max_p = HOTEL_BUDGETS.get(budget, (0, 1000))
 
-    city_hotels = hotels.get(city.lower(), hotels["taipei"])
-    budget_range = {"low": (0, 40), "medium": (40, 160), "high": (160, 1000)}
-    min_p, max_p = budget_range.get(budget, (0, 1000))
-
-    filtered = [h for h in city_hotels if min_p <= h["price_per_night"] <= max_p]
+    filtered = city_hotels.between(min_p, max_p)
 
     return {
         "city": city,
         "checkin": checkin,
         "checkout": checkout,
         "guests": guests,
-        "results": filtered or city_hotels[:2],
+        "results": list(filtered or city_hotels.items[:2]),
     }
 
 
 @mcp.tool()
 def search_taiwan_festivals(region: str, month: int, year: int = 2025) -> dict:
     """Search for festivals and events in Taiwan."""
-    festivals = {
-        "taipei": [
-            {
-                "month": 2,
-                "name": "Taipei Lantern Festival",
-                "location": "Various",
-                "dates": "February",
-            },
-            {
-                "month": 5,
-                "name": "Dragon Boat Festival",
-                "location": "Dajia Riverside",
-                "dates": "May/June",
-            },
-            {
-                "month": 10,
-                "name": "Taipei Arts Festival",
-                "location": "Various venues",
-                "dates": "October",
-            },
-        ],
-        "tainan": [
-            {
-                "month": 3,
-                "name": "Yanshui Beehive Fireworks",
-                "location": "Yanshui",
-                "dates": "Lantern Festival",
-            },
-            {
-                "month": 4,
-                "name": "Mazu Pilgrimage",
-                "location": "Dajia to Xingang",
-                "dates": "March/April",
-            },
-        ],
-        "hualien": [
-            {
-                "month": 7,
-                "name": "Amis Harvest Festival",
-                "location": "Various tribes",
-                "dates": "July-August",
-            },
-        ],
-        "pingxi": [
-            {
-                "month": 2,
-                "name": "Pingxi Sky Lantern Festival",
-                "location": "Pingxi",
-                "dates": "Lantern Festival",
-            },
-        ],
-    }
-
-    region_festivals = festivals.get(region.lower(), [])
-    monthly = [f for f in region_festivals if f["month"] == month]
+    index = CATALOG.index
+    region_key = region.lower()
+    monthly = index.festivals_by_region_month.get((region_key, month))
 
     return {
         "region": region,
         "month": month,
         "year": year,
-        "festivals": monthly or region_festivals,
+        "festivals": list(monthly or index.festivals_by_region.get(region_key, ())),
     }
 
 
+def _route_info(rail: RailGraph, route: Route) -> dict:
+    return {**describe(route, rail.names), "hsr": any(link.kind == "hsr" for link in route.links)}
+
+
+def _excluded(hsr: bool, tra: bool) -> set[str]:
+    return {kind for kind, allowed in (("hsr", hsr), ("tra", tra)) if not allowed}
+
+
 @mcp.tool()
 def plan_taiwan_train_route(
     origin: str,
@@ -224,72 +210,75 @@ def plan_taiwan_train_route(
     tra: bool = True,
     passengers: int = 1,
 ) -> dict:
-    """Plan a train route in Taiwan using HSR and TRA."""
-    routes = {
-        ("taipei", "taichung"): {"method": "HSR", "duration": "50m", "price_usd": 22, "hsr": True},
-        ("taipei", "tainan"): {"method": "HSR", "duration": "1h 45m", "price_usd": 38, "hsr": True},
-        ("taipei", "kaohsiung"): {"method": "HSR", "duration": "2h", "price_usd": 42, "hsr": True},
-        ("taipei", "hualien"): {
-            "method": "TRA Taroko Express",
-            "duration": "2h 10m",
-            "price_usd": 15,
-            "hsr": False,
-            "note": "Scenic east coast route. Book early!",
-        },
-        ("taipei", "jiufen"): {
-            "method": "TRA + Bus",
-            "duration": "1h 30m",
-            "price_usd": 5,
-            "hsr": False,
-        },
-        ("taichung", "sun_moon_lake"): {
-            "method": "Bus from HSR station",
-            "duration": "1h 40m",
-            "price_usd": 6,
-            "hsr": False,
-        },
-        ("kaohsiung", "kenting"): {
-            "method": "Kenting Express Bus",
-            "duration": "2h 30m",
-            "price_usd": 12,
-            "hsr": False,
-        },
-        ("chiayi", "alishan"): {
-            "method": "Alishan Forest Railway",
-            "duration": "2h 30m",
-            "price_usd": 13,
-            "hsr": False,
-            "note": "Scenic mountain railway. Limited seats.",
-        },
-    }
-
-    key = (origin.lower(), destination.lower())
-    route = routes.get(
-        key,
-        {
-            "method": "TRA",
-            "duration": "varies",
-            "price_usd": 15,
-            "hsr": False,
-        },
-    )
+    """Plan a train route in Taiwan using HSR and TRA (fastest path over the rail network)."""
+    rail = CATALOG.index.rail
+    start, end = rail.resolve(origin), rail.resolve(destination)
+    route = rail.route(start, end, _excluded(hsr, tra)) if start and end and start != end else None
+    route_info = DEFAULT_ROUTE if route is None else _route_info(rail, route)
 
-    total_price = route["price_usd"] * passengers
+    total_price = route_info["price_usd"] * passengers
 
     return {
         "origin": origin,
         "destination": destination,
         "date": date,
-        "route": route,
+        "route": route_info,
         "passengers": passengers,
         "total_price_usd": total_price,
-        "tips": {
-            "hsr_discount": "Early bird tickets save 10-35%",
-            "tra_tip": "Reserve Taroko/Puyuma express trains early",
-            "easycard": "EasyCard works on MRT, bus, and some TRA trains",
-        },
+        "tips": TRAIN_TIPS,
     }
 
 
+@mcp.tool()
+def plan_taiwan_rail_itinerary(
+    cities: list[str],
+    return_to_start: bool = False,
+    keep_last_city: bool = False,
+    hsr: bool = True,
+    tra: bool = True,
+    passengers: int = 1,
+) -> dict:
+    """Order the cities of a Taiwan trip to minimise rail time. The first city is the start;
+    keep_last_city fixes the final stop, return_to_start makes it a loop."""
+    rail = CATALOG.index.rail
+    stations = [rail.resolve(city) for city in cities]
+    unknown = [city for city, station in zip(cities, stations, strict=True) if station is None]
+    if unknown:
+        return {"error": f"Unknown stations: {unknown}", "known_stations": sorted(rail.names.values())}
+
+    planned = rail.order_stops(
+        stations, return_to_start=return_to_start, fixed_end=keep_last_city, exclude_kinds=_excluded(hsr, tra)
+    )
+    if planned is None:
+        return {"error": "Some cities are not connected with the selected train services"}
+    order, routes = planned
+
+    return {
+        "cities": cities,
+        "order": [rail.names[station] for station in order],
+        "legs": [
+            {"from": rail.names[r.stations[0]], "to": rail.names[r.stations[-1]], **_route_info(rail, r)}
+            for r in routes
+        ],
+        "total_duration": format_minutes(sum(r.minutes for r in routes)),
+        "passengers": passengers,
+        "total_price_usd": round(sum(r.price_usd for r in routes) * passengers, 2),
+        "tips": TRAIN_TIPS,
+    }
+
+
+@mcp.tool()
+def optimize_taiwan_rail_passes(legs: list[dict], hsr: bool = True, tra: bool = True, passengers: int = 1) -> dict:
+    """Cheapest mix of point-to-point tickets and THSR / TR-PASS passes for a whole trip.
+
+    Each leg is {"origin": ..., "destination": ..., "date": "YYYY-MM-DD"}.
+    """
+    result = price_itinerary(CATALOG.index.rail, legs, RAIL_PASSES, passengers, _excluded(hsr, tra))
+    if "error" not in result:
+        result["tips"] = TRAIN_TIPS
+    return result
+
+
 if __name__ == "__main__":
+    CATALOG.watch()
     mcp.run(transport="streamable-http")
@@ -0,0 +1,86 @@
+"""Exchange-rate store for the utilities MCP server.
+
+Rates are units per USD.  The spot table (``exchange_rates.jsonl``) serves
+undated conversions; ``exchange_rate_history.jsonl`` holds dated snapshots,
+past and forward-dated, one ``{"date": ..., "per_usd": {...}}`` row each.  A
+dated conversion uses the latest snapshot on or before that date (the first
+snapshot for earlier dates, the last one for later dates).  A currency a
+snapshot leaves out carries over from the previous snapshot, or from spot.
+
+All snapshots live in one ``(snapshots + 1) x currencies`` array with spot in
+row 0.  A dense day -> row table covering the snapshot range is filled with a
+single vectorised binary search at build time, so resolving a date is an array
+index no matter how many years of daily rates are loaded.  The store is
+immutable; the utilities ``Catalog`` builds a new one on reload and swaps it in.
+"""
+
+from collections.abc import Iterable, Mapping, Sequence
+from datetime import date
+from operator import itemgetter
+
+import numpy as np
+
+SPOT = 0  # row of the spot rates
+
+
+class RateStore:
+    """Spot and dated exchange rates with O(1) date lookup."""
+
+    __slots__ = ("_first_day", "_row_by_day", "currencies", "dates", "per_usd", "positions")
+
+    def __init__(self, spot: Mapping[str, float], snapshots: Iterable[Mapping]):
+        self.currencies: tuple[str, ...] = tuple(spot)
+        self.positions: dict[str, int] = {currency: i for i, currency in enumerate(self.currencies)}
+
+        rows = sorted(snapshots, key=itemgetter("date"))
+        table = np.empty((len(rows) + 1, len(self.currencies)))
+        table[SPOT] = [float(rate) for rate in spot.values()]
+        for k, row in enumerate(rows, start=1):
+            table[k] = table[k - 1]
+            for currency, rate in row["per_usd"].items():
+                table[k, self.positions[currency]] = float(rate)
+        table.setflags(write=False)
+        self.per_usd = table
+
+        self.dates = np.array([date.fromisoformat(row["date"]).toordinal() for row in rows], dtype=np.int64)
+        if rows:
+            self._first_day = int(self.dates[0])
+            days = np.arange(self._first_day, int(self.dates[-1]) + 1)
+            # Snapshots on or before each day == its table row (spot is row 0, so no -1)
+            self._row_by_day = np.searchsorted(self.dates, days, side="right").astype(np.int32)
+        else:
+            self._first_day = 0
+            self._row_by_day = np.zeros(0, dtype=np.int32)
+
+    def row(self, day: date | None) -> int:
+        """Table row for conversions on *day* (spot when undated or there is no history)."""
+        if day is None or not len(self._row_by_day):
+            return SPOT
+        offset = min(max(day.toordinal() - self._first_day, 0), len(self._row_by_day) - 1)
+        return int(self._row_by_day[offset])
+
+    def rate_date(self, row: int) -> str | None:
+        """ISO date of the snapshot in *row*, or None for spot."""
+        if row == SPOT:
+            return None
+        return date.fromordinal(int(self.dates[row - 1])).isoformat()
+
+    def lookup(self, currencies: Iterable[str]) -> list[int] | None:
+        """Columns for *currencies* (case-insensitive), or None if any is unknown."""
+        try:
+            return [self.positions[currency.upper()] for currency in currencies]
+        except KeyError:
+            return None
+
+    def rates(self, row: int, source: int, targets: Sequence[int]) -> np.ndarray:
+        """Units of each target currency per unit of *source*."""
+        return self.per_usd[row, targets] / self.per_usd[row, source]
+
+    def convert(
+        self, amounts: Sequence[float], sources: Sequence[int], targets: Sequence[int], rows: Sequence[int]
+    ) -> np.ndarray:
+        """``amounts[k]`` (in ``sources[k]`` at snapshot ``rows[k]``) in every target: shape ``(items, targets)``."""
+        rows_col = np.asarray(rows, dtype=np.intp)[:, np.newaxis]
+        sources_col = np.asarray(sources, dtype=np.intp)[:, np.newaxis]
+        amounts_usd = np.asarray(amounts, dtype=np.float64)[:, np.newaxis] / self.per_usd[rows_col, sources_col]
+        return amounts_usd * self.per_usd[rows_col, np.asarray(targets, dtype=np.intp)]
@@ -1,118 +1,311 @@
-"""Utilities MCP Server — 3 tools: currency, eSIM, family advice."""
+"""Utilities MCP Server — 5 tools: currency, bulk currency, cost breakdown, eSIM, family advice."""
 
+import datetime
+from dataclasses import dataclass
+from operator import itemgetter
+
+import numpy as np
 from mcp.server.fastmcp import FastMCP
 
+from mcp_servers.batch import install_batch_route
+from mcp_servers.catalog import Catalog, SortedView, group_by, without
+from mcp_servers.metrics import install_metrics
+from mcp_servers.utilities.rates import RateStore
+
 mcp = FastMCP("Utilities", host="0.0.0.0", port=8004)
+install_batch_route(mcp)
+install_metrics(mcp)
 
-# Mock exchange rates
-EXCHANGE_RATES = {
-    "USD": 1.0,
-    "JPY": 150.0,
-    "TWD": 32.0,
-    "EUR": 0.92,
-    "GBP": 0.79,
-    "THB": 35.0,
-    "SGD": 1.34,
-    "KRW": 1320.0,
-    "CNY": 7.25,
-    "HKD": 7.82,
+FAMILY_ADVICE = {
+    "japan": {
+        "general": [
+            "Japan is extremely family-friendly and safe",
+            "Most train stations have elevators and baby facilities",
+            "Convenience stores (konbini) have baby supplies 24/7",
+            "Many restaurants have kids' menus (okosama set)",
+        ],
+        "by_age": {
+            "toddler": [
+                "Bring a lightweight stroller — most places are stroller-accessible",
+                "Tokyo DisneySea has excellent toddler-friendly rides",
+                "Many malls have nursing rooms (junyushitsu)",
+            ],
+            "child": [
+                "Kids love the Shinkansen and can get window seats",
+                "Pokemon Centers and Ghibli Museum are hits",
+                "Most activities accept children from age 3-4",
+            ],
+            "teen": [
+                "Akihabara, Harajuku, and gaming arcades are teen favorites",
+                "Consider manga cafes and themed restaurants",
+                "Teens enjoy the independence of Japan's safe public transport",
+            ],
+        },
+        "must_haves": [
+            "Travel insurance",
+            "Child-size masks",
+            "Snacks from home",
+            "Portable WiFi or eSIM",
+        ],
+    },
+    "taiwan": {
+        "general": [
+            "Taiwan is very safe and family-friendly",
+            "Night markets are exciting for kids of all ages",
+            "MRT is clean and efficient with priority seating",
+            "Taiwanese people are very welcoming to families with children",
+        ],
+        "by_age": {
+            "toddler": [
+                "Most MRT stations have lifts and baby changing facilities",
+                "Taipei Zoo is excellent for toddlers",
+                "Many family-friendly cafes with play areas",
+            ],
+            "child": [
+                "Night market games are a huge hit with kids",
+                "Leofoo Village theme park has a safari and rides",
+                "DIY activities like pineapple cake making",
+            ],
+            "teen": [
+                "Ximending is Taiwan's Harajuku — teens love it",
+                "Bubble tea culture is a fun experience",
+                "Jiufen's Spirited Away vibes appeal to anime fans",
+            ],
+        },
+        "must_haves": [
+            "Umbrella/rain gear",
+            "Mosquito repellent",
+            "Sun protection",
+            "EasyCard for transport",
+        ],
+    },
 }
 
+# Age buckets in the order their advice is listed
+AGE_GROUPS = ("toddler", "child", "teen")
+
+# ─── Catalog index (mcp_servers/data/utilities/*.jsonl, hot-reloaded) ─
+
+UNLIMITED_DATA = -1
+
+
+@dataclass(frozen=True, slots=True)
+class UtilitiesIndex:
+    rates: RateStore  # spot and dated units-per-USD snapshots
+    esim_plans: dict[str, tuple[dict, ...]]
+    esim_by_data: dict[str, SortedView]  # metered plans sorted by data_gb
+    esim_unlimited: dict[str, tuple[dict, ...]]
 
-@mcp.tool()
-def convert_currency(amount: float, from_currency: str, to_currency: str) -> dict:
-    """Convert between currencies with current exchange rates."""
-    from_rate = EXCHANGE_RATES.get(from_currency.upper())
-    to_rate = EXCHANGE_RATES.get(to_currency.upper())
 
-    if from_rate is None or to_rate is None:
-        return {"error": f"Unknown currency. Supported: {list(EXCHANGE_RATES.keys())}"}
+def build_index(data: dict[str, list[dict]]) -> UtilitiesIndex:
+    plans = {
+        country: tuple(without(p, "country") for p in group)
+        for country, group in group_by(data["esim_plans"], itemgetter("country")).items()
+    }
+    return UtilitiesIndex(
+        rates=RateStore(
+            {row["currency"]: float(row["per_usd"]) for row in data["exchange_rates"]},
+            data["exchange_rate_history"],
+        ),
+        esim_plans=plans,
+        esim_by_data={
+            country: SortedView([p for p in group if p["data_gb"] != UNLIMITED_DATA], "data_gb")
+            for country, group in plans.items()
+        },
+        esim_unlimited={
+            country: tuple(p for p in group if p["data_gb"] == UNLIMITED_DATA) for country, group in plans.items()
+        },
+    )
+
+
+CATALOG = Catalog(
+    "utilities",
+    {
+        "exchange_rates": "utilities/exchange_rates.jsonl",
+        "exchange_rate_history": "utilities/exchange_rate_history.jsonl",
+        "esim_plans": "utilities/esim_plans.jsonl",
+    },
+    build_index,
+)
+
+RATE_NOTE = "Rates are approximate. Check xe.com for live rates."
+
+
+def _unknown_currency(store: RateStore) -> dict:
+    return {"error": f"Unknown currency. Supported: {list(store.currencies)}"}
+
 
+def _rate_day(value: str | None) -> datetime.date | None:
+    """Parse an optional ISO date; raises ValueError on anything else."""
+    return datetime.date.fromisoformat(value) if value else None
+
+
+def _line_item_error(item: object) -> str | None:
+    """Why a ``convert_cost_breakdown`` line item cannot be converted, or None if it can."""
+    if not isinstance(item, dict):
+        return "expected an object"
+    amount = item.get("amount")
+    if not isinstance(amount, int | float) or isinstance(amount, bool):
+        return "amount must be a number"
+    for field in ("label", "currency", "category", "date"):
+        if field in item and not isinstance(item[field], str):
+            return f"{field} must be a string"
+    try:
+        _rate_day(item.get("date"))
+    except ValueError:
+        return "date must be YYYY-MM-DD"
+    return None
+
+
+def _age_group(age: int) -> str:
+    if age <= 3:
+        return "toddler"
+    if age <= 12:
+        return "child"
+    return "teen"
+
+
+@mcp.tool()
+def convert_currency(amount: float, from_currency: str, to_currency: str, date: str | None = None) -> dict:
+    """Convert between currencies with current exchange rates, or the rates for a travel date (YYYY-MM-DD)."""
+    store = CATALOG.index.rates
+    positions = store.lookup([from_currency, to_currency])
+    if positions is None:
+        return _unknown_currency(store)
+    try:
+        row = store.row(_rate_day(date))
+    except ValueError:
+        return {"error": f"Invalid date {date!r}; expected YYYY-MM-DD."}
+
+    from_rate, to_rate = store.per_usd[row, positions].tolist()
     usd_amount = amount / from_rate
     converted = usd_amount * to_rate
 
-    return {
+    result = {
         "from_currency": from_currency.upper(),
         "to_currency": to_currency.upper(),
         "original_amount": amount,
         "converted_amount": round(converted, 2),
         "rate": round(to_rate / from_rate, 6),
-        "note": "Rates are approximate. Check xe.com for live rates.",
+        "note": RATE_NOTE,
     }
+    if date:
+        result["rate_date"] = store.rate_date(row)
+    return result
 
 
 @mcp.tool()
-def search_esim_plans(country: str, duration_days: int, data_gb: float = 5.0) -> dict:
-    """Search for eSIM plans for a country."""
-    plans = {
-        "japan": [
-            {
-                "provider": "Ubigi",
-                "data_gb": 3,
-                "duration_days": 15,
-                "price_usd": 9,
-                "network": "SoftBank",
-            },
-            {
-                "provider": "Airalo",
-                "data_gb": 5,
-                "duration_days": 30,
-                "price_usd": 15,
-                "network": "NTT Docomo",
-            },
-            {
-                "provider": "Airalo",
-                "data_gb": 10,
-                "duration_days": 30,
-                "price_usd": 25,
-                "network": "NTT Docomo",
-            },
-            {
-                "provider": "Sakura Mobile",
-                "data_gb": -1,
-                "duration_days": 30,
-                "price_usd": 35,
-                "network": "SoftBank",
-                "note": "Unlimited data",
-            },
+def convert_currency_bulk(
+    amounts: list[float], to_currencies: list[str], from_currency: str = "USD", date: str | None = None
+) -> dict:
+    """Convert several amounts into several currencies in one call (every amount into every target).
+
+    Pass a travel date (YYYY-MM-DD) to use the rate snapshot for that day instead of current rates.
+    """
+    store = CATALOG.index.rates
+    source = store.lookup([from_currency])
+    targets = store.lookup(to_currencies)
+    if source is None or targets is None:
+        return _unknown_currency(store)
+    try:
+        row = store.row(_rate_day(date))
+    except ValueError:
+        return {"error": f"Invalid date {date!r}; expected YYYY-MM-DD."}
+
+    rates = store.rates(row, source[0], targets)
+    converted = np.round(np.outer(np.asarray(amounts, dtype=np.float64), rates), 2)
+    codes = [c.upper() for c in to_currencies]
+
+    result = {
+        "from_currency": from_currency.upper(),
+        "rates": dict(zip(codes, np.round(rates, 6).tolist(), strict=True)),
+        "conversions": [
+            {"original_amount": amount, "converted": dict(zip(codes, values, strict=True))}
+            for amount, values in zip(amounts, converted.tolist(), strict=True)
         ],
-        "taiwan": [
-            {
-                "provider": "Airalo",
-                "data_gb": 3,
-                "duration_days": 30,
-                "price_usd": 8,
-                "network": "Chunghwa Telecom",
-            },
-            {
-                "provider": "Airalo",
-                "data_gb": 5,
-                "duration_days": 30,
-                "price_usd": 12,
-                "network": "Chunghwa Telecom",
-            },
+        "note": RATE_NOTE,
+    }
+    if date:
+        result["rate_date"] = store.rate_date(row)
+    return result
+
+
+@mcp.tool()
+def convert_cost_breakdown(
+    items: list[dict], to_currencies: list[str], passengers: int = 1, date: str | None = None
+) -> dict:
+    """Convert an itinerary's line items into one or more currencies with totals and per-category subtotals.
+
+    Each item is {"label": str, "amount": float, "currency": str, "category": str (optional),
+    "per_person": bool (optional, multiplied by passengers), "date": "YYYY-MM-DD" (optional)}.
+    Items are converted at the rates for their own date, else *date*, else current rates.
+    """
+    store = CATALOG.index.rates
+    if not items:
+        return {"error": "No line items given."}
+    item_errors = [{"index": i, "error": error} for i, item in enumerate(items) if (error := _line_item_error(item))]
+    if item_errors:
+        return {"error": "Invalid line items.", "item_errors": item_errors}
+    sources = store.lookup([item.get("currency", "USD") for item in items])
+    targets = store.lookup(to_currencies)
+    if sources is None or targets is None:
+        return _unknown_currency(store)
+    try:
+        default_row = store.row(_rate_day(date))
+        rows = [store.row(_rate_day(item["date"])) if item.get("date") else default_row for item in items]
+    except ValueError:
+        return {"error": "Invalid date; expected YYYY-MM-DD."}
+
+    quantity = np.array([passengers if item.get("per_person") else 1 for item in items], dtype=np.float64)
+    amounts = np.array([item["amount"] for item in items], dtype=np.float64) * quantity
+    # One gather + multiply: row k holds line item k in every target currency
+    converted = store.convert(amounts, sources, targets, rows)
+    codes = [c.upper() for c in to_currencies]
+
+    categories = [item.get("category", "other") for item in items]
+    names, group = np.unique(categories, return_inverse=True)
+    subtotals = np.zeros((len(names), len(targets)))
+    np.add.at(subtotals, group, converted)
+
+    def by_currency(row: np.ndarray) -> dict[str, float]:
+        return dict(zip(codes, np.round(row, 2).tolist(), strict=True))
+
+    return {
+        "currencies": codes,
+        "passengers": passengers,
+        "items": [
             {
-                "provider": "Ubigi",
-                "data_gb": 10,
-                "duration_days": 30,
-                "price_usd": 20,
-                "network": "FarEasTone",
-            },
+                "label": item.get("label", f"item {k + 1}"),
+                "category": category,
+                "original_amount": round(float(amounts[k]), 2),
+                "original_currency": item.get("currency", "USD").upper(),
+                "converted": by_currency(converted[k]),
+                **({"rate_date": store.rate_date(rows[k])} if item.get("date") or date else {}),
+            }
+            for k, (item, category) in enumerate(zip(items, categories, strict=True))
         ],
+        "subtotals": {str(name): by_currency(row) for name, row in zip(names, subtotals, strict=True)},
+        "total": by_currency(converted.sum(axis=0)),
+        "note": RATE_NOTE,
     }
 
-    country_plans = plans.get(country.lower(), [])
-    suitable = [
-        p
-        for p in country_plans
-        if (p["data_gb"] >= data_gb or p["data_gb"] == -1) and p["duration_days"] >= duration_days
-    ]
+
+@mcp.tool()
+def search_esim_plans(country: str, duration_days: int, data_gb: float = 5.0) -> dict:
+    """Search for eSIM plans for a country."""
+    index = CATALOG.index
+    country_key = country.lower()
+    country_plans = index.esim_plans.get(country_key, ())
+    suitable = []
+    if country_plans:
+        candidates = (*index.esim_by_data[country_key].between(data_gb), *index.esim_unlimited[country_key])
+        suitable = [p for p in candidates if p["duration_days"] >= duration_days]
 
     return {
         "country": country,
         "duration_days": duration_days,
         "data_gb_needed": data_gb,
-        "plans": suitable or country_plans,
+        "plans": suitable or list(country_plans),
         "tip": "Install eSIM before departure. Most require QR code scanning.",
     }
 
@@ -125,86 +318,10 @@ def get_family_travel_advice(
     concerns: list[str] | None = None,
 ) -> dict:
     """Get family travel advice for a destination with children."""
-    advice = {
-        "japan": {
-            "general": [
-                "Japan is extremely family-friendly and safe",
-                "Most train stations have elevators and baby facilities",
-                "Convenience stores (konbini) have baby supplies 24/7",
-                "Many restaurants have kids' menus (okosama set)",
-            ],
-            "by_age": {
-                "toddler": [
-                    "Bring a lightweight stroller — most places are stroller-accessible",
-                    "Tokyo DisneySea has excellent toddler-friendly rides",
-                    "Many malls have nursing rooms (junyushitsu)",
-                ],
-                "child": [
-                    "Kids love the Shinkansen and can get window seats",
-                    "Pokemon Centers and Ghibli Museum are hits",
-                    "Most activities accept children from age 3-4",
-                ],
-                "teen": [
-                    "Akihabara, Harajuku, and gaming arcades are teen favorites",
-                    "Consider manga cafes and themed restaurants",
-                    "Teens enjoy the independence of Japan's safe public transport",
-                ],
-            },
-            "must_haves": [
-                "Travel insurance",
-                "Child-size masks",
-                "Snacks from home",
-                "Portable WiFi or eSIM",
-            ],
-        },
-        "taiwan": {
-            "general": [
-                "Taiwan is very safe and family-friendly",
-                "Night markets are exciting for kids of all ages",
-                "MRT is clean and efficient with priority seating",
-                "Taiwanese people are very welcoming to families with children",
-            ],
-            "by_age": {
-                "toddler": [
-                    "Most MRT stations have lifts and baby changing facilities",
-                    "Taipei Zoo is excellent for toddlers",
-                    "Many family-friendly cafes with play areas",
-                ],
-                "child": [
-                    "Night market games are a huge hit with kids",
-                    "Leofoo Village theme park has a safari and rides",
-                    "DIY activities like pineapple cake making",
-                ],
-                "teen": [
-                    "Ximending is Taiwan's Harajuku — teens love it",
-                    "Bubble tea culture is a fun experience",
-                    "Jiufen's Spirited Away vibes appeal to anime fans",
-                ],
-            },
-            "must_haves": [
-                "Umbrella/rain gear",
-                "Mosquito repellent",
-                "Sun protection",
-                "EasyCard for transport",
-            ],
-        },
-    }
-
-    dest_advice = advice.get(destination.lower(), advice["japan"])
-
-    # Categorize children
-    age_categories = []
-    for age in children_ages:
-        if age <= 3:
-            age_categories.append("toddler")
-        elif age <= 12:
-            age_categories.append("child")
-        else:
-            age_categories.append("teen")
+    dest_advice = FAMILY_ADVICE.get(destination.lower(), FAMILY_ADVICE["japan"])
 
-    relevant_advice = []
-    for cat in set(age_categories):
-        relevant_advice.extend(dest_advice["by_age"].get(cat, []))
+    groups = {_age_group(age) for age in children_ages}
+    relevant_advice = [tip for group in AGE_GROUPS if group in groups for tip in dest_advice["by_age"][group]]
 
     return {
         "destination": destination,
@@ -221,4 +338,5 @@ def get_family_travel_advice(
 
 
 if __name__ == "__main__":
+    CATALOG.watch()
     mcp.run(transport="streamable-http")
@@ -18,6 +18,7 @@ from orchestrator.crews.synthesis_crew import create_synthesis_crew
 from orchestrator.crews.taiwan_crew import create_taiwan_crew
 from orchestrator.mcp_config import safe_mcp_tools
 from orchestrator.state import IntentSlots, TripPlanningState
+from orchestrator.tracing import flow_step
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +27,7 @@ class TripPlanningFlow(Flow[TripPlanningState]):
     """Main orchestration flow for trip planning."""
 
     @start()
+    @flow_step
     def parse_intent(self):
         """Step 1: Parse user intent from the message."""
         logger.info("Parsing intent from: %s", self.state.user_message[:100])
@@ -57,6 +59,7 @@ class TripPlanningFlow(Flow[TripPlanningState]):
         logger.info("Slots complete: %s, Intent: %s", self.state.slots_complete, self.state.intent)
 
     @router(parse_intent)
+    @flow_step
     def route_after_intent(self):
         """Route based on whether slots are complete."""
         if not self.state.slots_complete:
@@ -71,6 +74,7 @@ class TripPlanningFlow(Flow[TripPlanningState]):
             return "plan_japan"  # Default
 
     @listen("ask_user")
+    @flow_step
     def ask_clarifying_questions(self):
         """Generate clarifying questions for missing slots."""
         missing = self.state.intent.missing_fields
@@ -89,6 +93,7 @@ class TripPlanningFlow(Flow[TripPlanningState]):
             )
 
     @listen("plan_japan")
+    @flow_step
     def plan_japan_trip(self):
         """Step 2a: Run Japan planning crew with MCP tools."""
         logger.info("Running Japan planning crew")
@@ -99,6 +104,7 @@ class TripPlanningFlow(Flow[TripPlanningState]):
         self.state.itinerary_data = {"japan": str(result)}
 
     @listen("plan_taiwan")
+    @flow_step
     def plan_taiwan_trip(self):
         """Step 2b: Run Taiwan planning crew with MCP tools."""
         logger.info("Running Taiwan planning crew")
@@ -109,6 +115,7 @@ class TripPlanningFlow(Flow[TripPlanningState]):
         self.state.itinerary_data = {"taiwan": str(result)}
 
     @listen(plan_japan_trip, plan_taiwan_trip)
+    @flow_step
     def book_flights_and_esim(self):
         """Step 3: Run booking crew with flights + utilities MCP tools."""
         logger.info("Running booking crew")
@@ -119,6 +126,7 @@ class TripPlanningFlow(Flow[TripPlanningState]):
         self.state.flight_data = {"results": str(result)}
 
     @listen(book_flights_and_esim)
+    @flow_step
     def get_advisory_info(self):
         """Step 4: Run advisory crew with utility MCP tools."""
         logger.info("Running advisory crew")
@@ -129,6 +137,7 @@ class TripPlanningFlow(Flow[TripPlanningState]):
         self.state.currency_data = {"results": str(result)}
 
     @listen(get_advisory_info)
+    @flow_step
     def synthesize_final_itinerary(self):
         """Step 5: Synthesize everything into a final response."""
         logger.info("Running synthesis crew")
@@ -149,6 +158,7 @@ class TripPlanningFlow(Flow[TripPlanningState]):
         self.state.final_itinerary = str(result)
 
     @listen(synthesize_final_itinerary)
+    @flow_step
     def validate_links_step(self):
         """Step 6: Validate all URLs in the final itinerary."""
         logger.info("Validating links in final itinerary")
@@ -161,12 +171,17 @@ async def run_trip_planning(
     user_id: str | None = None,
     session_id: str | None = None,
     existing_intent: dict | None = None,
+    traceparent: str | None = None,
 ) -> str:
-    """Entry point for trip planning. Returns the final response."""
+    """Entry point for trip planning. Returns the final response.
+
+    *traceparent* (W3C header of the caller's span) puts the flow steps in the caller's trace.
+    """
     state = TripPlanningState(
         user_id=user_id,
         session_id=session_id,
         user_message=user_message,
+        traceparent=traceparent,
     )
 
     if existing_intent:
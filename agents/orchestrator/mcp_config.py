@@ -6,6 +6,8 @@ from contextlib import contextmanager
 
 from crewai_tools import MCPServerAdapter
 
+from orchestrator.tracing import current_traceparent
+
 logger = logging.getLogger(__name__)
 
 # ─── MCP Server URLs (Docker-internal defaults) ────────────────────────
@@ -49,7 +51,11 @@ def safe_mcp_tools(server_keys: list[str], connect_timeout: int = 30):
         if key not in MCP_SERVERS:
             logger.warning("Unknown MCP server key: %s", key)
             continue
-        params_list.append(MCP_SERVERS[key])
+        params = MCP_SERVERS[key]
+        traceparent = current_traceparent()
+        if traceparent:
+            params = {**params, "headers": {"traceparent": traceparent}}
+        params_list.append(params)
 
     if not params_list:
         logger.warning("No valid MCP server keys provided: %s", server_keys)
@@ -50,6 +50,7 @@ class TripPlanningState(BaseModel):
     user_id: str | None = None
     session_id: str | None = None
     user_message: str = ""
+    traceparent: str | None = None  # W3C trace context of the caller, for flow step spans
 
     # Intent
     intent: IntentSlots = Field(default_factory=IntentSlots)
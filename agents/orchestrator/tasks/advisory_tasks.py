@@ -25,7 +25,8 @@ def create_currency_task(agent, slots: dict) -> Task:
             f"- Budget: ${slots.get('budget_usd', 1000)} USD\n"
             f"- Convert to {dest_currency}\n"
             f"- Provide daily spending estimates\n"
-            f"- Include tipping and payment customs"
+            f"- Include tipping and payment customs\n"
+            f"- Convert all amounts in one convert_currency_bulk call; use convert_cost_breakdown for cost tables"
         ),
         expected_output="Currency conversion and money tips",
         agent=agent,
@@ -41,7 +41,8 @@ def create_train_task(agent, destination: str, slots: dict) -> Task:
         description=(
             f"Plan train routes for the {destination} itinerary.\n\n"
             f"- Travelers: {slots.get('num_travelers', 2)}\n"
-            f"- Include JR Pass / HSR pass recommendation\n"
+            f"- Order multi-city stops with the rail itinerary tool, then price each leg\n"
+            f"- Recommend JR Pass / HSR pass only if the pass optimizer shows savings\n"
             f"- Estimate transport costs between cities\n"
         ),
         expected_output="Train routes with durations, costs, and pass recommendations",
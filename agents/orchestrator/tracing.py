@@ -0,0 +1,95 @@
+"""Span timing for the CrewAI flow steps, in the backend's tracing format.
+
+``flow_step`` runs a Flow method in a span named ``flow.<method>``.  Spans join
+the trace of ``state.traceparent`` (a W3C header handed over by the caller) or
+start a new one.  They are logged when ``TRACING_EXPORTER=log`` and collected
+in ``exporter.spans`` when it is ``memory``; the default ``none`` skips them.
+``current_traceparent()`` is the header for the running step, which
+``safe_mcp_tools`` forwards so MCP server logs join the same trace.
+"""
+
+import functools
+import logging
+import os
+import re
+import secrets
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+@dataclass(slots=True)
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    end_ns: int = 0
+    status: str = "ok"
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class Exporter:
+    """Collects spans (``memory``), logs them (``log``) or drops them (``none``)."""
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.spans: list[Span] = []
+
+    def export(self, span: Span) -> None:
+        if self.mode == "memory":
+            self.spans.append(span)
+        elif self.mode == "log":
+            logger.info(
+                "span %s %.1fms %s trace=%s span=%s parent=%s",
+                span.name,
+                span.duration_ms,
+                span.status,
+                span.trace_id,
+                span.span_id,
+                span.parent_id,
+            )
+
+
+exporter = Exporter(os.getenv("TRACING_EXPORTER", "none"))
+_current: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def current_traceparent() -> str | None:
+    span = _current.get()
+    return f"00-{span.trace_id}-{span.span_id}-01" if span is not None else None
+
+
+def flow_step(method: Callable) -> Callable:
+    """Wrap a Flow step in a span (apply below the CrewAI ``@start``/``@listen``/``@router`` decorator)."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if exporter.mode == "none":
+            return method(self, *args, **kwargs)
+        match = _TRACEPARENT_RE.match(getattr(self.state, "traceparent", None) or "")
+        trace_id, parent_id = match.groups() if match else (secrets.token_hex(16), None)
+        span = Span(f"flow.{method.__name__}", trace_id, secrets.token_hex(8), parent_id, time.time_ns())
+        token = _current.set(span)
+        try:
+            return method(self, *args, **kwargs)
+        except BaseException:
+            span.status = "error"
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current.reset(token)
+            exporter.export(span)
+
+    return wrapper
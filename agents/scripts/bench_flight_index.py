@@ -0,0 +1,141 @@
+"""Fare index vs linear scan at catalog scale.
+
+    python -m scripts.bench_flight_index                 # 1M synthetic fares
+    python -m scripts.bench_flight_index --fares 200000 --repeat 500
+
+Builds a synthetic fare table (airports x cabins x a year of dated fares plus
+daily schedules), then times one-way searches with price and date filters,
+round trips and three-leg multi-city searches against the index.  One-way
+searches are also timed as the old full scan plus sort for comparison;
+p50/p95/p99 latencies are reported.
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from mcp_servers.flights.index import FlightIndex, Leg
+
+AIRPORTS = ["TPE", "KHH", "NRT", "HND", "KIX", "CTS", "FUK", "OKA", "ICN", "HKG", "BKK", "SIN", "MNL", "SGN", "KUL"]
+CABINS = ["economy", "premium_economy", "business"]
+AIRLINES = ["Japan Airlines", "ANA", "EVA Air", "China Airlines", "Peach Aviation", "Starlux", "Tigerair"]
+START = date(2025, 1, 1)
+
+
+def synthetic_fares(count: int, rng: random.Random) -> list[dict]:
+    fares = []
+    for i in range(count):
+        origin, dest = rng.sample(AIRPORTS, 2)
+        cabin = rng.choices(CABINS, weights=(6, 2, 1))[0]
+        fare = {
+            "id": f"SY{i:07d}",
+            "airline": rng.choice(AIRLINES),
+            "origin": origin,
+            "dest": dest,
+            "cabin": cabin,
+            "price_usd": round(rng.uniform(80, 600) * (1, 1.6, 3.5)[CABINS.index(cabin)], 2),
+        }
+        # Mostly dated fares; a few undated daily schedules
+        if rng.random() < 0.95:
+            fare["date"] = (START + timedelta(days=rng.randrange(365))).isoformat()
+        fares.append(fare)
+    return fares
+
+
+def scan(fares: list[dict], origin: str, dest: str, cabin: str, max_price: float, day: str) -> list[dict]:
+    """The pre-index search: filter every fare, then sort."""
+    hits = [
+        f
+        for f in fares
+        if f["origin"] == origin
+        and f["dest"] == dest
+        and f["cabin"] == cabin
+        and f["price_usd"] <= max_price
+        and f.get("date") in (None, day)
+    ]
+    return sorted(hits, key=lambda f: f["price_usd"])
+
+
+def _report(label: str, latencies: list[float]) -> None:
+    ordered = sorted(latencies)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+    print(f"{label:<34} p50 {statistics.median(ordered):9.3f}  p95 {pct(0.95):9.3f}  p99 {pct(0.99):9.3f} ms")
+
+
+def _time(fn, repeat: int) -> list[float]:
+    latencies = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return latencies
+
+
+def main(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    print(f"Generating {args.fares} synthetic fares...")
+    fares = synthetic_fares(args.fares, rng)
+
+    t0 = time.perf_counter()
+    index = FlightIndex(fares)
+    print(f"Indexed {len(index)} fares on {len(index.routes)} routes in {time.perf_counter() - t0:.2f}s\n")
+
+    def day() -> str:
+        return (START + timedelta(days=rng.randrange(365))).isoformat()
+
+    def pair() -> tuple[str, str]:
+        return tuple(rng.sample(AIRPORTS, 2))
+
+    def one_way() -> None:
+        origin, dest = pair()
+        d = day()
+        index.search(origin, dest, "economy", max_price=400, date_from=d, date_to=d)
+
+    def one_way_month() -> None:
+        origin, dest = pair()
+        start = START + timedelta(days=rng.randrange(335))
+        index.search(
+            origin,
+            dest,
+            "economy",
+            min_price=100,
+            max_price=300,
+            date_from=start.isoformat(),
+            date_to=(start + timedelta(days=30)).isoformat(),
+        )
+
+    def round_trip() -> None:
+        origin, dest = pair()
+        out = START + timedelta(days=rng.randrange(350))
+        back = (out + timedelta(days=rng.randint(3, 14))).isoformat()
+        index.combinations([Leg(origin, dest, out.isoformat()), Leg(dest, origin, back)], limit=5)
+
+    def multi_city() -> None:
+        a, b, c = rng.sample(AIRPORTS, 3)
+        d0 = START + timedelta(days=rng.randrange(340))
+        legs = [Leg(a, b, d0.isoformat()), Leg(b, c, (d0 + timedelta(days=4)).isoformat())]
+        legs.append(Leg(c, a, (d0 + timedelta(days=9)).isoformat()))
+        index.combinations(legs, limit=5)
+
+    def linear() -> None:
+        origin, dest = pair()
+        scan(fares, origin, dest, "economy", 400, day())
+
+    _report("index: one-way, one day", _time(one_way, args.repeat))
+    _report("index: one-way, 30-day window", _time(one_way_month, args.repeat))
+    _report("index: round trip (top 5)", _time(round_trip, args.repeat))
+    _report("index: 3-leg multi-city (top 5)", _time(multi_city, args.repeat))
+    _report("linear scan + sort: one-way", _time(linear, max(1, args.repeat // 50)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fares", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
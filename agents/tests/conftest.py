@@ -7,6 +7,7 @@ Run via: make test-mcp
 import json
 import os
 
+import httpx
 import pytest
 from mcp import ClientSession
 from mcp.client.streamable_http import streamablehttp_client
@@ -28,19 +29,26 @@ EXPECTED_TOOLS = {
         "search_japan_festivals",
         "search_japan_ski_resorts",
         "plan_japan_train_route",
+        "plan_japan_rail_itinerary",
+        "optimize_japan_rail_passes",
     ],
     "taiwan": [
         "search_taiwan_itinerary",
         "search_taiwan_hotels",
         "search_taiwan_festivals",
         "plan_taiwan_train_route",
+        "plan_taiwan_rail_itinerary",
+        "optimize_taiwan_rail_passes",
     ],
     "flights": [
         "search_flights",
+        "search_multi_city_flights",
         "get_flight_details",
     ],
     "utilities": [
         "convert_currency",
+        "convert_currency_bulk",
+        "convert_cost_breakdown",
         "search_esim_plans",
         "get_family_travel_advice",
     ],
@@ -80,6 +88,21 @@ async def list_mcp_tools(server_key: str) -> list[str]:
             return [t.name for t in tools_result.tools]
 
 
+async def post_mcp_batch(server_key: str, requests: list) -> httpx.Response:
+    """POST a JSON-RPC batch to a server's /mcp/batch route (no MCP session)."""
+    async with httpx.AsyncClient(timeout=15.0) as client:
+        return await client.post(f"{MCP_URLS[server_key]}/batch", json=requests)
+
+
+def tool_call(request_id: int, name: str, arguments: dict) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "method": "tools/call",
+        "params": {"name": name, "arguments": arguments},
+    }
+
+
 @pytest.fixture
 def japan_url():
     return MCP_URLS["japan"]
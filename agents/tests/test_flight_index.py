@@ -0,0 +1,93 @@
+"""Tests for the flights server's fare index (no servers needed).
+
+Run via: make test-mcp
+"""
+
+import itertools
+import random
+
+import pytest
+
+from mcp_servers.flights.index import FlightIndex, Leg
+
+AIRPORTS = ["TPE", "NRT", "KIX", "CTS"]
+
+
+def synthetic_fares(count: int, seed: int = 3) -> list[dict]:
+    rng = random.Random(seed)
+    fares = []
+    for i in range(count):
+        origin, dest = rng.sample(AIRPORTS, 2)
+        fare = {
+            "id": f"T{i}",
+            "origin": origin,
+            "dest": dest,
+            "cabin": rng.choice(["economy", "business"]),
+            "price_usd": rng.randint(80, 900),
+        }
+        if rng.random() < 0.7:
+            fare["date"] = f"2025-04-{rng.randint(1, 9):02d}"
+        fares.append(fare)
+    return fares
+
+
+@pytest.fixture(scope="module")
+def fares():
+    return synthetic_fares(600)
+
+
+@pytest.fixture(scope="module")
+def index(fares):
+    return FlightIndex(fares)
+
+
+def scan(fares, origin, dest, cabin, min_price=None, max_price=None, day=None):
+    """Reference linear scan."""
+    return [
+        f
+        for f in fares
+        if (f["origin"], f["dest"], f["cabin"]) == (origin, dest, cabin)
+        and (min_price is None or f["price_usd"] >= min_price)
+        and (max_price is None or f["price_usd"] <= max_price)
+        and (day is None or f.get("date") in (None, day))
+    ]
+
+
+class TestSearch:
+    @pytest.mark.parametrize(
+        "min_price,max_price,day", [(None, None, None), (200, 500, None), (None, 400, "2025-04-03")]
+    )
+    def test_matches_linear_scan(self, fares, index, min_price, max_price, day):
+        for origin, dest in itertools.permutations(AIRPORTS, 2):
+            got = index.search(
+                origin, dest, "economy", min_price=min_price, max_price=max_price, date_from=day, date_to=day
+            )
+            expected = scan(fares, origin, dest, "economy", min_price, max_price, day)
+            assert sorted(f["id"] for f in got) == sorted(f["id"] for f in expected)
+            assert [f["price_usd"] for f in got] == sorted(f["price_usd"] for f in expected)
+
+    def test_records_are_read_only(self, index):
+        fare = index.search("TPE", "NRT")[0]
+        with pytest.raises(TypeError):
+            fare["total_price_usd"] = 1
+
+    def test_unknown_route_is_empty(self, index):
+        assert index.search("LAX", "JFK") == []
+
+
+class TestCombinations:
+    def test_matches_brute_force(self, fares, index):
+        legs = [Leg("TPE", "NRT", "2025-04-01"), Leg("NRT", "KIX", "2025-04-04"), Leg("KIX", "TPE", "2025-04-08")]
+        got = index.combinations(legs, limit=5)
+        per_leg = [scan(fares, leg.origin, leg.dest, "economy", day=leg.date) for leg in legs]
+        totals = sorted(sum(f["price_usd"] for f in combo) for combo in itertools.product(*per_leg))
+        assert [total for total, _ in got] == totals[:5]
+        for total, combo in got:
+            assert total == sum(f["price_usd"] for f in combo)
+            assert [(f["origin"], f["dest"]) for f in combo] == [(leg.origin, leg.dest) for leg in legs]
+
+    def test_max_total_caps_itineraries(self, index):
+        legs = [Leg("TPE", "NRT"), Leg("NRT", "TPE")]
+        cheapest = index.combinations(legs, limit=1)[0][0]
+        assert index.combinations(legs, max_total=cheapest - 1) == []
+        assert all(total <= cheapest + 50 for total, _ in index.combinations(legs, max_total=cheapest + 50))
@@ -0,0 +1,182 @@
+"""Tests for the knowledge server's pgvector retrieval and query-embedding cache.
+
+Store tests need Postgres with pgvector and the backend schema (docker compose
+up -d); they seed rows with deterministic vectors inside a transaction that is
+rolled back, and are skipped when the database is unreachable.
+Run via: make test-mcp
+"""
+
+import asyncio
+import os
+import uuid
+
+import asyncpg
+import pytest
+from pgvector.asyncpg import register_vector
+
+from mcp_servers.knowledge import embeddings
+from mcp_servers.knowledge.store import _dsn, search_packages, search_passages
+
+DIM = 1536
+TEST_DATABASE_URL = os.getenv("KNOWLEDGE_TEST_DATABASE_URL")
+
+
+def axis_vector(axis: int, weight: float = 1.0) -> list[float]:
+    """Unit-ish vector along one axis; nearby axes give distinct, predictable distances."""
+    vec = [0.0] * DIM
+    vec[axis] = weight
+    vec[axis + 1] = 1.0 - weight
+    return vec
+
+
+# (slug, destination, embedding axis, weight)
+SEED_PACKAGES = [
+    ("test-okinawa-reef", "Japan", 1000, 1.0),
+    ("test-kyoto-temples", "Japan", 1100, 1.0),
+    ("test-kenting-beach", "Taiwan", 1000, 0.6),
+]
+
+
+@pytest.fixture
+async def conn():
+    dsn = TEST_DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1) if TEST_DATABASE_URL else _dsn()
+    try:
+        connection = await asyncio.wait_for(asyncpg.connect(dsn), timeout=5)
+    except (TimeoutError, OSError, asyncpg.PostgresError) as e:
+        pytest.skip(f"Postgres unavailable: {e}")
+    await register_vector(connection)
+    if not await connection.fetchval("SELECT to_regclass('travel_embeddings') IS NOT NULL"):
+        await connection.close()
+        pytest.skip("travel_embeddings missing; start the backend once to create the schema")
+
+    tx = connection.transaction()
+    await tx.start()
+    try:
+        yield connection
+    finally:
+        await tx.rollback()
+        await connection.close()
+
+
+async def seed(conn: asyncpg.Connection) -> dict[str, uuid.UUID]:
+    ids = {}
+    for slug, destination, axis, weight in SEED_PACKAGES:
+        package_id = uuid.uuid4()
+        ids[slug] = package_id
+        await conn.execute(
+            """INSERT INTO travel_packages
+               (id, title, slug, destination, category, summary, description, duration_days, price_usd, is_published)
+               VALUES ($1, $2, $3, $4, 'Test', 'summary', 'description', 5, 1200, true)""",
+            package_id,
+            slug.replace("-", " ").title(),
+            slug,
+            destination,
+        )
+        # Two overview chunks per package; only the nearer one should be reported
+        for chunk_weight in (weight, weight - 0.1):
+            await conn.execute(
+                """INSERT INTO travel_embeddings (id, source_type, source_id, content_text, embedding)
+                   VALUES ($1, 'package', $2, $3, $4)""",
+                uuid.uuid4(),
+                package_id,
+                f"{slug} chunk {chunk_weight}",
+                axis_vector(axis, chunk_weight),
+            )
+    await conn.execute(
+        """INSERT INTO travel_embeddings (id, source_type, source_id, content_text, embedding)
+           VALUES ($1, 'knowledge', $2, 'Reef etiquette: do not touch coral.', $3)""",
+        uuid.uuid4(),
+        uuid.uuid4(),
+        axis_vector(1000, 0.95),
+    )
+    return ids
+
+
+class TestSearchPackages:
+    @pytest.mark.asyncio
+    async def test_nearest_package_first(self, conn):
+        await seed(conn)
+        results = await search_packages(conn, axis_vector(1000), limit=3)
+        assert results[0]["slug"] == "test-okinawa-reef"
+        assert results[0]["similarity"] == pytest.approx(1.0, abs=1e-3)
+
+    @pytest.mark.asyncio
+    async def test_one_row_per_package(self, conn):
+        await seed(conn)
+        results = await search_packages(conn, axis_vector(1000), limit=5)
+        slugs = [r["slug"] for r in results]
+        assert len(slugs) == len(set(slugs))
+
+    @pytest.mark.asyncio
+    async def test_destination_filter_in_sql(self, conn):
+        await seed(conn)
+        # Nearest overall is in Japan; filtering for Taiwan must still fill the page
+        results = await search_packages(conn, axis_vector(1000), destination="taiwan", limit=3)
+        assert results
+        assert all(r["destination"] == "Taiwan" for r in results)
+        assert results[0]["slug"] == "test-kenting-beach"
+
+
+class TestSearchPassages:
+    @pytest.mark.asyncio
+    async def test_returns_knowledge_not_packages(self, conn):
+        await seed(conn)
+        passages = await search_passages(conn, axis_vector(1000), limit=3)
+        assert passages[0]["content"].startswith("Reef etiquette")
+        assert all(p["source_type"] != "package" for p in passages)
+
+
+class TestQueryEmbeddingCache:
+    @pytest.fixture(autouse=True)
+    def fake_embeddings(self, monkeypatch):
+        calls = []
+
+        async def fake_request(text):
+            calls.append(text)
+            await asyncio.sleep(0.01)
+            return [float(len(text))]
+
+        monkeypatch.setattr(embeddings, "_request_embedding", fake_request)
+        monkeypatch.setattr(embeddings, "_cache", type(embeddings._cache)())
+        return calls
+
+    @pytest.mark.asyncio
+    async def test_normalized_queries_share_entry(self, fake_embeddings):
+        await embeddings.embed_query("Okinawa  Snorkeling")
+        await embeddings.embed_query("okinawa snorkeling")
+        assert fake_embeddings == ["okinawa snorkeling"]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_coalesce(self, fake_embeddings):
+        await asyncio.gather(*[embeddings.embed_query("kyoto temples") for _ in range(5)])
+        assert fake_embeddings == ["kyoto temples"]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_strand_followers(self, fake_embeddings):
+        leader = asyncio.create_task(embeddings.embed_query("taipei night markets"))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(embeddings.embed_query("taipei night markets"))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await asyncio.wait_for(follower, timeout=1) == [float(len("taipei night markets"))]
+        assert leader.cancelled()
+        assert not embeddings._inflight
+
+    @pytest.mark.asyncio
+    async def test_cancelled_follower_does_not_cancel_request(self, fake_embeddings):
+        leader = asyncio.create_task(embeddings.embed_query("sapporo snow festival"))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(embeddings.embed_query("sapporo snow festival"))
+        await asyncio.sleep(0)
+        follower.cancel()
+        assert await leader == [float(len("sapporo snow festival"))]
+        assert follower.cancelled()
+        assert fake_embeddings == ["sapporo snow festival"]
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self, fake_embeddings, monkeypatch):
+        monkeypatch.setattr(embeddings, "CACHE_SIZE", 2)
+        for query in ("a1", "b2", "a1", "c3", "b2"):
+            await embeddings.embed_query(query)
+        # "b2" was least recently used when "c3" arrived, so it is fetched again
+        assert fake_embeddings == ["a1", "b2", "c3", "b2"]
@@ -4,9 +4,12 @@ Requires all MCP servers to be running (docker compose up -d).
 Run via: make test-mcp
 """
 
+import json
+
+import httpx
 import pytest
 
-from tests.conftest import EXPECTED_TOOLS, call_mcp_tool, list_mcp_tools
+from tests.conftest import EXPECTED_TOOLS, MCP_URLS, call_mcp_tool, list_mcp_tools, post_mcp_batch, tool_call
 
 # ── Tool Discovery ───────────────────────────────────────────────────────
 
@@ -15,30 +18,30 @@ class TestToolDiscovery:
     """Verify each MCP server exposes the expected tools."""
 
     @pytest.mark.asyncio
-    async def test_japan_server_exposes_5_tools(self):
+    async def test_japan_server_exposes_7_tools(self):
         names = await list_mcp_tools("japan")
-        assert len(names) == 5
+        assert len(names) == 7
         for expected in EXPECTED_TOOLS["japan"]:
             assert expected in names
 
     @pytest.mark.asyncio
-    async def test_taiwan_server_exposes_4_tools(self):
+    async def test_taiwan_server_exposes_6_tools(self):
         names = await list_mcp_tools("taiwan")
-        assert len(names) == 4
+        assert len(names) == 6
         for expected in EXPECTED_TOOLS["taiwan"]:
             assert expected in names
 
     @pytest.mark.asyncio
-    async def test_flights_server_exposes_2_tools(self):
+    async def test_flights_server_exposes_3_tools(self):
         names = await list_mcp_tools("flights")
-        assert len(names) == 2
+        assert len(names) == 3
         for expected in EXPECTED_TOOLS["flights"]:
             assert expected in names
 
     @pytest.mark.asyncio
-    async def test_utilities_server_exposes_3_tools(self):
+    async def test_utilities_server_exposes_5_tools(self):
         names = await list_mcp_tools("utilities")
-        assert len(names) == 3
+        assert len(names) == 5
         for expected in EXPECTED_TOOLS["utilities"]:
             assert expected in names
 
@@ -110,6 +113,52 @@ class TestJapanToolInvocation:
         assert "Shinkansen" in result["route"]["method"]
         assert "jr_pass_info" in result
 
+    @pytest.mark.asyncio
+    async def test_plan_train_route_with_transfer(self):
+        result = await call_mcp_tool(
+            "japan",
+            "plan_japan_train_route",
+            {"origin": "Nagoya", "destination": "Kanazawa", "date": "2025-04-01", "jr_pass": False},
+        )
+        route = result["route"]
+        assert route["stops"][0] == "Nagoya"
+        assert route["stops"][-1] == "Kanazawa"
+        assert len(route["segments"]) >= 2
+        assert result["total_price_usd"] == route["price_usd"]
+
+    @pytest.mark.asyncio
+    async def test_rail_itinerary_orders_cities(self):
+        result = await call_mcp_tool(
+            "japan",
+            "plan_japan_rail_itinerary",
+            {"cities": ["Tokyo", "Hiroshima", "Kyoto", "Osaka"], "return_to_start": True},
+        )
+        # Visiting Kyoto and Osaka on the way to Hiroshima beats zig-zagging
+        assert result["order"] in (
+            ["Tokyo", "Kyoto", "Shin-Osaka", "Hiroshima", "Tokyo"],
+            ["Tokyo", "Hiroshima", "Shin-Osaka", "Kyoto", "Tokyo"],
+        )
+        assert len(result["legs"]) == 4
+
+    @pytest.mark.asyncio
+    async def test_rail_passes_pay_off_for_long_trip(self):
+        legs = [
+            {"origin": "Tokyo", "destination": "Kyoto", "date": "2025-04-01"},
+            {"origin": "Kyoto", "destination": "Hiroshima", "date": "2025-04-03"},
+            {"origin": "Hiroshima", "destination": "Tokyo", "date": "2025-04-06"},
+        ]
+        result = await call_mcp_tool("japan", "optimize_japan_rail_passes", {"legs": legs, "passengers": 2})
+        assert [p["buy"] for p in result["plan"]] == ["JR Pass 7-day"]
+        assert result["total_price_usd"] == 460
+        assert result["savings_usd"] > 0
+
+    @pytest.mark.asyncio
+    async def test_rail_passes_skipped_for_single_leg(self):
+        legs = [{"origin": "Kyoto", "destination": "Nara", "date": "2025-04-02"}]
+        result = await call_mcp_tool("japan", "optimize_japan_rail_passes", {"legs": legs})
+        assert result["plan"][0]["buy"] == "Point-to-point tickets"
+        assert result["savings_usd"] == 0
+
     @pytest.mark.asyncio
     async def test_search_ski_resorts_hokkaido(self):
         result = await call_mcp_tool(
@@ -176,6 +225,27 @@ class TestTaiwanToolInvocation:
         assert result["destination"] == "Tainan"
         assert "route" in result
 
+    @pytest.mark.asyncio
+    async def test_plan_train_route_without_hsr(self):
+        result = await call_mcp_tool(
+            "taiwan",
+            "plan_taiwan_train_route",
+            {"origin": "Taipei", "destination": "Tainan", "date": "2025-10-01", "hsr": False},
+        )
+        assert result["route"]["hsr"] is False
+        assert all(s["line"].startswith("TRA") for s in result["route"]["segments"])
+
+    @pytest.mark.asyncio
+    async def test_rail_itinerary_keeps_last_city(self):
+        result = await call_mcp_tool(
+            "taiwan",
+            "plan_taiwan_rail_itinerary",
+            {"cities": ["Taipei", "Kenting", "Taichung", "Tainan"], "keep_last_city": True},
+        )
+        assert result["order"][0] == "Taipei"
+        assert result["order"][-1] == "Tainan"
+        assert set(result["order"]) == {"Taipei", "Kenting", "Taichung", "Tainan"}
+
 
 # ── Flights Tool Invocation ──────────────────────────────────────────────
 
@@ -221,6 +291,57 @@ class TestFlightsToolInvocation:
         for f in result["results"]:
             assert f["price_usd"] <= 260
 
+    @pytest.mark.asyncio
+    async def test_search_flights_sorted_by_price(self):
+        result = await call_mcp_tool(
+            "flights",
+            "search_flights",
+            {"origin_iata": "TPE", "dest_iata": "NRT", "departure": "2025-04-01", "min_price": 250},
+        )
+        prices = [f["price_usd"] for f in result["results"]]
+        assert prices == sorted(prices)
+        assert min(prices) >= 250
+
+    @pytest.mark.asyncio
+    async def test_search_flights_round_trip(self):
+        result = await call_mcp_tool(
+            "flights",
+            "search_flights",
+            {"origin_iata": "TPE", "dest_iata": "NRT", "departure": "2025-04-01", "return_date": "2025-04-06"},
+        )
+        assert result["return_results"]
+        for f in result["return_results"]:
+            assert (f["origin"], f["dest"]) == ("NRT", "TPE")
+
+    @pytest.mark.asyncio
+    async def test_search_does_not_leak_into_details(self):
+        await call_mcp_tool(
+            "flights",
+            "search_flights",
+            {"origin_iata": "TPE", "dest_iata": "NRT", "departure": "2025-04-01", "passengers": 3},
+        )
+        result = await call_mcp_tool("flights", "get_flight_details", {"flight_id": "FL001"})
+        assert "total_price_usd" not in result
+
+    @pytest.mark.asyncio
+    async def test_multi_city_cheapest_first(self):
+        legs = [
+            {"origin_iata": "TPE", "dest_iata": "NRT", "departure": "2025-04-01"},
+            {"origin_iata": "NRT", "dest_iata": "CTS", "departure": "2025-04-04"},
+            {"origin_iata": "CTS", "dest_iata": "TPE", "departure": "2025-04-08"},
+        ]
+        result = await call_mcp_tool(
+            "flights", "search_multi_city_flights", {"legs": legs, "passengers": 2, "limit": 3}
+        )
+        itineraries = result["itineraries"]
+        assert len(itineraries) == 3
+        totals = [it["price_usd"] for it in itineraries]
+        assert totals == sorted(totals)
+        # Cheapest: CI100 (240) + JL (120) + CI131 (330)
+        assert totals[0] == 690
+        assert itineraries[0]["total_price_usd"] == 1380
+        assert [f["dest"] for f in itineraries[0]["flights"]] == ["NRT", "CTS", "TPE"]
+
 
 # ── Utilities Tool Invocation ────────────────────────────────────────────
 
@@ -241,6 +362,73 @@ class TestUtilitiesToolInvocation:
         assert result["converted_amount"] == 15000.0  # 100 * 150
         assert result["rate"] == 150.0
 
+    @pytest.mark.asyncio
+    async def test_convert_currency_on_travel_date(self):
+        result = await call_mcp_tool(
+            "utilities",
+            "convert_currency",
+            {"amount": 100, "from_currency": "USD", "to_currency": "JPY", "date": "2025-04-15"},
+        )
+        assert result["rate_date"] == "2025-04-01"
+        assert result["converted_amount"] == round(100 * result["rate"], 2)
+
+    @pytest.mark.asyncio
+    async def test_convert_currency_bulk(self):
+        result = await call_mcp_tool(
+            "utilities",
+            "convert_currency_bulk",
+            {"amounts": [100, 2.5], "to_currencies": ["JPY", "twd"]},
+        )
+        assert result["rates"] == {"JPY": 150.0, "TWD": 32.0}
+        assert [c["converted"] for c in result["conversions"]] == [
+            {"JPY": 15000.0, "TWD": 3200.0},
+            {"JPY": 375.0, "TWD": 80.0},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_convert_cost_breakdown(self):
+        result = await call_mcp_tool(
+            "utilities",
+            "convert_cost_breakdown",
+            {
+                "items": [
+                    {"label": "Ryokan", "amount": 30000, "currency": "JPY", "category": "lodging"},
+                    {"label": "JR Pass", "amount": 230, "currency": "USD", "category": "transport", "per_person": True},
+                    {"label": "Onsen", "amount": 1500, "currency": "JPY", "category": "lodging"},
+                ],
+                "to_currencies": ["USD", "JPY"],
+                "passengers": 2,
+            },
+        )
+        assert [item["converted"]["USD"] for item in result["items"]] == [200.0, 460.0, 10.0]
+        assert result["subtotals"]["lodging"] == {"USD": 210.0, "JPY": 31500.0}
+        assert result["total"] == {"USD": 670.0, "JPY": 100500.0}
+
+    @pytest.mark.asyncio
+    async def test_cost_breakdown_reports_invalid_items(self):
+        result = await call_mcp_tool(
+            "utilities",
+            "convert_cost_breakdown",
+            {
+                "items": [
+                    {"label": "Ryokan", "amount": 30000, "currency": "JPY"},
+                    {"label": "Taxi", "amount": 40, "currency": None},
+                    {"label": "Museum", "amount": "free"},
+                ],
+                "to_currencies": ["USD"],
+            },
+        )
+        assert [e["index"] for e in result["item_errors"]] == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_bulk_conversion_rejects_unknown_currency(self):
+        result = await call_mcp_tool(
+            "utilities",
+            "convert_currency_bulk",
+            {"amounts": [1], "to_currencies": ["JPY", "XYZ"]},
+        )
+        assert "error" in result
+
     @pytest.mark.asyncio
     async def test_search_esim_plans_japan(self):
         result = await call_mcp_tool(
@@ -267,3 +455,68 @@ class TestUtilitiesToolInvocation:
         assert len(result["general_tips"]) >= 1
         assert len(result["age_specific_advice"]) >= 1
         assert len(result["must_haves"]) >= 1
+
+
+# ── Batch Endpoint ───────────────────────────────────────────────────────
+
+
+class TestBatchEndpoint:
+    """Verify /mcp/batch runs several tools/call requests in one POST."""
+
+    @pytest.mark.asyncio
+    async def test_results_in_request_order(self):
+        resp = await post_mcp_batch(
+            "utilities",
+            [
+                tool_call(7, "search_esim_plans", {"country": "japan", "duration_days": 7}),
+                tool_call(3, "convert_currency", {"amount": 100, "from_currency": "USD", "to_currency": "JPY"}),
+            ],
+        )
+        assert resp.status_code == 200
+        first, second = resp.json()
+        assert [first["id"], second["id"]] == [7, 3]
+        assert json.loads(first["result"]["content"][0]["text"])["country"] == "japan"
+        assert json.loads(second["result"]["content"][0]["text"])["converted_amount"] == 15000
+
+    @pytest.mark.asyncio
+    async def test_failing_item_does_not_fail_batch(self):
+        resp = await post_mcp_batch(
+            "japan",
+            [
+                tool_call(1, "no_such_tool", {}),
+                {"jsonrpc": "2.0", "id": 2, "method": "tools/list"},
+                tool_call(3, "search_japan_festivals", {"region": "kyoto", "month": 7}),
+            ],
+        )
+        unknown, not_batchable, ok = resp.json()
+        assert unknown["result"]["isError"] is True
+        assert not_batchable["error"]["code"] == -32601
+        assert ok["result"]["isError"] is False
+
+    @pytest.mark.asyncio
+    async def test_non_array_body_rejected(self):
+        resp = await post_mcp_batch("flights", {"jsonrpc": "2.0", "id": 1, "method": "tools/call"})
+        assert resp.status_code == 400
+        assert resp.json()["error"]["code"] == -32600
+
+
+# ── Metrics Endpoint ─────────────────────────────────────────────────────
+
+
+class TestMetricsEndpoint:
+    """Verify /metrics exposes per-tool latency for both transports."""
+
+    @pytest.mark.asyncio
+    async def test_tool_calls_are_timed(self):
+        args = {"amount": 100, "from_currency": "USD", "to_currency": "JPY"}
+        await call_mcp_tool("utilities", "convert_currency", args)
+        await post_mcp_batch("utilities", [tool_call(1, "convert_currency", args)])
+
+        async with httpx.AsyncClient(timeout=10) as client:
+            resp = await client.get(MCP_URLS["utilities"].removesuffix("/mcp") + "/metrics")
+        assert resp.status_code == 200
+        for transport in ("mcp", "batch"):
+            assert (
+                f'mcp_tool_seconds_count{{outcome="ok",server="Utilities",tool="convert_currency",transport="{transport}"}}'
+                in resp.text
+            )
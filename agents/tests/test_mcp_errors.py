@@ -109,17 +109,37 @@ class TestUnexpectedToolInput:
 
     @pytest.mark.asyncio
     async def test_unknown_train_route_returns_generic(self):
-        """Unknown route -> server returns generic JR Line fallback."""
+        """Station not on the rail network -> server returns generic JR Line fallback."""
         result = await call_mcp_tool(
             "japan",
             "plan_japan_train_route",
-            {"origin": "Nagoya", "destination": "Kanazawa", "date": "2025-04-01"},
+            {"origin": "Nagoya", "destination": "Atlantis", "date": "2025-04-01"},
         )
         assert result["origin"] == "Nagoya"
-        assert result["destination"] == "Kanazawa"
+        assert result["destination"] == "Atlantis"
         assert result["route"]["method"] == "JR Line"
         assert result["route"]["duration"] == "varies"
 
+    @pytest.mark.asyncio
+    async def test_rail_itinerary_unknown_city_returns_error(self):
+        """Unknown city in a multi-stop plan -> error dict naming it."""
+        result = await call_mcp_tool(
+            "taiwan",
+            "plan_taiwan_rail_itinerary",
+            {"cities": ["Taipei", "Atlantis"]},
+        )
+        assert "Atlantis" in result["error"]
+
+    @pytest.mark.asyncio
+    async def test_rail_passes_bad_date_returns_error(self):
+        """Leg without an ISO date -> error dict, not an exception."""
+        result = await call_mcp_tool(
+            "japan",
+            "optimize_japan_rail_passes",
+            {"legs": [{"origin": "Tokyo", "destination": "Kyoto", "date": "next week"}]},
+        )
+        assert "error" in result
+
     @pytest.mark.asyncio
     async def test_invalid_currency_returns_error(self):
         """Invalid currency code -> server returns error dict (not exception)."""
@@ -152,6 +172,26 @@ class TestUnexpectedToolInput:
         )
         assert result["results"] == []
 
+    @pytest.mark.asyncio
+    async def test_multi_city_leg_without_route_returns_empty(self):
+        """One unserved leg -> no itineraries at all."""
+        result = await call_mcp_tool(
+            "flights",
+            "search_multi_city_flights",
+            {"legs": [{"origin_iata": "TPE", "dest_iata": "NRT"}, {"origin_iata": "NRT", "dest_iata": "LAX"}]},
+        )
+        assert result["itineraries"] == []
+
+    @pytest.mark.asyncio
+    async def test_multi_city_malformed_leg_returns_error(self):
+        """Leg missing dest_iata -> error dict, not an exception."""
+        result = await call_mcp_tool(
+            "flights",
+            "search_multi_city_flights",
+            {"legs": [{"origin_iata": "TPE"}]},
+        )
+        assert "error" in result
+
     @pytest.mark.asyncio
     async def test_unknown_esim_country_returns_empty(self):
         """Unknown country -> no matching plans."""
@@ -182,7 +222,7 @@ class TestSafeMcpToolsIntegration:
     def test_single_server_loads_tools(self):
         """Verify safe_mcp_tools returns CrewAI tool objects."""
         with safe_mcp_tools(["japan"]) as tools:
-            assert len(tools) == 5
+            assert len(tools) == 7
             names = {t.name for t in tools}
             assert "search_japan_itinerary" in names
 
@@ -192,7 +232,7 @@ class TestSafeMcpToolsIntegration:
             names = {t.name for t in tools}
             assert "search_flights" in names
             assert "convert_currency" in names
-            assert len(tools) == 5  # 2 flights + 3 utilities
+            assert len(tools) == 8  # 3 flights + 5 utilities
 
     def test_tools_have_name_and_description(self):
         """Verify each tool has the required CrewAI attributes."""
@@ -0,0 +1,126 @@
+"""Tests for the shared rail graph against the Japan and Taiwan network data (no servers needed).
+
+Run via: make test-mcp
+"""
+
+import itertools
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from mcp_servers.catalog import DATA_DIR, read_jsonl
+from mcp_servers.rail import RailGraph, RailPass, cheapest_passes
+
+
+def load(country: str) -> tuple[RailGraph, list[dict]]:
+    links = read_jsonl(DATA_DIR / country / "rail_links.jsonl")
+    return RailGraph(read_jsonl(DATA_DIR / country / "stations.jsonl"), links), links
+
+
+def all_pairs_minutes(graph: RailGraph, links: list[dict], excluded=frozenset()) -> dict:
+    """Reference Floyd-Warshall over the raw link rows."""
+    inf = float("inf")
+    dist = {(a, b): 0 if a == b else inf for a in graph.names for b in graph.names}
+    for row in links:
+        if row["kind"] in excluded:
+            continue
+        for a, b in ((row["from"], row["to"]), (row["to"], row["from"])):
+            dist[a, b] = min(dist[a, b], row["minutes"])
+    for k, i, j in itertools.product(graph.names, repeat=3):
+        dist[i, j] = min(dist[i, j], dist[i, k] + dist[k, j])
+    return dist
+
+
+@pytest.fixture(scope="module", params=["japan", "taiwan"])
+def network(request):
+    return load(request.param)
+
+
+class TestRoute:
+    def test_fastest_matches_floyd_warshall(self, network):
+        graph, links = network
+        expected = all_pairs_minutes(graph, links)
+        for a, b in itertools.permutations(graph.names, 2):
+            route = graph.route(a, b)
+            assert route is not None
+            assert route.minutes == expected[a, b], (a, b)
+            assert route.stations[0] == a
+            assert route.stations[-1] == b
+
+    def test_excluding_kinds(self):
+        graph, links = load("taiwan")
+        expected = all_pairs_minutes(graph, links, excluded={"hsr"})
+        route = graph.route("taipei", "kaohsiung", exclude_kinds={"hsr"})
+        assert route.minutes == expected["taipei", "kaohsiung"]
+        assert all(link.kind != "hsr" for link in route.links)
+
+    def test_aliases_resolve(self):
+        graph, _ = load("japan")
+        assert graph.resolve("Shin-Osaka") == graph.resolve("osaka") == "osaka"
+        assert graph.resolve("Atlantis") is None
+
+
+class TestOrderStops:
+    def brute_force(self, graph, stops, end=None):
+        best = None
+        for middle in itertools.permutations(stops[1:]):
+            order = [stops[0], *middle, *([end] if end else [])]
+            total = sum(graph.route(a, b).minutes for a, b in itertools.pairwise(order))
+            best = total if best is None else min(best, total)
+        return best
+
+    @pytest.mark.parametrize("return_to_start", [False, True])
+    def test_optimal_order(self, return_to_start):
+        graph, _ = load("japan")
+        stops = ["tokyo", "hiroshima", "kanazawa", "nara", "sapporo", "hakone"]
+        order, routes = graph.order_stops(stops, return_to_start=return_to_start)
+        assert order[0] == "tokyo"
+        assert set(order) == set(stops)
+        assert sum(r.minutes for r in routes) == self.brute_force(graph, stops, "tokyo" if return_to_start else None)
+
+    def test_fixed_end(self):
+        graph, _ = load("taiwan")
+        order, _ = graph.order_stops(["taipei", "kenting", "hualien", "tainan"], fixed_end=True)
+        assert order[0] == "taipei"
+        assert order[-1] == "tainan"
+
+
+PASSES = (
+    RailPass("7-day", 7, 230, frozenset({"jr", "shinkansen"})),
+    RailPass("14-day", 14, 370, frozenset({"jr", "shinkansen"})),
+)
+
+
+class TestCheapestPasses:
+    def brute_force(self, legs):
+        """Try every assignment of 'tickets' / 'start a pass here' to each travel day."""
+        days = sorted({day for day, _ in legs})
+        best = float("inf")
+        for starts in itertools.product([None, *PASSES], repeat=len(days)):
+            cost, covered_until, active = 0.0, None, None
+            for day, start in zip(days, starts, strict=True):
+                if start is not None:
+                    cost += start.price_usd
+                    active, covered_until = start, day + timedelta(days=start.days - 1)
+                elif covered_until is None or day > covered_until:
+                    active = None
+                for leg_day, route in legs:
+                    if leg_day == day:
+                        cost += active.fare(route) if active else route.price_usd
+            best = min(best, cost)
+        return round(best, 2)
+
+    def test_matches_brute_force(self):
+        graph, _ = load("japan")
+        rng = random.Random(5)
+        stations = list(graph.names)
+        for _ in range(25):
+            legs = [
+                (date(2025, 4, 1) + timedelta(days=rng.randint(0, 20)), graph.route(*rng.sample(stations, 2)))
+                for _ in range(rng.randint(1, 6))
+            ]
+            total, plan = cheapest_passes(legs, PASSES)
+            assert total == self.brute_force(legs)
+            assert round(sum(choice.cost for choice in plan), 2) == total
+            assert sorted(k for choice in plan for k in choice.legs) == list(range(len(legs)))
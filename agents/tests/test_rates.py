@@ -0,0 +1,83 @@
+"""Tests for the utilities server's exchange-rate store (no servers needed).
+
+Run via: make test-mcp
+"""
+
+import random
+from bisect import bisect_right
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from mcp_servers.utilities.rates import SPOT, RateStore
+
+SPOT_RATES = {"USD": 1.0, "JPY": 150.0, "TWD": 32.0, "EUR": 0.92}
+START = date(2022, 1, 1)
+
+
+def daily_snapshots(days: int, seed: int = 11) -> list[dict]:
+    """Daily rates with gaps (weekends skipped) and some currencies left out, in shuffled order."""
+    rng = random.Random(seed)
+    rows = []
+    for offset in range(days):
+        day = START + timedelta(days=offset)
+        if day.weekday() >= 5:
+            continue
+        quotes = {c: round(rate * rng.uniform(0.9, 1.1), 4) for c, rate in SPOT_RATES.items() if rng.random() < 0.8}
+        rows.append({"date": day.isoformat(), "per_usd": quotes})
+    rng.shuffle(rows)
+    return rows
+
+
+@pytest.fixture(scope="module")
+def snapshots():
+    return daily_snapshots(3 * 365)
+
+
+@pytest.fixture(scope="module")
+def store(snapshots):
+    return RateStore(SPOT_RATES, snapshots)
+
+
+def reference(snapshots: list[dict], day: date) -> tuple[str, dict[str, float]]:
+    """Snapshot date and rates for *day*: carry every currency forward (clamped to the first snapshot)."""
+    ordered = sorted(snapshots, key=lambda row: row["date"])
+    keys = [row["date"] for row in ordered]
+    last = max(bisect_right(keys, day.isoformat()), 1)
+    rates = dict(SPOT_RATES)
+    for row in ordered[:last]:
+        rates.update(row["per_usd"])
+    return keys[last - 1], rates
+
+
+class TestRateStore:
+    def test_undated_uses_spot(self, store):
+        assert store.row(None) == SPOT
+        assert store.rate_date(SPOT) is None
+        assert store.rates(SPOT, store.positions["USD"], [store.positions["JPY"]]).tolist() == [150.0]
+
+    def test_dated_lookup_matches_reference(self, snapshots, store):
+        rng = random.Random(2)
+        for _ in range(200):
+            day = START + timedelta(days=rng.randint(-30, 3 * 365 + 30))
+            row = store.row(day)
+            rate_date, expected = reference(snapshots, day)
+            assert store.rate_date(row) == rate_date
+            assert dict(zip(store.currencies, store.per_usd[row].tolist(), strict=True)) == expected
+
+    def test_convert_mixes_currencies_and_dates(self, store):
+        rows = [store.row(START + timedelta(days=d)) for d in (3, 400, 900)]
+        sources = store.lookup(["jpy", "USD", "twd"])
+        targets = store.lookup(["USD", "EUR"])
+        got = store.convert([15000, 20, 640], sources, targets, rows)
+        for k, (amount, source, row) in enumerate(zip([15000, 20, 640], sources, rows, strict=True)):
+            expected = amount / store.per_usd[row, source] * store.per_usd[row, targets]
+            np.testing.assert_allclose(got[k], expected)
+
+    def test_unknown_currency(self, store):
+        assert store.lookup(["JPY", "XYZ"]) is None
+
+    def test_without_history(self):
+        store = RateStore(SPOT_RATES, [])
+        assert store.row(date(2025, 4, 1)) == SPOT
@@ -0,0 +1,62 @@
+"""Tests for flow step spans (no servers needed).
+
+Run via: make test-mcp
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from orchestrator import tracing
+from orchestrator.tracing import current_traceparent, flow_step
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+class FakeFlow:
+    def __init__(self, traceparent=None):
+        self.state = SimpleNamespace(traceparent=traceparent)
+        self.seen = None
+
+    @flow_step
+    def plan(self):
+        self.seen = current_traceparent()
+        return "planned"
+
+    @flow_step
+    def fail(self):
+        raise RuntimeError("crew failed")
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    monkeypatch.setattr(tracing.exporter, "mode", "memory")
+    monkeypatch.setattr(tracing.exporter, "spans", [])
+    return tracing.exporter
+
+
+class TestFlowStep:
+    def test_joins_caller_trace(self, exporter):
+        flow = FakeFlow(f"00-{TRACE_ID}-{PARENT_ID}-01")
+        assert flow.plan() == "planned"
+        (span,) = exporter.spans
+        assert (span.name, span.trace_id, span.parent_id) == ("flow.plan", TRACE_ID, PARENT_ID)
+        assert flow.seen == f"00-{TRACE_ID}-{span.span_id}-01"
+        assert current_traceparent() is None
+
+    def test_new_trace_without_traceparent(self, exporter):
+        FakeFlow("garbage").plan()
+        (span,) = exporter.spans
+        assert span.parent_id is None
+        assert len(span.trace_id) == 32
+
+    def test_failed_step_is_recorded(self, exporter):
+        with pytest.raises(RuntimeError):
+            FakeFlow().fail()
+        assert exporter.spans[0].status == "error"
+
+    def test_disabled_by_default(self):
+        flow = FakeFlow()
+        flow.plan()
+        assert flow.seen is None
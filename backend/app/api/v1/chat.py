@@ -1,22 +1,25 @@
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.responses import StreamingResponse
 
 from app.api.deps import get_current_user, get_db
 from app.core.security import decode_token
+from app.database import async_session
 from app.models.chat import MessageRole
 from app.models.user import User
 from app.schemas.chat import (
+    ChatJobRead,
     ChatMessageCreate,
     ChatMessageList,
     ChatMessageRead,
     ChatSessionCreate,
     ChatSessionRead,
 )
-from app.services import chat_service
+from app.services import chat_jobs, chat_service
 from app.services.flow_events import subscribe as flow_subscribe
+from app.services.flow_events import timeline as flow_timeline
 from app.services.orchestrator import process_user_message
 from app.services.usage_service import check_and_increment
 
@@ -99,6 +102,7 @@ async def send_message(
         user_message=body.content,
         intent_slots=session.intent_slots,
         locale=body.locale,
+        tier=user.tier,
     )
 
     # Persist accumulated intent slots back to the session
@@ -110,21 +114,79 @@ async def send_message(
     return ChatMessageRead.model_validate(assistant_msg, from_attributes=True)
 
 
+@router.post("/sessions/{session_id}/jobs", response_model=ChatJobRead, status_code=202)
+async def submit_message_job(
+    session_id: uuid.UUID,
+    body: ChatMessageCreate,
+    idempotency_key: str | None = Header(
+        None, alias="Idempotency-Key", max_length=chat_jobs.IDEMPOTENCY_KEY_MAX_LENGTH
+    ),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Queue a chat turn for a worker and return at once.
+
+    The reply arrives on the session's flow events (the ``complete`` event's
+    ``result``) or via ``GET /chat/jobs/{job_id}``.  Retrying with the same
+    ``Idempotency-Key`` returns the original job.
+    """
+    await chat_service.get_session(db, session_id, user.id)
+    job = await chat_jobs.submit(
+        db,
+        session_id=session_id,
+        user=user,
+        content=body.content,
+        locale=body.locale,
+        idempotency_key=idempotency_key,
+    )
+    return chat_jobs.to_read(job)
+
+
+@router.get("/jobs/{job_id}", response_model=ChatJobRead)
+async def get_message_job(
+    job_id: uuid.UUID,
+    user: User = Depends(get_current_user),
+):
+    return chat_jobs.to_read(await chat_jobs.get_user_job(job_id, user.id))
+
+
 @router.get("/sessions/{session_id}/flow-events")
 async def flow_events_sse(
     session_id: uuid.UUID,
     token: str = Query(..., description="JWT access token (EventSource can't send headers)"),
+    last_event_id: str | None = Query(None, description="Resume after this event ID"),
+    last_event_id_header: str | None = Header(None, alias="Last-Event-ID"),
 ):
-    """SSE stream of real-time agent flow events for a chat session."""
+    """SSE stream of real-time agent flow events for a chat session.
+
+    Reconnecting EventSources send ``Last-Event-ID`` and receive the events
+    they missed; a fresh connection replays the running turn so far.
+    Only the session's owner may subscribe: events carry queued-job replies.
+    """
     payload = decode_token(token)
-    if payload is None or payload.get("type") != "access":
+    if payload is None or payload.get("type") != "access" or not payload.get("sub"):
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    # Verify ownership (own DB session, so no connection is held while streaming)
+    async with async_session() as db:
+        await chat_service.get_session(db, session_id, uuid.UUID(payload["sub"]))
+
     return StreamingResponse(
-        flow_subscribe(session_id),
+        flow_subscribe(session_id, last_event_id_header or last_event_id),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
             "X-Accel-Buffering": "no",  # disable nginx buffering
         },
     )
+
+
+@router.get("/sessions/{session_id}/flow-timeline")
+async def get_flow_timeline(
+    session_id: uuid.UUID,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Logged flow events of a session with per-stage latencies."""
+    await chat_service.get_session(db, session_id, user.id)
+    return {"session_id": session_id, "events": await flow_timeline(session_id)}
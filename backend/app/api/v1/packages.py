@@ -1,10 +1,17 @@
+import logging
+
+import httpx
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db
-from app.schemas.package import PackageDetailRead, PackageListRead
+from app.schemas.package import PackageDetailRead, PackageHybridSearchRead, PackageListRead, PackageSearchRead
 from app.services import package_service
-from app.services.embedding_service import generate_embedding, semantic_search
+from app.services.embedding_cache import get_query_embedding
+from app.services.embedding_service import semantic_search
+from app.services.search_text import parse_query
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -37,6 +44,38 @@ async def list_packages(
     return packages
 
 
+@router.get("/search", response_model=PackageSearchRead)
+async def search_packages(
+    destination: str | None = Query(None),
+    category: str | None = Query(None),
+    price_band: str | None = Query(None, max_length=20),
+    duration_band: str | None = Query(None, max_length=20),
+    min_price: float | None = Query(None),
+    max_price: float | None = Query(None),
+    min_duration: int | None = Query(None),
+    max_duration: int | None = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    locale: str | None = Query(None, max_length=10),
+    db: AsyncSession = Depends(get_db),
+):
+    """Filtered package list plus facet counts, so the catalog page needs one request."""
+    return await package_service.search_packages(
+        db,
+        destination=destination,
+        category=category,
+        price_band=price_band,
+        duration_band=duration_band,
+        min_price=min_price,
+        max_price=max_price,
+        min_duration=min_duration,
+        max_duration=max_duration,
+        limit=limit,
+        offset=offset,
+        locale=locale,
+    )
+
+
 @router.get("/categories")
 async def get_categories(db: AsyncSession = Depends(get_db)):
     return await package_service.get_categories(db)
@@ -54,11 +93,57 @@ async def semantic_search_packages(
     limit: int = Query(10, ge=1, le=50),
     db: AsyncSession = Depends(get_db),
 ):
-    embedding = await generate_embedding(q)
+    embedding = await get_query_embedding(q)
     results = await semantic_search(db, embedding, source_type="package", limit=limit)
     return results
 
 
+@router.get("/search/hybrid", response_model=PackageHybridSearchRead)
+async def hybrid_search_packages(
+    q: str = Query(..., min_length=1, max_length=200),
+    destination: str | None = Query(None),
+    category: str | None = Query(None),
+    price_band: str | None = Query(None, max_length=20),
+    duration_band: str | None = Query(None, max_length=20),
+    min_price: float | None = Query(None),
+    max_price: float | None = Query(None),
+    min_duration: int | None = Query(None),
+    max_duration: int | None = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    locale: str | None = Query(None, max_length=10),
+    db: AsyncSession = Depends(get_db),
+):
+    """Free-text search ("沖繩 snorkeling under $1500") fusing full-text and vector rankings.
+
+    If the embedding API is unavailable the search degrades to full-text only.
+    """
+    text = parse_query(q).text
+    embedding = None
+    if text:
+        try:
+            embedding = await get_query_embedding(text)
+        except (httpx.HTTPError, KeyError):
+            logger.warning("Query embedding failed; hybrid search falls back to full-text", exc_info=True)
+
+    return await package_service.hybrid_search_packages(
+        db,
+        q,
+        query_embedding=embedding,
+        destination=destination,
+        category=category,
+        price_band=price_band,
+        duration_band=duration_band,
+        min_price=min_price,
+        max_price=max_price,
+        min_duration=min_duration,
+        max_duration=max_duration,
+        limit=limit,
+        offset=offset,
+        locale=locale,
+    )
+
+
 @router.get("/{slug}", response_model=PackageDetailRead)
 async def get_package(
     slug: str,
@@ -1,19 +1,102 @@
+import asyncio
 import json
+import logging
 import uuid
+from contextlib import AsyncExitStack
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
 
 from app.core.security import decode_token
 from app.database import async_session
-from app.models.chat import MessageRole
-from app.services import chat_service
+from app.models.chat import ChatMessage, ChatSession, MessageRole
+from app.models.user import User
+from app.schemas.chat import ChatJobStatus
+from app.services import chat_jobs, chat_service
+from app.services.flow_events import FlowViewer
+from app.services.flow_events import router as flow_router
 from app.services.orchestrator import process_user_message
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+JOB_POLL_INTERVAL = 5.0  # seconds between job-record checks for replies whose flow event was lost
+
+
+async def _send_job_reply(websocket: WebSocket, job_id: str, message_id: str, content: str, slots) -> None:
+    await websocket.send_json({"type": "slots_update", "content": "", "slots": slots})
+    await websocket.send_json({"type": "message", "content": content, "job_id": job_id, "message_id": message_id})
+
+
+async def _deliver_from_records(websocket: WebSocket, pending: set[str]) -> None:
+    """Send replies of pending jobs that finished according to their job records."""
+    for job_id in list(pending):
+        job = await chat_jobs.get_job(job_id)
+        if job is not None and job["status"] not in chat_jobs.FINISHED:
+            continue
+        pending.discard(job_id)
+        if job is None or job["status"] == ChatJobStatus.failed.value:
+            error = job.get("error", "") if job else "Chat job expired"
+            await websocket.send_json({"type": "error", "content": error, "job_id": job_id})
+            continue
+        async with async_session() as db:
+            message = await db.get(ChatMessage, uuid.UUID(job["assistant_message_id"]))
+            session = await db.get(ChatSession, uuid.UUID(job["session_id"]))
+        await _send_job_reply(websocket, job_id, str(message.id), message.content, session.intent_slots)
+
+
+async def _forward_job_results(websocket: WebSocket, viewer: FlowViewer, pending: set[str]) -> None:
+    """Send the replies of this connection's queued jobs as they complete.
+
+    The ``complete`` flow event is the fast path; flow events may be dropped,
+    so job records are also checked every ``JOB_POLL_INTERVAL`` seconds.
+    """
+    loop = asyncio.get_running_loop()
+    next_poll = loop.time() + JOB_POLL_INTERVAL
+    while True:
+        try:
+            message = await asyncio.wait_for(viewer.queue.get(), timeout=max(0.0, next_poll - loop.time()))
+        except TimeoutError:
+            message = None
+        if loop.time() >= next_poll:
+            next_poll = loop.time() + JOB_POLL_INTERVAL
+            await _deliver_from_records(websocket, pending)
+        if message is None:
+            continue
+
+        _, _, payload = message.partition(" ")  # "<stream id> <payload>"
+        try:
+            event = json.loads(payload)
+            result = event.get("result") or {}
+            job_id = result.get("job_id")
+            if event["step"] != "complete" or job_id not in pending:
+                continue
+            if event["status"] == "done":
+                reply = (result["message_id"], result["content"], event["slots"])
+        except (json.JSONDecodeError, AttributeError, KeyError):
+            logger.warning("ignoring malformed flow event: %.200s", payload)
+            continue
+        pending.discard(job_id)
+        if event["status"] != "done":
+            await websocket.send_json({"type": "error", "content": result.get("error", ""), "job_id": job_id})
+            continue
+        await _send_job_reply(websocket, job_id, *reply)
+
+
+def _log_forwarder_exit(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("job result forwarder stopped", exc_info=task.exception())
+
 
 @router.websocket("/ws/chat/{session_id}")
 async def websocket_chat(websocket: WebSocket, session_id: uuid.UUID, token: str | None = None):
+    """Chat over a WebSocket.
+
+    ``{"content": ...}`` runs the turn on this connection.  With
+    ``"async": true`` (and optionally ``"locale"`` / ``"idempotency_key"``)
+    the turn is queued for a worker: the server answers ``queued`` with the
+    job ID right away and sends the reply when the job completes.
+    """
     if not token:
         await websocket.close(code=4001, reason="Missing token")
         return
@@ -26,10 +109,14 @@ async def websocket_chat(websocket: WebSocket, session_id: uuid.UUID, token: str
     user_id = uuid.UUID(payload["sub"])
     await websocket.accept()
 
+    pending_jobs: set[str] = set()
+    viewer: FlowViewer | None = None
+    forwarder: asyncio.Task | None = None
     try:
-        async with async_session() as db:
+        async with async_session() as db, AsyncExitStack() as stack:
             # Verify session ownership
             session = await chat_service.get_session(db, session_id, user_id)
+            user = await db.get(User, user_id)
 
             while True:
                 data = await websocket.receive_text()
@@ -39,6 +126,47 @@ async def websocket_chat(websocket: WebSocket, session_id: uuid.UUID, token: str
                 if not user_content:
                     continue
 
+                if message.get("async"):
+                    idempotency_key = message.get("idempotency_key")
+                    if idempotency_key is not None and (
+                        not isinstance(idempotency_key, str)
+                        or len(idempotency_key) > chat_jobs.IDEMPOTENCY_KEY_MAX_LENGTH
+                    ):
+                        await websocket.send_json({"type": "error", "content": "Invalid idempotency_key"})
+                        continue
+                    if viewer is None:
+                        # Listen before the first submit so a fast reply can't be missed
+                        viewer = await stack.enter_async_context(flow_router.listen(session_id))
+                    if forwarder is None or forwarder.done():
+                        forwarder = asyncio.create_task(_forward_job_results(websocket, viewer, pending_jobs))
+                        forwarder.add_done_callback(_log_forwarder_exit)
+                    try:
+                        job = await chat_jobs.submit(
+                            db,
+                            session_id=session_id,
+                            user=user,
+                            content=user_content,
+                            locale=message.get("locale", "en"),
+                            idempotency_key=idempotency_key,
+                        )
+                    except HTTPException as e:
+                        await websocket.send_json({"type": "error", "content": e.detail})
+                        continue
+                    # A resubmitted job may already be finished; its record then delivers the reply
+                    pending_jobs.add(job["id"])
+                    await websocket.send_json(
+                        {
+                            "type": "queued",
+                            "content": "",
+                            "job_id": job["id"],
+                            "message_id": job.get("user_message_id"),
+                        }
+                    )
+                    continue
+
+                if viewer is not None:
+                    await db.refresh(session)  # queued turns update the slots in the worker
+
                 # Save user message
                 await chat_service.add_message(db, session_id, MessageRole.user, user_content)
 
@@ -50,6 +178,7 @@ async def websocket_chat(websocket: WebSocket, session_id: uuid.UUID, token: str
                     session_id=session_id,
                     user_message=user_content,
                     intent_slots=session.intent_slots,
+                    tier=user.tier,
                 )
 
                 # Persist accumulated intent slots back to the session
@@ -76,3 +205,6 @@ async def websocket_chat(websocket: WebSocket, session_id: uuid.UUID, token: str
     except Exception as e:
         await websocket.send_json({"type": "error", "content": str(e)})
         await websocket.close()
+    finally:
+        if forwarder is not None:
+            forwarder.cancel()
@@ -44,9 +44,70 @@ class Settings(BaseSettings):
     llm_model_primary: str = "arcee-ai/trinity-large-preview:free"
     llm_model_fallback: str = "arcee-ai/trinity-mini:free"
 
+    # ─── LLM scheduler (per model, shared across processes via Redis) ─
+    llm_scheduler_enabled: bool = True
+    llm_max_concurrency: int = 16  # in-flight calls
+    llm_requests_per_minute: int = 60  # token bucket refill
+    llm_burst: int = 10  # token bucket size (model and tier buckets)
+    # Each tier's share of the model's rate, so free-tier bursts can't use it all
+    llm_tier_requests_per_minute: dict[str, int] = {"premium": 60, "free": 20}
+    # Calls expected to wait longer are shed (fallback model, then a "busy" reply)
+    llm_tier_max_wait: dict[str, float] = {"premium": 90.0, "free": 15.0}
+
+    # ─── Embeddings ─────────────────────────────────
+    embedding_model: str = "openai/text-embedding-3-small"
+    embedding_batch_size: int = 64  # inputs per /embeddings request
+    embedding_concurrency: int = 4  # in-flight /embeddings requests
+    embedding_max_retries: int = 3
+    query_embedding_cache_size: int = 10000  # LRU capacity (entries) for search-query embeddings
+    query_embedding_cache_ttl: int = 7 * 86400  # seconds
+
+    # ─── Vector index (travel_embeddings.embedding) ─
+    vector_index_method: str = "hnsw"  # "hnsw" | "ivfflat"
+    vector_index_source_types: list[str] = ["package", "package_day", "itinerary", "knowledge"]
+    vector_hnsw_m: int = 16
+    vector_hnsw_ef_construction: int = 64
+    vector_ivfflat_lists: int = 100
+    vector_ef_search: int = 40  # default hnsw.ef_search per query
+    vector_ivfflat_probes: int = 10  # default ivfflat.probes per query
+    # Iterative index scans for filtered vector queries (pgvector >= 0.8): "relaxed_order" | "strict_order" | "off"
+    vector_iterative_scan: str = "relaxed_order"
+
+    # ─── Hybrid package search ─
+    hybrid_rrf_k: int = 60  # reciprocal rank fusion constant
+    hybrid_candidates: int = 100  # hits taken from each of the lexical / vector lists
+
+    # ─── Package catalog ───────────────────────────
+    # Locales that get a precomputed package projection; others fall back to "en"
+    package_locales: list[str] = ["en", "zh"]
+
+    # ─── Flow events (SSE) ─────────────────────────
+    flow_event_buffer: int = 256  # queued events per SSE viewer before dropping
+    flow_event_drop_policy: str = "oldest"  # "oldest" | "newest" — which event a full buffer discards
+    flow_emit_queue_size: int = 10000  # events waiting to be published before emit() drops
+    flow_emit_batch_size: int = 64  # events per pipelined PUBLISH round-trip
+    flow_emit_late_ms: int = 250  # publish delay counted as "late"
+    flow_log_maxlen: int = 500  # events kept per session stream (approximate trim)
+    flow_log_ttl: int = 86400  # seconds a session's event log outlives its last event
+
+    # ─── Chat jobs (async turns, ``python -m app.worker``) ─
+    chat_worker_concurrency: int = 4  # turns each worker process runs at once
+    chat_job_max_attempts: int = 3  # runs before a job is marked failed
+    chat_job_retry_delay: float = 5.0  # seconds before the first retry, doubled per attempt
+    chat_job_visibility_timeout: int = 600  # seconds a job may run before another worker reclaims it
+    chat_job_ttl: int = 86400  # seconds job records and idempotency keys are kept
+
+    # ─── Tracing ────────────────────────────────────
+    tracing_exporter: str = "none"  # "none" | "log" | "memory" — see app/core/tracing.py
+
     # ─── Rate Limits ────────────────────────────────
+    # Requests per rate_limit_window seconds, per client IP / per signed-in user
+    rate_limit_enabled: bool = True
+    rate_limit_window: int = 60
     rate_limit_unauth: int = 100
     rate_limit_auth: int = 200
+    # Reverse proxies that append to X-Forwarded-For in front of the API (1 behind trip-nginx)
+    rate_limit_trusted_proxies: int = 0
     daily_limit_free: int = 5
     daily_limit_premium: int = 50
 
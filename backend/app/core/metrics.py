@@ -0,0 +1,116 @@
+"""Prometheus metrics for the API process, served at ``GET /metrics``.
+
+Latencies are recorded where they happen (``observe``/``time()`` on the
+histograms below).  Everything that already has a per-process source of truth
+— the DB and Redis connection pools, ``embedding_cache.local_stats``,
+``flow_events.emit_stats`` — is read at scrape time by ``RuntimeCollector``
+instead of being double-counted.  Metrics are per worker process; Prometheus
+sums them across workers and replicas.
+"""
+
+from collections.abc import Iterator
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+
+# LLM calls take seconds, MCP calls and pool waits milliseconds
+LLM_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+CALL_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 15)
+
+llm_request_seconds = Histogram(
+    "llm_request_seconds",
+    "OpenRouter chat completion latency",
+    ["model", "outcome"],
+    buckets=LLM_BUCKETS,
+)
+llm_queue_seconds = Histogram(
+    "llm_queue_seconds",
+    "Time LLM calls waited for admission by the scheduler, by tier and whether they were admitted or shed",
+    ["model", "tier", "outcome"],
+    buckets=LLM_BUCKETS,
+)
+llm_tokens = Counter("llm_tokens", "Tokens reported by OpenRouter", ["model", "kind"])
+
+mcp_call_seconds = Histogram(
+    "mcp_call_seconds",
+    "MCP tool call latency seen by the backend (a batched call is charged the whole batch round trip)",
+    ["server", "tool", "outcome"],
+    buckets=CALL_BUCKETS,
+)
+
+db_pool_checkout_seconds = Histogram(
+    "db_pool_checkout_seconds",
+    "Time spent waiting for a database connection from the pool",
+    buckets=CALL_BUCKETS,
+)
+
+
+def record_llm_usage(model: str, usage: dict | None) -> None:
+    """Count the ``usage`` block of an OpenRouter response."""
+    if not usage:
+        return
+    for kind in ("prompt", "completion"):
+        if tokens := usage.get(f"{kind}_tokens"):
+            llm_tokens.labels(model, kind).inc(tokens)
+
+
+def _redis_pool_gauges() -> Iterator[Metric]:
+    from app.core import redis as redis_module
+
+    in_use = GaugeMetricFamily("redis_connections_in_use", "Redis connections checked out", labels=["client"])
+    idle = GaugeMetricFamily("redis_connections_idle", "Redis connections open and idle in the pool", labels=["client"])
+    for name, client in (("text", redis_module.redis_client), ("binary", redis_module.redis_binary_client)):
+        if client is None:
+            continue
+        pool = client.connection_pool
+        in_use.add_metric([name], len(pool._in_use_connections))
+        idle.add_metric([name], len(pool._available_connections))
+    yield in_use
+    yield idle
+
+
+def _db_pool_gauges() -> Iterator[Metric]:
+    from app.database import engine
+
+    pool = engine.sync_engine.pool
+    yield GaugeMetricFamily("db_pool_size", "Configured pool size (excluding overflow)", value=pool.size())
+    yield GaugeMetricFamily("db_pool_checked_out", "Database connections in use", value=pool.checkedout())
+    yield GaugeMetricFamily("db_pool_checked_in", "Database connections idle in the pool", value=pool.checkedin())
+    # Negative until the pool has opened pool_size connections (SQLAlchemy's convention)
+    yield GaugeMetricFamily("db_pool_overflow", "Connections open beyond pool_size", value=pool.overflow())
+
+
+def _counter_family(name: str, documentation: str, label: str, stats: dict[str, int]) -> CounterMetricFamily:
+    family = CounterMetricFamily(name, documentation, labels=[label])
+    for key, value in stats.items():
+        family.add_metric([key], value)
+    return family
+
+
+class RuntimeCollector(Collector):
+    """Samples connection pools and the services' per-process counters on each scrape."""
+
+    def describe(self) -> list[Metric]:
+        # Without this, registering would call collect() while app.database is still importing
+        return []
+
+    def collect(self) -> Iterator[Metric]:
+        from app.services.embedding_cache import local_stats
+        from app.services.flow_events import emit_stats, router
+
+        yield from _db_pool_gauges()
+        yield from _redis_pool_gauges()
+        yield _counter_family(
+            "query_embedding_cache_lookups", "Query embedding cache lookups by result", "result", local_stats
+        )
+        yield _counter_family("flow_events", "Flow events by emitter outcome", "outcome", emit_stats)
+        yield GaugeMetricFamily("flow_event_viewers", "Open flow-event SSE streams", value=router.viewer_count)
+
+
+REGISTRY.register(RuntimeCollector())
+
+
+def render() -> tuple[bytes, str]:
+    """The default registry in the Prometheus text format, with its content type."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
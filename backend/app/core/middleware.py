@@ -2,7 +2,15 @@ import logging
 import time
 
 from fastapi import Request
+from starlette.datastructures import Headers
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.core.rate_limit import COSTS, RateLimiter
+from app.core.security import decode_token
+from app.core.tracing import extract, span
 
 logger = logging.getLogger(__name__)
 
@@ -21,3 +29,80 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             duration_ms,
         )
         return response
+
+
+class TracingMiddleware(BaseHTTPMiddleware):
+    """Root span per request, continuing the caller's ``traceparent`` if it sent one."""
+
+    async def dispatch(self, request: Request, call_next):
+        with span(
+            "http.request",
+            parent=extract(request.headers.get("traceparent")),
+            method=request.method,
+            path=request.url.path,
+        ) as s:
+            response = await call_next(request)
+            s.set("status_code", response.status_code)
+        return response
+
+
+def _client_ip(scope: Scope, headers: Headers) -> str:
+    """The peer address, or the address our ``settings.rate_limit_trusted_proxies`` saw when proxied."""
+    hops = settings.rate_limit_trusted_proxies
+    if hops:
+        forwarded = [ip.strip() for ip in headers.get("x-forwarded-for", "").split(",") if ip.strip()]
+        if forwarded:
+            return forwarded[-min(hops, len(forwarded))]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RateLimitMiddleware:
+    """Per-user (valid access token) or per-IP request limits, see ``app.core.rate_limit``.
+
+    Pure ASGI rather than ``BaseHTTPMiddleware``: a rejected request is
+    answered before the app sees it, and allowed responses stream through
+    untouched apart from the added ``RateLimit-*`` headers.
+    """
+
+    EXEMPT_PATHS = ("/health", "/metrics")
+
+    def __init__(self, app: ASGIApp, limiter: RateLimiter | None = None):
+        self.app = app
+        self.limiter = limiter or RateLimiter(settings.rate_limit_window)
+
+    def _client(self, scope: Scope) -> tuple[str, int]:
+        headers = Headers(scope=scope)
+        authorization = headers.get("authorization", "")
+        if authorization.startswith("Bearer "):
+            payload = decode_token(authorization[7:])
+            if payload is not None and payload.get("type") == "access" and payload.get("sub"):
+                return f"user:{payload['sub']}", settings.rate_limit_auth
+        return f"ip:{_client_ip(scope, headers)}", settings.rate_limit_unauth
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "OPTIONS"  # CORS preflight
+            or scope["path"] in self.EXEMPT_PATHS
+            or not settings.rate_limit_enabled
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        key, limit = self._client(scope)
+        decision = await self.limiter.hit(key, limit, COSTS.get(scope["path"], 1))
+        headers = decision.headers(self.limiter.window)
+        if not decision.allowed:
+            response = JSONResponse({"detail": "Rate limit exceeded"}, status_code=429, headers=headers)
+            await response(scope, receive, send)
+            return
+
+        raw_headers = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *raw_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
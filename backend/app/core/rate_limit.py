@@ -0,0 +1,145 @@
+"""Per-client API rate limits: ``settings.rate_limit_auth`` requests per
+``settings.rate_limit_window`` seconds for a signed-in user,
+``settings.rate_limit_unauth`` per client IP otherwise.
+
+The shared limit is a sliding-window counter in Redis.  It keeps one counter
+per fixed window and weights the previous window by how much of it still
+overlaps the sliding one, so it costs two small keys per client however busy
+that client is.  Each process also keeps a token bucket per client (same rate,
+burst = the limit).  This is the fast path:
+
+- a client that emptied its local bucket is over the global limit too, and
+  is rejected without a Redis round-trip;
+- so is a client Redis recently rejected, until its ``Retry-After``;
+- if Redis is unreachable the local buckets alone enforce the limit, per
+  process.
+
+Some endpoints cost more than one request (``COSTS``).
+"""
+
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from redis.commands.core import AsyncScript
+from redis.exceptions import RedisError
+
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "ratelimit"
+MAX_LOCAL_CLIENTS = 10000  # buckets kept per process, least recently seen evicted first
+
+# Requests that trigger paid or heavy work count as several
+COSTS = {
+    "/api/v1/packages/search/semantic": 5,  # embedding call
+    "/api/v1/packages/search/hybrid": 5,  # embedding call + full-text and vector search
+}
+
+# KEYS: current window, previous window.  ARGV: limit, cost, elapsed share of the current window, window
+# Returns {allowed, current count, previous count} (counts before this request)
+SLIDING_WINDOW = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local limit, cost = tonumber(ARGV[1]), tonumber(ARGV[2])
+if previous * (1 - tonumber(ARGV[3])) + current + cost > limit then
+  return {0, current, previous}
+end
+redis.call('INCRBY', KEYS[1], cost)
+redis.call('EXPIRE', KEYS[1], 2 * tonumber(ARGV[4]))
+return {1, current, previous}
+"""
+
+
+@dataclass
+class Decision:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: int  # seconds until the window rolls over, or until a limited client may retry
+    retry_after: int | None = None
+
+    def headers(self, window: int) -> dict[str, str]:
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset),
+            "RateLimit-Policy": f"{self.limit};w={window}",
+        }
+        if self.retry_after is not None:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated", "blocked_until")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+        self.blocked_until = 0.0
+
+
+class RateLimiter:
+    def __init__(self, window: int):
+        self.window = window
+        self._buckets: OrderedDict[str, _Bucket] = OrderedDict()
+        self._script: AsyncScript | None = None
+
+    def _bucket(self, key: str, limit: int, now: float) -> _Bucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(limit, now)
+            if len(self._buckets) > MAX_LOCAL_CLIENTS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket.tokens = min(limit, bucket.tokens + (now - bucket.updated) * limit / self.window)
+            bucket.updated = now
+        return bucket
+
+    def _reject(self, limit: int, retry_after: float) -> Decision:
+        seconds = max(1, math.ceil(retry_after))
+        return Decision(False, limit, 0, seconds, seconds)
+
+    async def hit(self, key: str, limit: int, cost: int = 1) -> Decision:
+        """Count a request of *cost* by client *key* against *limit* and decide whether it may proceed."""
+        now = time.time()
+        bucket = self._bucket(key, limit, now)
+        if now < bucket.blocked_until:
+            return self._reject(limit, bucket.blocked_until - now)
+        if bucket.tokens < cost:
+            return self._reject(limit, (cost - bucket.tokens) * self.window / limit)
+        bucket.tokens -= cost
+
+        window_index, offset = divmod(now, self.window)
+        elapsed = offset / self.window
+        try:
+            r = await get_redis()
+            if self._script is None:
+                self._script = r.register_script(SLIDING_WINDOW)
+            allowed, current, previous = await self._script(
+                keys=[f"{KEY_PREFIX}:{key}:{int(window_index)}", f"{KEY_PREFIX}:{key}:{int(window_index) - 1}"],
+                args=[limit, cost, elapsed, self.window],
+            )
+        except RedisError as e:
+            logger.warning("rate limit store unavailable (%s); enforcing per-process limits only", e)
+            return Decision(True, limit, int(bucket.tokens), math.ceil((limit - bucket.tokens) * self.window / limit))
+
+        used = previous * (1 - elapsed) + current
+        if allowed:
+            used += cost
+            return Decision(True, limit, max(0, int(limit - used)), math.ceil(self.window * (1 - elapsed)))
+
+        bucket.tokens += cost  # not spent after all
+        if current + cost > limit or not previous:
+            # Only the next window frees enough room
+            retry_after = self.window * (1 - elapsed)
+        else:
+            # Wait until enough of the previous window has slid out
+            retry_after = self.window * (1 - (limit - current - cost) / previous) - offset
+        bucket.blocked_until = now + retry_after
+        return self._reject(limit, retry_after)
@@ -3,6 +3,8 @@ import redis.asyncio as redis
 from app.config import settings
 
 redis_client: redis.Redis | None = None
+# Separate client without response decoding, for binary payloads (e.g. packed vectors)
+redis_binary_client: redis.Redis | None = None
 
 
 async def get_redis() -> redis.Redis:
@@ -12,8 +14,18 @@ async def get_redis() -> redis.Redis:
     return redis_client
 
 
+async def get_redis_binary() -> redis.Redis:
+    global redis_binary_client
+    if redis_binary_client is None:
+        redis_binary_client = redis.from_url(settings.redis_url, decode_responses=False)
+    return redis_binary_client
+
+
 async def close_redis() -> None:
-    global redis_client
+    global redis_client, redis_binary_client
     if redis_client is not None:
         await redis_client.close()
         redis_client = None
+    if redis_binary_client is not None:
+        await redis_binary_client.close()
+        redis_binary_client = None
@@ -0,0 +1,201 @@
+"""Lightweight request tracing in the OpenTelemetry style.
+
+``span(name, **attributes)`` times a block as a child of the current span
+(tracked in a ``ContextVar``, so it follows asyncio tasks) and hands it to the
+configured exporter when the block ends.  ``traced()`` does the same for
+every call of a function.  Trace context crosses process boundaries as a W3C
+``traceparent`` header: ``inject()`` adds it to outgoing request headers and
+``TracingMiddleware`` continues an incoming one.
+
+Exporters (``settings.tracing_exporter``): ``none`` — the default; no spans
+are created at all, so instrumentation costs one global check — ``log`` (one
+log line per finished span) and ``memory`` (``InMemoryExporter``, for tests).
+"""
+
+import functools
+import inspect
+import logging
+import re
+import secrets
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+@dataclass(slots=True)
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    start_ns: int = 0
+    end_ns: int = 0
+    status: str = "ok"  # "ok" | "error"
+    error: str | None = None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def fail(self, error: str) -> None:
+        """Mark the span as failed without raising (for calls that return None on error)."""
+        self.status, self.error = "error", error
+
+
+class _NoopSpan:
+    """Stands in for a span when tracing is off; every method is a no-op."""
+
+    __slots__ = ()
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def fail(self, error: str) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter:
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+
+class NoopExporter(SpanExporter):
+    def export(self, span: Span) -> None:
+        pass
+
+
+class LoggingExporter(SpanExporter):
+    def export(self, span: Span) -> None:
+        logger.info(
+            "span %s %.1fms %s trace=%s span=%s parent=%s %s",
+            span.name,
+            span.duration_ms,
+            span.status if span.error is None else f"{span.status} ({span.error})",
+            span.trace_id,
+            span.span_id,
+            span.parent_id,
+            span.attributes,
+        )
+
+
+class InMemoryExporter(SpanExporter):
+    """Keeps finished spans in ``spans`` (in finish order)."""
+
+    def __init__(self):
+        self.spans: list[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def named(self, name: str) -> list[Span]:
+        return [s for s in self.spans if s.name == name]
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+EXPORTERS: dict[str, Callable[[], SpanExporter]] = {
+    "none": NoopExporter,
+    "log": LoggingExporter,
+    "memory": InMemoryExporter,
+}
+
+_exporter: SpanExporter = EXPORTERS[settings.tracing_exporter]()
+_current: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def configure(exporter: SpanExporter) -> None:
+    """Replace the exporter (e.g. with an ``InMemoryExporter`` in tests)."""
+    global _exporter
+    _exporter = exporter
+
+
+def get_exporter() -> SpanExporter:
+    return _exporter
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, *, parent: tuple[str, str] | None = None, **attributes: Any) -> Iterator[Span | _NoopSpan]:
+    """Time the enclosed block as a span; *parent* is a ``(trace_id, span_id)`` from ``extract()``."""
+    exporter = _exporter
+    if isinstance(exporter, NoopExporter):
+        yield NOOP_SPAN
+        return
+
+    current = _current.get()
+    if parent is not None:
+        trace_id, parent_id = parent
+    elif current is not None:
+        trace_id, parent_id = current.trace_id, current.span_id
+    else:
+        trace_id, parent_id = secrets.token_hex(16), None
+    s = Span(name, trace_id, secrets.token_hex(8), parent_id, attributes, time.time_ns())
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.fail(type(e).__name__)
+        raise
+    finally:
+        s.end_ns = time.time_ns()
+        _current.reset(token)
+        exporter.export(s)
+
+
+def traced(name: str | None = None) -> Callable:
+    """Decorate a function or coroutine function so each call runs in a span (default name: ``module.function``)."""
+
+    def decorate(fn: Callable) -> Callable:
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def inject(headers: dict[str, str]) -> dict[str, str]:
+    """Add a ``traceparent`` header for the current span to *headers* (if tracing is on)."""
+    current = _current.get()
+    if current is not None:
+        headers["traceparent"] = f"00-{current.trace_id}-{current.span_id}-01"
+    return headers
+
+
+def extract(traceparent: str | None) -> tuple[str, str] | None:
+    """``(trace_id, parent span_id)`` from a ``traceparent`` header, or None if absent/invalid."""
+    match = _TRACEPARENT_RE.match(traceparent or "")
+    return (match.group(1), match.group(2)) if match else None
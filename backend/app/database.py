@@ -1,24 +1,76 @@
+import logging
+import time
 from collections.abc import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from pgvector.asyncpg import register_vector
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlmodel import SQLModel
 
 from app.config import settings
+from app.core.metrics import db_pool_checkout_seconds
 
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.debug,
-    pool_pre_ping=True,
-    pool_size=20,
-    max_overflow=10,
+logger = logging.getLogger(__name__)
+
+
+def register_vector_codec(engine: AsyncEngine) -> AsyncEngine:
+    """Install pgvector's binary codec on every new asyncpg connection.
+
+    Vector columns (``PackedVector``) hand lists straight to asyncpg, so any
+    engine that reads or writes embeddings must be registered.
+    """
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, _connection_record):
+        try:
+            dbapi_connection.run_async(register_vector)
+        except ValueError:
+            logger.warning("pgvector extension missing; vector columns unavailable on this connection")
+
+    return engine
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records each checkout's wait, including any new connect, in ``db_pool_checkout_seconds``."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_seconds.observe(time.perf_counter() - start)
+
+
+engine = register_vector_codec(
+    create_async_engine(
+        settings.database_url,
+        echo=settings.debug,
+        pool_pre_ping=True,
+        poolclass=TimedQueuePool,
+        pool_size=20,
+        max_overflow=10,
+    )
 )
 
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
+# Columns added to tables that already existed; create_all only creates missing tables
+ADDED_COLUMNS = (
+    "ALTER TABLE travel_embeddings ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+    "CREATE INDEX IF NOT EXISTS ix_travel_embeddings_content_hash ON travel_embeddings (content_hash)",
+)
+
+
 async def init_db() -> None:
+    from app.services.vector_index import ensure_vector_indexes
+
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
+        for statement in ADDED_COLUMNS:
+            await conn.execute(text(statement))
+        await ensure_vector_indexes(conn)
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
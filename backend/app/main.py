@@ -1,15 +1,19 @@
 import logging
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1.router import api_router
 from app.api.v1.ws import router as ws_router
 from app.config import settings
-from app.core.middleware import RequestLoggingMiddleware
+from app.core import metrics
+from app.core.middleware import RateLimitMiddleware, RequestLoggingMiddleware, TracingMiddleware
 from app.core.redis import close_redis
-from app.database import init_db
+from app.database import async_session, init_db
+from app.services import package_service
+from app.services.flow_events import emitter as flow_event_emitter
+from app.services.flow_events import router as flow_event_router
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,7 +24,12 @@ async def lifespan(app: FastAPI):
     logger.info("Starting %s", settings.app_name)
     await init_db()
     logger.info("Database tables initialized")
+    async with async_session() as db:
+        if rows := await package_service.refresh_missing_projections(db):
+            logger.info("Built %d missing localized package projections", rows)
     yield
+    await flow_event_emitter.close()
+    await flow_event_router.close()
     await close_redis()
     logger.info("Shutdown complete")
 
@@ -31,6 +40,9 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Rate limiting (inside CORS, so 429s carry CORS headers and are logged)
+app.add_middleware(RateLimitMiddleware)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -38,10 +50,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset", "RateLimit-Policy", "Retry-After"],
 )
 
 # Request logging
 app.add_middleware(RequestLoggingMiddleware)
+app.add_middleware(TracingMiddleware)
 
 # Routes
 app.include_router(api_router)
@@ -51,3 +65,9 @@ app.include_router(ws_router, prefix="/api/v1")
 @app.get("/health")
 async def health():
     return {"status": "ok", "service": settings.app_name}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(body, media_type=content_type)
@@ -1,7 +1,7 @@
 from app.models.chat import ChatMessage, ChatSession
 from app.models.embedding import TravelEmbedding
 from app.models.itinerary import Itinerary, ItineraryDay, ItineraryItem
-from app.models.package import PackageDay, PackageTag, TravelPackage
+from app.models.package import PackageDay, PackageLocalized, PackageTag, TravelPackage
 from app.models.usage import UsageRecord
 from app.models.user import User, UserOAuthAccount
 
@@ -13,6 +13,7 @@ __all__ = [
     "TravelPackage",
     "PackageDay",
     "PackageTag",
+    "PackageLocalized",
     "Itinerary",
     "ItineraryDay",
     "ItineraryItem",
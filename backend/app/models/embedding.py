@@ -5,6 +5,23 @@ from pgvector.sqlalchemy import Vector
 from sqlalchemy import Column as SAColumn
 from sqlmodel import Column, DateTime, Field, SQLModel, func
 
+EMBEDDING_DIM = 1536
+
+
+class PackedVector(Vector):
+    """pgvector column bound in binary format.
+
+    The stock type renders vectors as ``'[0.1,0.2,...]'`` text; this one passes
+    lists through to the asyncpg codec installed by
+    ``app.database.register_vector_codec`` (6 KB binary vs ~30 KB text per
+    1536-dim vector, and no float formatting/parsing).
+    """
+
+    cache_ok = True
+
+    def bind_processor(self, dialect):
+        return None
+
 
 class TravelEmbedding(SQLModel, table=True):
     __tablename__ = "travel_embeddings"
@@ -13,8 +30,9 @@ class TravelEmbedding(SQLModel, table=True):
     source_type: str = Field(max_length=50, index=True)  # "package", "itinerary", "knowledge"
     source_id: uuid.UUID = Field(index=True)
     content_text: str
+    content_hash: str | None = Field(default=None, max_length=64, index=True)  # sha256 of content_text
     embedding: list[float] | None = Field(
         default=None,
-        sa_column=SAColumn(Vector(1536)),
+        sa_column=SAColumn(PackedVector(EMBEDDING_DIM)),
     )
     created_at: datetime = Field(sa_column=Column(DateTime(timezone=True), server_default=func.now()))
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import JSON
+from sqlalchemy import JSON, Index, Text, UniqueConstraint, text
 from sqlmodel import Column, DateTime, Field, Relationship, SQLModel, func
 
 
@@ -53,3 +53,44 @@ class PackageTag(SQLModel, table=True):
 
     # Relationships
     package: TravelPackage = Relationship(back_populates="tags")
+
+
+class PackageLocalized(SQLModel, table=True):
+    """Denormalized, per-locale projection of a package.
+
+    Rebuilt by ``package_service.refresh_localized_packages`` whenever the
+    catalog is seeded or edited, so read endpoints serve ready-to-serialize
+    rows instead of overlaying ``translations`` per request.
+    """
+
+    __tablename__ = "package_localized"
+    __table_args__ = (
+        UniqueConstraint("package_id", "locale", name="uq_package_locale"),
+        Index("ix_package_localized_locale_slug", "locale", "slug"),
+        # Composite indexes matching the catalog filter combinations
+        Index("ix_package_localized_dest_cat", "locale", "is_published", "destination", "category", "created_at"),
+        Index("ix_package_localized_cat", "locale", "is_published", "category", "created_at"),
+        Index("ix_package_localized_price", "locale", "is_published", "price_usd"),
+        Index("ix_package_localized_duration", "locale", "is_published", "duration_days"),
+        # Full-text index; queries must use the identical expression (see package_service.SEARCH_VECTOR)
+        Index("ix_package_localized_search", text("to_tsvector('simple', search_text)"), postgresql_using="gin"),
+    )
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    package_id: uuid.UUID = Field(foreign_key="travel_packages.id", index=True)
+    locale: str = Field(max_length=10)
+    slug: str = Field(max_length=200)
+    # Filter / sort columns copied from the base package
+    destination: str = Field(max_length=100)
+    category: str = Field(max_length=50)
+    duration_days: int
+    price_usd: float
+    price_band: str = Field(max_length=20)
+    duration_band: str = Field(max_length=20)
+    is_published: bool = Field(default=True)
+    created_at: datetime = Field(sa_column=Column(DateTime(timezone=True)))
+    # Pre-tokenized text (search_text.index_terms) of the localized and English fields
+    search_text: str = Field(default="", sa_column=Column(Text, nullable=False, server_default=""))
+    # Pre-rendered payloads matching PackageListRead / PackageDetailRead
+    listing: dict = Field(sa_column=Column(JSON, nullable=False))
+    detail: dict = Field(sa_column=Column(JSON, nullable=False))
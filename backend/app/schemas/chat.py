@@ -1,5 +1,6 @@
 import uuid
 from datetime import datetime
+from enum import Enum
 
 from pydantic import BaseModel
 
@@ -37,3 +38,21 @@ class ChatMessageList(BaseModel):
     messages: list[ChatMessageRead]
     total: int
     has_more: bool
+
+
+class ChatJobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    retrying = "retrying"
+    done = "done"
+    failed = "failed"
+
+
+class ChatJobRead(BaseModel):
+    id: uuid.UUID
+    session_id: uuid.UUID
+    status: ChatJobStatus
+    attempts: int = 0
+    user_message_id: uuid.UUID | None = None
+    assistant_message_id: uuid.UUID | None = None
+    error: str | None = None
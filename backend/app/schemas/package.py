@@ -38,6 +38,39 @@ class PackageDetailRead(PackageListRead):
     tags: list[PackageTagRead]
 
 
+class PackageFacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class PackageFacets(BaseModel):
+    destination: list[PackageFacetCount]
+    category: list[PackageFacetCount]
+    price_band: list[PackageFacetCount]
+    duration_band: list[PackageFacetCount]
+
+
+class PackageSearchRead(BaseModel):
+    results: list[PackageListRead]
+    total: int
+    facets: PackageFacets
+
+
+class PackageHybridHit(PackageListRead):
+    score: float  # reciprocal rank fusion score
+    lexical_rank: int | None
+    vector_rank: int | None
+
+
+class PackageHybridSearchRead(BaseModel):
+    query: str  # free text left after extracting price phrases
+    mode: str  # rankings fused: "lexical+vector", "lexical", "vector" or "filter"
+    min_price: float | None
+    max_price: float | None
+    total: int
+    results: list[PackageHybridHit]
+
+
 class PackageFilterParams(BaseModel):
     destination: str | None = None
     category: str | None = None
@@ -45,5 +78,7 @@ class PackageFilterParams(BaseModel):
     max_price: float | None = None
     min_duration: int | None = None
     max_duration: int | None = None
+    price_band: str | None = None
+    duration_band: str | None = None
     limit: int = 20
     offset: int = 0
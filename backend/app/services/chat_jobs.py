@@ -0,0 +1,274 @@
+"""Redis-backed queue for chat turns that run outside the HTTP request.
+
+``submit()`` saves the user message, records the job in a hash
+(``chatjob:{id}``) and appends its ID to the ``chatjobs`` stream.  Workers
+(``python -m app.worker``) read the stream through the ``workers`` consumer
+group, run the turn through the orchestrator, save the reply and announce it
+on the session's flow events: the terminal ``complete`` event carries
+``result = {"job_id", "message_id", "content"}``, so SSE and WebSocket
+clients receive the reply without polling ``GET /chat/jobs/{id}``.
+
+Delivery is at-least-once.  A job whose worker died stays pending and is
+reclaimed with XAUTOCLAIM after ``settings.chat_job_visibility_timeout``; a
+job that raised is retried with exponential backoff through the
+``chatjobs:retry`` sorted set, up to ``settings.chat_job_max_attempts`` runs.
+Once a reply is saved its message ID is recorded on the job, so a rerun only
+re-announces it.  Resubmitting an ``Idempotency-Key`` within
+``settings.chat_job_ttl`` returns the original job instead of a new turn.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+
+from redis.exceptions import ResponseError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.exceptions import NotFoundError
+from app.core.redis import get_redis
+from app.database import async_session
+from app.models.chat import ChatMessage, MessageRole
+from app.models.user import User, UserTier
+from app.schemas.chat import ChatJobRead, ChatJobStatus
+from app.services import chat_service
+from app.services.flow_events import emit as flow_emit
+from app.services.orchestrator import process_user_message
+from app.services.usage_service import check_and_increment
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = "chatjobs"
+GROUP = "workers"
+RETRY_KEY = "chatjobs:retry"
+JOB_PREFIX = "chatjob"
+IDEMPOTENCY_KEY_MAX_LENGTH = 200
+READ_BLOCK_MS = 5000  # how long an idle consumer waits before checking retries and stalled jobs
+FINISHED = (ChatJobStatus.done.value, ChatJobStatus.failed.value)
+
+
+def job_key(job_id) -> str:
+    return f"{JOB_PREFIX}:{job_id}"
+
+
+def _idempotency_key(user_id, key: str) -> str:
+    return f"{JOB_PREFIX}:idem:{user_id}:{key}"
+
+
+async def get_job(job_id) -> dict | None:
+    r = await get_redis()
+    return await r.hgetall(job_key(job_id)) or None
+
+
+async def get_user_job(job_id, user_id: uuid.UUID) -> dict:
+    job = await get_job(job_id)
+    if job is None or job["user_id"] != str(user_id):
+        raise NotFoundError("Chat job not found")
+    return job
+
+
+def to_read(job: dict) -> ChatJobRead:
+    return ChatJobRead(
+        id=job["id"],
+        session_id=job["session_id"],
+        status=job["status"],
+        attempts=int(job.get("attempts", 0)),
+        user_message_id=job.get("user_message_id") or None,
+        assistant_message_id=job.get("assistant_message_id") or None,
+        error=job.get("error") or None,
+    )
+
+
+async def submit(
+    db: AsyncSession,
+    *,
+    session_id: uuid.UUID,
+    user: User,
+    content: str,
+    locale: str = "en",
+    idempotency_key: str | None = None,
+) -> dict:
+    """Count the query against the daily limit, save the user message and queue the turn.
+
+    The caller verifies session ownership.  A repeated *idempotency_key*
+    returns the job it first created, without counting or saving anything.
+    """
+    r = await get_redis()
+    job_id = str(uuid.uuid4())
+    if idempotency_key:
+        idem_key = _idempotency_key(user.id, idempotency_key)
+        if not await r.set(idem_key, job_id, nx=True, ex=settings.chat_job_ttl):
+            existing = await r.get(idem_key)
+            # The first submission may still be between claiming the key and writing its job
+            return await get_job(existing) or {
+                "id": existing,
+                "session_id": str(session_id),
+                "status": ChatJobStatus.queued.value,
+            }
+
+    try:
+        await check_and_increment(db, user.id, user.tier)
+        user_message = await chat_service.add_message(db, session_id, MessageRole.user, content)
+    except BaseException:
+        if idempotency_key:
+            await r.delete(idem_key)
+        raise
+
+    job = {
+        "id": job_id,
+        "session_id": str(session_id),
+        "user_id": str(user.id),
+        "content": content,
+        "locale": locale,
+        "tier": user.tier.value,
+        "status": ChatJobStatus.queued.value,
+        "attempts": 0,
+        "user_message_id": str(user_message.id),
+        "created_at": time.time(),
+    }
+    async with r.pipeline(transaction=True) as pipe:
+        pipe.hset(job_key(job_id), mapping=job)
+        pipe.expire(job_key(job_id), settings.chat_job_ttl)
+        pipe.xadd(STREAM_KEY, {"job_id": job_id})
+        await pipe.execute()
+    flow_emit(session_id, step="queued", status="active", message="Waiting for a worker", result={"job_id": job_id})
+    return job
+
+
+class ChatJobWorker:
+    """Runs queued chat turns, *concurrency* at a time, until *stop* is set."""
+
+    def __init__(self, concurrency: int, name: str | None = None):
+        self._concurrency = concurrency
+        self._name = name or f"{socket.gethostname()}-{os.getpid()}"
+
+    async def run(self, stop: asyncio.Event) -> None:
+        r = await get_redis()
+        try:
+            # From "0" so jobs queued before the first worker ever started are picked up
+            await r.xgroup_create(STREAM_KEY, GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        logger.info("chat worker %s running %d consumers", self._name, self._concurrency)
+        await asyncio.gather(*(self._consume(f"{self._name}-{i}", stop) for i in range(self._concurrency)))
+
+    async def _consume(self, consumer: str, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            try:
+                r = await get_redis()
+                entry = await self._next(r, consumer)
+                if entry is None:
+                    continue
+                entry_id, job_id = entry
+                await self._handle(r, job_id)
+                # Acknowledged only after the job reached a recorded state; otherwise it is reclaimed
+                async with r.pipeline(transaction=False) as pipe:
+                    pipe.xack(STREAM_KEY, GROUP, entry_id)
+                    pipe.xdel(STREAM_KEY, entry_id)
+                    await pipe.execute()
+            except Exception:
+                logger.exception("chat worker consumer %s failed; continuing", consumer)
+                await asyncio.sleep(1)
+
+    async def _next(self, r, consumer: str) -> tuple[str, str] | None:
+        """The next ``(stream entry id, job id)``: a due retry, a stalled job or a new one."""
+        now = time.time()
+        for job_id in await r.zrangebyscore(RETRY_KEY, "-inf", now, start=0, num=10):
+            if await r.zrem(RETRY_KEY, job_id):  # only one worker wins each retry
+                await r.xadd(STREAM_KEY, {"job_id": job_id})
+
+        _, claimed, *_ = await r.xautoclaim(
+            STREAM_KEY, GROUP, consumer, min_idle_time=settings.chat_job_visibility_timeout * 1000, count=1
+        )
+        for entry_id, fields in claimed:
+            if fields:
+                logger.warning("chat job %s reclaimed by %s", fields["job_id"], consumer)
+                return entry_id, fields["job_id"]
+
+        for _, entries in await r.xreadgroup(GROUP, consumer, {STREAM_KEY: ">"}, count=1, block=READ_BLOCK_MS):
+            for entry_id, fields in entries:
+                return entry_id, fields["job_id"]
+        return None
+
+    async def _handle(self, r, job_id: str) -> None:
+        job = await get_job(job_id)
+        if job is None or job["status"] in FINISHED:
+            return
+        attempt = await r.hincrby(job_key(job_id), "attempts", 1)
+        if attempt > settings.chat_job_max_attempts:
+            # Only reachable for jobs whose workers died mid-run
+            await self._fail(r, job, "Job abandoned by its workers too many times")
+            return
+        await r.hset(job_key(job_id), "status", ChatJobStatus.running.value)
+
+        try:
+            message, slots = await self._run(r, job)
+        except NotFoundError as e:
+            await self._fail(r, job, e.detail)
+            return
+        except Exception as e:
+            logger.exception("chat job %s attempt %d failed", job_id, attempt)
+            if attempt >= settings.chat_job_max_attempts:
+                await self._fail(r, job, str(e) or type(e).__name__)
+                return
+            delay = settings.chat_job_retry_delay * 2 ** (attempt - 1)
+            async with r.pipeline(transaction=True) as pipe:
+                pipe.hset(job_key(job_id), mapping={"status": ChatJobStatus.retrying.value, "error": str(e)})
+                pipe.zadd(RETRY_KEY, {job_id: time.time() + delay})
+                await pipe.execute()
+            flow_emit(
+                job["session_id"],
+                step="queued",
+                status="retrying",
+                message=f"Retrying in {delay:.0f}s",
+                result={"job_id": job_id},
+            )
+            return
+
+        await r.hset(job_key(job_id), mapping={"status": ChatJobStatus.done.value, "error": ""})
+        flow_emit(
+            job["session_id"],
+            step="complete",
+            status="done",
+            slots=slots,
+            message="All done",
+            result={"job_id": job_id, "message_id": str(message.id), "content": message.content},
+        )
+
+    async def _run(self, r, job: dict) -> tuple[ChatMessage, dict | None]:
+        session_id = uuid.UUID(job["session_id"])
+        async with async_session() as db:
+            session = await chat_service.get_session(db, session_id, uuid.UUID(job["user_id"]))
+            # A previous run saved the reply but died before marking the job done
+            if saved_id := job.get("assistant_message_id"):
+                message = await db.get(ChatMessage, uuid.UUID(saved_id))
+                if message is not None:
+                    return message, session.intent_slots
+
+            reply, slots = await process_user_message(
+                session_id=session_id,
+                user_message=job["content"],
+                intent_slots=session.intent_slots,
+                locale=job["locale"],
+                emit_complete=False,
+                tier=UserTier(job.get("tier", UserTier.free.value)),
+            )
+            await chat_service.update_intent_slots(db, session_id, slots)
+            message = await chat_service.add_message(db, session_id, MessageRole.assistant, reply)
+            await r.hset(job_key(job["id"]), "assistant_message_id", str(message.id))
+            return message, slots
+
+    async def _fail(self, r, job: dict, error: str) -> None:
+        logger.error("chat job %s failed: %s", job["id"], error)
+        await r.hset(job_key(job["id"]), mapping={"status": ChatJobStatus.failed.value, "error": error})
+        flow_emit(
+            job["session_id"],
+            step="complete",
+            status="error",
+            message=error,
+            result={"job_id": job["id"], "error": error},
+        )
@@ -4,9 +4,11 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.exceptions import NotFoundError
+from app.core.tracing import traced
 from app.models.chat import ChatMessage, ChatSession, MessageRole
 
 
+@traced()
 async def create_session(db: AsyncSession, user_id: uuid.UUID, title: str | None = None) -> ChatSession:
     session = ChatSession(
         user_id=user_id,
@@ -18,6 +20,7 @@ async def create_session(db: AsyncSession, user_id: uuid.UUID, title: str | None
     return session
 
 
+@traced()
 async def list_sessions(db: AsyncSession, user_id: uuid.UUID) -> list[ChatSession]:
     stmt = (
         select(ChatSession)
@@ -28,6 +31,7 @@ async def list_sessions(db: AsyncSession, user_id: uuid.UUID) -> list[ChatSessio
     return list(result.scalars().all())
 
 
+@traced()
 async def get_session(db: AsyncSession, session_id: uuid.UUID, user_id: uuid.UUID) -> ChatSession:
     stmt = select(ChatSession).where(
         ChatSession.id == session_id,
@@ -40,12 +44,14 @@ async def get_session(db: AsyncSession, session_id: uuid.UUID, user_id: uuid.UUI
     return session
 
 
+@traced()
 async def delete_session(db: AsyncSession, session_id: uuid.UUID, user_id: uuid.UUID) -> None:
     session = await get_session(db, session_id, user_id)
     session.is_active = False
     await db.commit()
 
 
+@traced()
 async def add_message(
     db: AsyncSession,
     session_id: uuid.UUID,
@@ -65,6 +71,7 @@ async def add_message(
     return message
 
 
+@traced()
 async def get_messages(
     db: AsyncSession,
     session_id: uuid.UUID,
@@ -89,6 +96,7 @@ async def get_messages(
     return list(result.scalars().all()), total
 
 
+@traced()
 async def update_intent_slots(db: AsyncSession, session_id: uuid.UUID, slots: dict) -> ChatSession:
     session = await db.get(ChatSession, session_id)
     if not session:
@@ -0,0 +1,102 @@
+"""Redis cache of search-query embeddings.
+
+Queries are normalized (NFKC, case-folded, whitespace collapsed) so that
+"Ski trip  Hokkaido" and "ski trip hokkaido" share one entry, holding the
+embedding of the query text as it was first asked.  Vectors are
+stored as packed little-endian float32 (6 KB for 1536 dims, vs ~30 KB of
+JSON).  A sorted set of last-access times gives LRU eviction once the
+cache exceeds ``query_embedding_cache_size``; entries also carry a TTL.
+Hit/miss/error counters are kept per process and exported on ``/metrics``
+as ``query_embedding_cache_lookups``.
+"""
+
+import hashlib
+import logging
+import re
+import struct
+import time
+import unicodedata
+
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.core.redis import get_redis_binary
+from app.services.embedding_service import generate_embedding
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "qemb"
+LRU_KEY = f"{KEY_PREFIX}:lru"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Per-process counters, exported by app.core.metrics
+local_stats = {"hits": 0, "misses": 0, "errors": 0}
+
+
+def normalize_query(query: str) -> str:
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", query).casefold()).strip()
+
+
+def _cache_key(normalized: str) -> str:
+    digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+    return f"{KEY_PREFIX}:{settings.embedding_model}:{digest}"
+
+
+def pack_vector(vector: list[float]) -> bytes:
+    return struct.pack(f"<{len(vector)}f", *vector)
+
+
+def unpack_vector(blob: bytes) -> list[float]:
+    return list(struct.unpack(f"<{len(blob) // 4}f", blob))
+
+
+async def get_query_embedding(query: str) -> list[float]:
+    """Return the embedding for a search query, from cache when possible.
+
+    Redis failures degrade to an uncached embedding call.
+    """
+    normalized = normalize_query(query)
+    key = _cache_key(normalized)
+
+    try:
+        r = await get_redis_binary()
+        blob = await r.get(key)
+    except RedisError:
+        local_stats["errors"] += 1
+        logger.warning("Query embedding cache read failed", exc_info=True)
+        return await generate_embedding(query)
+
+    if blob:
+        local_stats["hits"] += 1
+        try:
+            await r.zadd(LRU_KEY, {key: time.time()})
+        except RedisError:
+            # The vector is already in hand; only its LRU position is stale
+            local_stats["errors"] += 1
+            logger.warning("Query embedding cache LRU update failed", exc_info=True)
+        return unpack_vector(blob)
+
+    local_stats["misses"] += 1
+    embedding = await generate_embedding(query)
+
+    try:
+        async with r.pipeline(transaction=False) as pipe:
+            pipe.set(key, pack_vector(embedding), ex=settings.query_embedding_cache_ttl)
+            pipe.zadd(LRU_KEY, {key: time.time()})
+            pipe.zcard(LRU_KEY)
+            *_, size = await pipe.execute()
+        if size > settings.query_embedding_cache_size:
+            await _evict(r, size - settings.query_embedding_cache_size)
+    except RedisError:
+        local_stats["errors"] += 1
+        logger.warning("Query embedding cache write failed", exc_info=True)
+
+    return embedding
+
+
+async def _evict(r, count: int) -> None:
+    """Drop the *count* least-recently-used entries."""
+    evicted = await r.zpopmin(LRU_KEY, count)
+    if evicted:
+        await r.delete(*[member for member, _ in evicted])
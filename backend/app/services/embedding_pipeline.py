@@ -0,0 +1,168 @@
+"""Batch ingestion of package content into ``travel_embeddings``.
+
+Packages are split into chunks (one overview chunk per package, one per
+itinerary day, long texts split on sentence boundaries), fingerprinted by
+content hash, and only new or changed chunks are embedded.  Rows for
+chunks that no longer exist are deleted, as are the rows of packages that
+were unpublished or deleted and of days that were removed.  New rows are
+bulk-inserted with a single executemany.
+"""
+
+import logging
+import re
+import uuid
+from dataclasses import dataclass
+
+from sqlalchemy import and_, delete, insert, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models.embedding import TravelEmbedding
+from app.models.package import PackageDay, TravelPackage
+from app.services.embedding_service import content_hash, generate_embeddings
+
+logger = logging.getLogger(__name__)
+
+MAX_CHUNK_CHARS = 2000
+_SENTENCE_RE = re.compile(r"(?<=[.!?。！？])\s*")
+
+
+@dataclass(frozen=True, slots=True)
+class EmbeddingChunk:
+    source_type: str
+    source_id: uuid.UUID
+    content_text: str
+
+    @property
+    def content_hash(self) -> str:
+        return content_hash(self.content_text)
+
+
+def _split_text(text: str, max_chars: int = MAX_CHUNK_CHARS) -> list[str]:
+    """Split *text* into pieces of at most *max_chars*, preferring sentence ends."""
+    if len(text) <= max_chars:
+        return [text]
+    pieces: list[str] = []
+    current = ""
+    for sentence in _SENTENCE_RE.split(text):
+        while len(sentence) > max_chars:  # a single oversized sentence
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            pieces.append(current)
+            current = ""
+        current = f"{current} {sentence}".strip()
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_package(package: TravelPackage) -> list[EmbeddingChunk]:
+    """Chunk one package (with days and tags loaded) into embeddable texts."""
+    tags = ", ".join(tag.tag for tag in package.tags)
+    overview = "\n".join(
+        part
+        for part in (
+            package.title,
+            f"{package.destination} · {package.category} · {package.duration_days} days · ${package.price_usd:.0f}",
+            package.summary,
+            package.description,
+            "Highlights: " + "; ".join(package.highlights) if package.highlights else "",
+            f"Tags: {tags}" if tags else "",
+        )
+        if part
+    )
+    chunks = [EmbeddingChunk("package", package.id, piece) for piece in _split_text(overview)]
+
+    for day in sorted(package.days, key=lambda d: d.day_number):
+        activities = ", ".join(a.get("name", "") for a in day.activities or [] if a.get("name"))
+        day_text = f"{package.title} — Day {day.day_number}: {day.title}\n{day.description}"
+        if activities:
+            day_text += f"\nActivities: {activities}"
+        chunks.extend(EmbeddingChunk("package_day", day.id, piece) for piece in _split_text(day_text))
+    return chunks
+
+
+async def sync_embeddings(db: AsyncSession, chunks: list[EmbeddingChunk]) -> dict[str, int]:
+    """Make ``travel_embeddings`` match *chunks* for the sources they cover.
+
+    Unchanged chunks (same source and content hash) are skipped, stale rows
+    are deleted, and the remainder are embedded in batches and inserted in
+    one executemany.  Returns counts of embedded / skipped / deleted rows.
+    """
+    sources = {(c.source_type, c.source_id) for c in chunks}
+    if not sources:
+        await db.commit()
+        return {"embedded": 0, "skipped": 0, "deleted": 0}
+
+    source_key = tuple_(TravelEmbedding.source_type, TravelEmbedding.source_id)
+    existing_rows = await db.execute(
+        select(
+            TravelEmbedding.id, TravelEmbedding.source_type, TravelEmbedding.source_id, TravelEmbedding.content_hash
+        ).where(source_key.in_(list(sources)))
+    )
+    existing = {(row.source_type, row.source_id, row.content_hash): row.id for row in existing_rows}
+
+    wanted: dict[tuple[str, uuid.UUID, str], EmbeddingChunk] = {}
+    for chunk in chunks:
+        wanted.setdefault((chunk.source_type, chunk.source_id, chunk.content_hash), chunk)
+
+    stale_ids = [row_id for key, row_id in existing.items() if key not in wanted]
+    pending = [chunk for key, chunk in wanted.items() if key not in existing]
+
+    if stale_ids:
+        await db.execute(delete(TravelEmbedding).where(TravelEmbedding.id.in_(stale_ids)))
+
+    if pending:
+        vectors = await generate_embeddings([c.content_text for c in pending])
+        await db.execute(
+            insert(TravelEmbedding),
+            [
+                {
+                    "id": uuid.uuid4(),
+                    "source_type": chunk.source_type,
+                    "source_id": chunk.source_id,
+                    "content_text": chunk.content_text,
+                    "content_hash": chunk.content_hash,
+                    "embedding": vector,
+                }
+                for chunk, vector in zip(pending, vectors)
+            ],
+        )
+
+    await db.commit()
+    stats = {"embedded": len(pending), "skipped": len(wanted) - len(pending), "deleted": len(stale_ids)}
+    logger.info("Embedding sync: %s", stats)
+    return stats
+
+
+async def embed_packages(db: AsyncSession, package_ids: list[uuid.UUID] | None = None) -> dict[str, int]:
+    """Chunk and embed published packages (all, or just *package_ids*)."""
+    stmt = (
+        select(TravelPackage)
+        .where(TravelPackage.is_published.is_(True))
+        .options(selectinload(TravelPackage.days), selectinload(TravelPackage.tags))
+    )
+    if package_ids is not None:
+        stmt = stmt.where(TravelPackage.id.in_(package_ids))
+    packages = (await db.execute(stmt)).scalars().all()
+    chunks = [chunk for package in packages for chunk in chunk_package(package)]
+    orphans = await _delete_orphans(db)
+    stats = await sync_embeddings(db, chunks)
+    stats["deleted"] += orphans
+    return stats
+
+
+async def _delete_orphans(db: AsyncSession) -> int:
+    """Delete rows of packages that are no longer published and of days that no longer exist."""
+    published = select(TravelPackage.id).where(TravelPackage.is_published.is_(True))
+    published_days = select(PackageDay.id).where(PackageDay.package_id.in_(published))
+    result = await db.execute(
+        delete(TravelEmbedding).where(
+            or_(
+                and_(TravelEmbedding.source_type == "package", TravelEmbedding.source_id.not_in(published)),
+                and_(TravelEmbedding.source_type == "package_day", TravelEmbedding.source_id.not_in(published_days)),
+            )
+        )
+    )
+    return result.rowcount
@@ -1,27 +1,80 @@
+import asyncio
+import hashlib
+import logging
 import uuid
 
 import httpx
-from sqlalchemy import text
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.models.embedding import TravelEmbedding
 
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying (rate limiting / transient upstream failures)
+_RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+def content_hash(text_content: str) -> str:
+    """Stable fingerprint used to skip re-embedding unchanged content."""
+    return hashlib.sha256(text_content.encode("utf-8")).hexdigest()
+
+
+async def _request_embeddings(client: httpx.AsyncClient, inputs: list[str]) -> list[list[float]]:
+    """POST one batch to the embeddings API, retrying transient failures."""
+    attempt = 0
+    while True:
+        try:
+            resp = await client.post(
+                f"{settings.openrouter_base_url}/embeddings",
+                headers={"Authorization": f"Bearer {settings.openrouter_api_key}"},
+                json={"model": settings.embedding_model, "input": inputs},
+                timeout=30.0,
+            )
+            if resp.status_code not in _RETRYABLE_STATUS:
+                resp.raise_for_status()
+                # The API may return items out of order; "index" is authoritative
+                items = sorted(resp.json()["data"], key=lambda item: item["index"])
+                return [item["embedding"] for item in items]
+            error: Exception = httpx.HTTPStatusError(
+                f"embeddings returned {resp.status_code}", request=resp.request, response=resp
+            )
+        except httpx.TransportError as e:
+            error = e
+        if attempt >= settings.embedding_max_retries:
+            raise error
+        delay = 0.5 * 2**attempt
+        attempt += 1
+        logger.warning("Embedding batch failed (%s), retry %d in %.1fs", error, attempt, delay)
+        await asyncio.sleep(delay)
+
+
+async def generate_embeddings(texts: list[str]) -> list[list[float]]:
+    """Embed many strings: batches of ``embedding_batch_size`` inputs per
+    request with at most ``embedding_concurrency`` requests in flight.
+
+    Returns embeddings in the same order as *texts*.
+    """
+    if not texts:
+        return []
+    size = settings.embedding_batch_size
+    batches = [texts[i : i + size] for i in range(0, len(texts), size)]
+    sem = asyncio.Semaphore(settings.embedding_concurrency)
+
+    async def run(client: httpx.AsyncClient, batch: list[str]) -> list[list[float]]:
+        async with sem:
+            return await _request_embeddings(client, batch)
+
+    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=settings.embedding_concurrency)) as client:
+        results = await asyncio.gather(*[run(client, batch) for batch in batches])
+    return [embedding for batch in results for embedding in batch]
+
 
 async def generate_embedding(text_content: str) -> list[float]:
     """Generate embedding using OpenRouter / OpenAI-compatible API."""
     async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            f"{settings.openrouter_base_url}/embeddings",
-            headers={"Authorization": f"Bearer {settings.openrouter_api_key}"},
-            json={
-                "model": "openai/text-embedding-3-small",
-                "input": text_content,
-            },
-            timeout=30.0,
-        )
-        data = resp.json()
-        return data["data"][0]["embedding"]
+        return (await _request_embeddings(client, [text_content]))[0]
 
 
 async def store_embedding(
@@ -35,6 +88,7 @@ async def store_embedding(
         source_type=source_type,
         source_id=source_id,
         content_text=content_text,
+        content_hash=content_hash(content_text),
         embedding=embedding,
     )
     db.add(record)
@@ -43,38 +97,69 @@ async def store_embedding(
     return record
 
 
+async def set_search_params(
+    db: AsyncSession, ef_search: int | None = None, probes: int | None = None, *, filtered: bool = False
+) -> None:
+    """Tune the ANN scan for the current transaction only (``set_config(..., true)``).
+
+    A *filtered* scan has conditions the index cannot apply; it enables
+    pgvector's iterative index scan (``settings.vector_iterative_scan``) so
+    the index keeps yielding rows until enough pass the filters.
+    """
+    method = settings.vector_index_method
+    if method == "hnsw":
+        params = {"hnsw.ef_search": ef_search or settings.vector_ef_search}
+    else:
+        params = {"ivfflat.probes": probes or settings.vector_ivfflat_probes}
+    if filtered and settings.vector_iterative_scan != "off":
+        params[f"{method}.iterative_scan"] = settings.vector_iterative_scan
+    await db.execute(select(*[func.set_config(name, str(value), True) for name, value in params.items()]))
+
+
 async def semantic_search(
     db: AsyncSession,
     query_embedding: list[float],
     source_type: str | None = None,
     limit: int = 10,
+    ef_search: int | None = None,
+    probes: int | None = None,
 ) -> list[dict]:
-    """Cosine similarity search via pgvector."""
-    embedding_str = "[" + ",".join(str(x) for x in query_embedding) + "]"
+    """Cosine similarity search via pgvector.
+
+    The query vector is bound as a parameter in binary format and
+    *source_type* matches one of the partial ANN indexes, so filtered
+    searches get a full page of results.  *ef_search* / *probes* trade
+    recall for latency (defaults from settings).  A source split into
+    several chunks is returned once, with its best chunk.
+    """
+    if source_type and source_type not in settings.vector_index_source_types:
+        raise ValueError(f"Unknown source type: {source_type}")
 
-    where_clause = ""
+    await set_search_params(db, ef_search, probes)
+
+    distance = TravelEmbedding.embedding.cosine_distance(query_embedding)
+    stmt = select(
+        TravelEmbedding.id,
+        TravelEmbedding.source_type,
+        TravelEmbedding.source_id,
+        TravelEmbedding.content_text,
+        (1 - distance).label("similarity"),
+    ).where(TravelEmbedding.embedding.is_not(None))
     if source_type:
-        where_clause = f"AND source_type = '{source_type}'"
-
-    sql = text(f"""
-        SELECT id, source_type, source_id, content_text,
-               1 - (embedding <=> :embedding::vector) AS similarity
-        FROM travel_embeddings
-        WHERE embedding IS NOT NULL {where_clause}
-        ORDER BY embedding <=> :embedding::vector
-        LIMIT :limit
-    """)
-
-    result = await db.execute(sql, {"embedding": embedding_str, "limit": limit})
-    rows = result.fetchall()
-
-    return [
-        {
+        stmt = stmt.where(TravelEmbedding.source_type == source_type)
+    stmt = stmt.order_by(distance).limit(limit * 2)  # long texts are split into several chunks
+
+    best: dict[tuple[str, uuid.UUID], dict] = {}
+    for row in (await db.execute(stmt)).all():
+        if (row.source_type, row.source_id) in best:
+            continue
+        best[row.source_type, row.source_id] = {
             "id": str(row.id),
             "source_type": row.source_type,
             "source_id": str(row.source_id),
             "content_text": row.content_text,
             "similarity": float(row.similarity),
         }
-        for row in rows
-    ]
+        if len(best) == limit:
+            break
+    return list(best.values())
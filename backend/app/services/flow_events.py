@@ -1,16 +1,34 @@
 """Redis pub/sub event bus for real-time agent flow monitoring.
 
-The orchestrator publishes step events via ``emit()``.  The SSE endpoint
+The orchestrator publishes step events via ``emit()``, which only queues
+them; a background task publishes them in pipelined batches.  The SSE endpoint
 subscribes via ``subscribe()`` and streams them to the browser.
+
+Every event is also appended to a capped per-session Redis Stream
+(``flowlog:{session_id}``), and its stream ID travels with the live message
+and becomes the SSE ``id:``.  A client that connects mid-turn gets the turn's
+earlier events replayed; one that reconnects with ``Last-Event-ID`` gets
+everything after that ID.  The log doubles as a per-stage latency timeline.
+
+Each process holds a single ``flow:*`` pattern subscription (``router``) and
+fans messages out to per-viewer in-memory queues, so the number of Redis
+connections stays constant however many flow monitors are open.  Queues are
+bounded; a slow viewer loses events according to
+``settings.flow_event_drop_policy`` but always receives terminal events.
 """
 
 import asyncio
 import json
 import logging
+import re
 import time
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 
 import redis.asyncio as aioredis
+from redis.commands.core import AsyncScript
+from redis.exceptions import RedisError
 
 from app.config import settings
 from app.core.redis import get_redis
@@ -18,10 +36,142 @@ from app.core.redis import get_redis
 logger = logging.getLogger(__name__)
 
 CHANNEL_PREFIX = "flow"
+LOG_PREFIX = "flowlog"
 SUBSCRIBE_TIMEOUT = 120  # seconds — prevents hanging connections
+KEEPALIVE_INTERVAL = 15.0  # seconds of silence before an SSE keep-alive comment
+TERMINAL_STEPS = ("complete", "error")
+RECONNECT_MAX_DELAY = 30.0
+CLOSE_TIMEOUT = 5.0  # seconds close() waits for queued events to be published
+# A turn starts when a worker queue accepts it ("queued") or, for a direct turn, when it is received
+TURN_START_STEPS = ("queued", "received")
+_STREAM_ID_RE = re.compile(r"^\d+-\d+$")
+
+# Append to the session log, keep it capped and expiring, and publish "<stream id> <payload>"
+LOG_AND_PUBLISH = """
+local id = redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[3], '*', 'data', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+redis.call('PUBLISH', ARGV[1], id .. ' ' .. ARGV[2])
+return id
+"""
+
+
+def log_key(session_id) -> str:
+    return f"{LOG_PREFIX}:{session_id}"
+
+
+def _split(message: str) -> tuple[str, str]:
+    """``(stream id, payload)`` of a live message."""
+    entry_id, _, payload = message.partition(" ")
+    return entry_id, payload
+
+
+def _stream_id(entry_id: str) -> tuple[int, int]:
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq)
+
+
+# Per-process emitter counters
+emit_stats = {"queued": 0, "published": 0, "dropped": 0, "late": 0, "errors": 0}
+
+
+class FlowEventEmitter:
+    """Publish flow events from a background task so emitting never waits on Redis.
+
+    ``emit()`` only timestamps the event and appends it to a bounded queue.
+    The publisher task drains whatever has accumulated (up to *batch_size*)
+    into one pipelined round-trip of PUBLISHes, in emit order.  Events that
+    find the queue full are dropped; events published more than *late_ms*
+    after they were emitted are counted as late.
+    """
+
+    def __init__(self, queue_size: int, batch_size: int, late_ms: int, log_maxlen: int, log_ttl: int):
+        self._queue_size = queue_size
+        self._batch_size = batch_size
+        self._late_after = late_ms / 1000
+        self._log_args = (log_maxlen, log_ttl)
+        self._queue: asyncio.Queue[tuple[str, dict, float] | None] | None = None
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        self._script: AsyncScript | None = None
 
+    def emit(self, session_id, event: dict) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self._queue_size)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="flow-event-emitter")
+        try:
+            self._queue.put_nowait((str(session_id), event, time.monotonic()))
+        except asyncio.QueueFull:
+            emit_stats["dropped"] += 1
+            return
+        emit_stats["queued"] += 1
 
-async def emit(
+    async def _publish(self, batch: list[tuple[str, dict, float]]) -> None:
+        try:
+            r = await get_redis()
+            if self._script is None:
+                self._script = r.register_script(LOG_AND_PUBLISH)
+            async with r.pipeline(transaction=False) as pipe:
+                for session_id, event, _ in batch:
+                    payload = json.dumps(event, ensure_ascii=False)
+                    channel = f"{CHANNEL_PREFIX}:{session_id}"
+                    await self._script(
+                        keys=[log_key(session_id)], args=[channel, payload, *self._log_args], client=pipe
+                    )
+                await pipe.execute()
+        except Exception:
+            emit_stats["errors"] += len(batch)
+            logger.debug("flow event publish failed (non-critical)", exc_info=True)
+            return
+        now = time.monotonic()
+        emit_stats["published"] += len(batch)
+        emit_stats["late"] += sum(1 for _, _, queued_at in batch if now - queued_at > self._late_after)
+
+    def _drain(self, first: tuple[str, dict, float]) -> list[tuple[str, dict, float]]:
+        batch = [first]
+        while len(batch) < self._batch_size and not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:  # close()'s wake-up
+                batch.append(item)
+        return batch
+
+    async def _run(self) -> None:
+        while not (self._closing and self._queue.empty()):
+            item = await self._queue.get()
+            if item is not None:
+                await self._publish(self._drain(item))
+
+    async def close(self) -> None:
+        """Stop the publisher after flushing events that are already queued.
+
+        The publisher finishes its current batch and drains the queue; it is
+        only cancelled if that takes longer than ``CLOSE_TIMEOUT``.
+        """
+        if self._task is None:
+            return
+        self._closing = True
+        try:
+            self._queue.put_nowait(None)  # wake the publisher if it is waiting for events
+        except asyncio.QueueFull:
+            pass  # it is busy and will find the queue empty after draining it
+        try:
+            await asyncio.wait_for(self._task, CLOSE_TIMEOUT)
+        except TimeoutError:
+            logger.warning("flow event flush timed out; %d events dropped", self._queue.qsize())
+        self._task = None
+        self._closing = False
+
+
+emitter = FlowEventEmitter(
+    settings.flow_emit_queue_size,
+    settings.flow_emit_batch_size,
+    settings.flow_emit_late_ms,
+    settings.flow_log_maxlen,
+    settings.flow_log_ttl,
+)
+
+
+def emit(
     session_id,
     *,
     step: str,
@@ -29,77 +179,234 @@ async def emit(
     status: str = "active",
     slots: dict | None = None,
     message: str = "",
+    result: dict | None = None,
 ) -> None:
-    """Publish a flow event to the Redis channel for *session_id*."""
-    r = await get_redis()
-    payload = json.dumps(
+    """Queue a flow event for *session_id*; it is published to Redis in the background.
+
+    *result* carries a payload for the client, e.g. the reply of a queued chat
+    job on its ``complete`` event.
+    """
+    emitter.emit(
+        session_id,
         {
             "step": step,
             "crew": crew,
             "status": status,
-            "slots": slots,
+            # Copied: callers keep mutating their slots dict after emitting
+            "slots": dict(slots) if slots is not None else None,
             "message": message,
+            "result": result,
             "ts": time.time(),
         },
-        ensure_ascii=False,
     )
-    channel = f"{CHANNEL_PREFIX}:{session_id}"
-    await r.publish(channel, payload)
-    logger.debug("flow_event %s → %s", channel, payload[:120])
 
 
-async def subscribe(session_id) -> AsyncGenerator[str, None]:
-    """Yield JSON event strings from the Redis channel for *session_id*.
+def _step(payload: str) -> str | None:
+    try:
+        return json.loads(payload).get("step")
+    except (json.JSONDecodeError, AttributeError):
+        return None
 
-    Terminates on ``complete`` / ``error`` steps or after *SUBSCRIBE_TIMEOUT*.
-    The caller is responsible for closing the returned generator.
 
-    A **dedicated** Redis connection is created because redis-py requires
-    a connection in pub/sub mode to be exclusively used for subscriptions.
+def _is_terminal(payload: str) -> bool:
+    return _step(payload) in TERMINAL_STEPS
+
+
+async def read_log(session_id, after: str | None = None) -> list[tuple[str, str]]:
+    """``(stream id, payload)`` entries of the session's event log, oldest first, after *after* (exclusive)."""
+    r = await get_redis()
+    entries = await r.xrange(log_key(session_id), min=f"({after}" if after else "-")
+    return [(entry_id, fields["data"]) for entry_id, fields in entries]
+
+
+def _turn_starts(steps: list[str | None]) -> list[int]:
+    """Indexes of the steps that open a turn: a start step not directly preceded by another."""
+    return [
+        i
+        for i, step in enumerate(steps)
+        if step in TURN_START_STEPS and (i == 0 or steps[i - 1] not in TURN_START_STEPS)
+    ]
+
+
+def _current_turn(entries: list[tuple[str, str]]) -> list[tuple[str, str]]:
+    """Entries of the latest turn if it is still running, else nothing (a finished turn is not replayed)."""
+    steps = [_step(payload) for _, payload in entries]
+    start = max(_turn_starts(steps), default=0)
+    if any(step in TERMINAL_STEPS for step in steps[start:]):
+        return []
+    return entries[start:]
+
+
+async def timeline(session_id) -> list[dict]:
+    """Logged events with milliseconds since their turn started and since the previous event."""
+    events = []
+    turn_start = previous = None
+    entries = [(entry_id, json.loads(payload)) for entry_id, payload in await read_log(session_id)]
+    starts = set(_turn_starts([event["step"] for _, event in entries]))
+    for i, (entry_id, event) in enumerate(entries):
+        ts = event["ts"]
+        if turn_start is None or i in starts:
+            turn_start = previous = ts
+        events.append(
+            {
+                "id": entry_id,
+                "step": event["step"],
+                "crew": event["crew"],
+                "status": event["status"],
+                "ts": ts,
+                "elapsed_ms": round((ts - turn_start) * 1000, 1),
+                "stage_ms": round((ts - previous) * 1000, 1),
+            }
+        )
+        previous = ts
+    return events
+
+
+@dataclass(eq=False)
+class FlowViewer:
+    """One SSE stream's bounded event buffer."""
+
+    queue: asyncio.Queue[str]
+    dropped: int = 0
+
+
+class FlowEventRouter:
+    """A per-process ``flow:*`` subscriber that fans events out to viewer queues.
+
+    The Redis reader task starts with the first viewer and reconnects with
+    backoff if the connection drops; viewers stay registered meanwhile.
     """
-    conn = aioredis.from_url(settings.redis_url, decode_responses=True)
-    pubsub = conn.pubsub()
-    channel = f"{CHANNEL_PREFIX}:{session_id}"
 
-    try:
-        await pubsub.subscribe(channel)
-        deadline = asyncio.get_event_loop().time() + SUBSCRIBE_TIMEOUT
+    def __init__(self, buffer_size: int, drop_policy: str = "oldest"):
+        if drop_policy not in ("oldest", "newest"):
+            raise ValueError(f"Unknown flow event drop policy {drop_policy!r}")
+        self._buffer_size = buffer_size
+        self._drop_policy = drop_policy
+        self._viewers: dict[str, set[FlowViewer]] = {}
+        self._task: asyncio.Task | None = None
 
+    @property
+    def viewer_count(self) -> int:
+        return sum(len(viewers) for viewers in self._viewers.values())
+
+    @asynccontextmanager
+    async def listen(self, session_id) -> AsyncIterator[FlowViewer]:
+        """Register a viewer for *session_id* for the duration of the block."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="flow-event-router")
+        channel = f"{CHANNEL_PREFIX}:{session_id}"
+        viewer = FlowViewer(asyncio.Queue(maxsize=self._buffer_size))
+        self._viewers.setdefault(channel, set()).add(viewer)
+        try:
+            yield viewer
+        finally:
+            viewers = self._viewers.get(channel)
+            if viewers is not None:
+                viewers.discard(viewer)
+                if not viewers:
+                    del self._viewers[channel]
+            if viewer.dropped:
+                logger.info("flow viewer for %s dropped %d events", session_id, viewer.dropped)
+
+    def dispatch(self, channel: str, data: str) -> None:
+        """Queue *data* for every viewer of *channel*, applying the drop policy to full buffers."""
+        for viewer in self._viewers.get(channel, ()):
+            queue = viewer.queue
+            if queue.full():
+                viewer.dropped += 1
+                if self._drop_policy == "newest" and not _is_terminal(_split(data)[1]):
+                    continue
+                queue.get_nowait()
+            queue.put_nowait(data)
+
+    async def _run(self) -> None:
+        delay = 0.5
         while True:
-            remaining = deadline - asyncio.get_event_loop().time()
-            if remaining <= 0:
-                logger.info("flow subscribe timeout for %s", session_id)
-                break
+            conn = aioredis.from_url(settings.redis_url, decode_responses=True)
+            pubsub = conn.pubsub()
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}:*")
+                delay = 0.5
+                async for msg in pubsub.listen():
+                    if msg["type"] == "pmessage":
+                        self.dispatch(msg["channel"], msg["data"])
+            except (RedisError, OSError):
+                logger.warning("flow event router lost Redis; reconnecting in %.1fs", delay, exc_info=True)
+            finally:
+                await pubsub.aclose()
+                await conn.aclose()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
 
-            msg = await asyncio.wait_for(
-                pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0),
-                timeout=min(remaining, 5.0),
-            )
+    async def close(self) -> None:
+        """Stop the reader task (viewers see no further events)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+router = FlowEventRouter(settings.flow_event_buffer, settings.flow_event_drop_policy)
 
-            if msg is None:
-                # No message yet — send SSE keep-alive comment
-                yield ": keepalive\n\n"
-                continue
 
-            if msg["type"] != "message":
-                continue
+def _frame(entry_id: str, payload: str) -> str:
+    return f"id: {entry_id}\ndata: {payload}\n\n"
 
-            data: str = msg["data"]
-            yield f"data: {data}\n\n"
 
-            # Stop streaming after terminal events
+async def subscribe(session_id, last_event_id: str | None = None) -> AsyncGenerator[str, None]:
+    """Yield SSE frames for the flow events of *session_id*.
+
+    Starts with logged events after *last_event_id*, or with the running
+    turn's events when no ID is given, then streams live events.
+    Terminates on ``complete`` / ``error`` steps or after *SUBSCRIBE_TIMEOUT*.
+    The caller is responsible for closing the returned generator.
+    """
+    if last_event_id is not None and not _STREAM_ID_RE.match(last_event_id):
+        last_event_id = None
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + SUBSCRIBE_TIMEOUT
+    try:
+        # Register first so nothing published while the log is read is missed
+        async with router.listen(session_id) as viewer:
             try:
-                parsed = json.loads(data)
-                if parsed.get("step") in ("complete", "error"):
+                entries = await read_log(session_id, after=last_event_id)
+            except RedisError:
+                logger.warning("flow log replay failed for %s", session_id, exc_info=True)
+                entries = []
+            if last_event_id is None:
+                entries = _current_turn(entries)
+
+            seen = last_event_id
+            for entry_id, payload in entries:
+                yield _frame(entry_id, payload)
+                seen = entry_id
+                if _is_terminal(payload):
+                    return
+
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    logger.info("flow subscribe timeout for %s", session_id)
+                    break
+
+                try:
+                    message = await asyncio.wait_for(viewer.queue.get(), timeout=min(remaining, KEEPALIVE_INTERVAL))
+                except TimeoutError:
+                    # No message yet — send SSE keep-alive comment
+                    yield ": keepalive\n\n"
+                    continue
+
+                entry_id, payload = _split(message)
+                if seen is not None and _stream_id(entry_id) <= _stream_id(seen):
+                    continue  # already replayed from the log
+                yield _frame(entry_id, payload)
+
+                # Stop streaming after terminal events
+                if _is_terminal(payload):
                     break
-            except json.JSONDecodeError:
-                pass
 
-    except asyncio.TimeoutError:
-        logger.info("flow subscribe timeout (outer) for %s", session_id)
     except asyncio.CancelledError:
         logger.debug("flow subscribe cancelled for %s", session_id)
-    finally:
-        await pubsub.unsubscribe(channel)
-        await pubsub.close()
-        await conn.close()
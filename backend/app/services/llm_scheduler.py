@@ -0,0 +1,201 @@
+"""Admission control for OpenRouter calls, shared by every API and worker process.
+
+Each model has, in Redis:
+
+- a wait queue (sorted set) ordered by tier, then arrival — premium turns are
+  always ahead of free ones;
+- a lease set capping in-flight calls at ``settings.llm_max_concurrency``;
+- a token bucket for the model (``settings.llm_requests_per_minute``) and one
+  per tier (``settings.llm_tier_requests_per_minute``), so a free-tier burst
+  cannot spend the provider's rate limit on its own.
+
+A caller polls one Lua script that refills the buckets and admits it if it
+is near enough the head of the queue for the free slots and tokens.  While it
+waits, ``on_wait`` receives its queue position and an estimated wait.  A turn
+whose estimate exceeds its tier's ``settings.llm_tier_max_wait`` is shed
+with ``LLMOverloadedError``; the orchestrator then tries the fallback model
+or tells the user to come back later.  If Redis is unreachable calls are admitted unscheduled.
+"""
+
+import asyncio
+import logging
+import math
+import random
+import time
+import uuid
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+
+from redis.commands.core import AsyncScript
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.core.metrics import llm_queue_seconds
+from app.core.redis import get_redis
+from app.models.user import UserTier
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "llmsched"
+POLL_INTERVAL = 0.25  # seconds between admission attempts of a waiting call
+STALE_AFTER = 5  # seconds without a poll before a waiter is dropped from the queue
+LEASE_TTL = 180  # seconds a slot is held if its holder never releases it (> the 120s LLM timeout)
+KEY_TTL = 3600
+DEFAULT_CALL_SECONDS = 10.0
+TIER_PRIORITY = {UserTier.premium: 0, UserTier.free: 1}
+
+# KEYS: queue, seen, leases, model bucket, tier bucket
+# ARGV: ticket, queue score, model rate/s, model burst, tier rate/s, tier burst, max concurrency, lease ttl,
+#       stale after, key ttl
+# Returns {admitted, waiters ahead, free slots, model tokens, tier tokens}
+ADMIT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local ticket = ARGV[1]
+
+for _, waiter in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now - tonumber(ARGV[9]))) do
+  redis.call('ZREM', KEYS[1], waiter)
+  redis.call('ZREM', KEYS[2], waiter)
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', now)
+
+local function refill(key, rate, burst)
+  local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+  local tokens = tonumber(bucket[1]) or burst
+  local ts = tonumber(bucket[2]) or now
+  return math.min(burst, tokens + math.max(0, now - ts) * rate)
+end
+local model_tokens = refill(KEYS[4], tonumber(ARGV[3]), tonumber(ARGV[4]))
+local tier_tokens = refill(KEYS[5], tonumber(ARGV[5]), tonumber(ARGV[6]))
+
+redis.call('ZADD', KEYS[1], 'NX', ARGV[2], ticket)
+redis.call('ZADD', KEYS[2], now, ticket)
+for i = 1, 3 do redis.call('EXPIRE', KEYS[i], ARGV[10]) end
+
+local ahead = redis.call('ZRANK', KEYS[1], ticket)
+local free_slots = tonumber(ARGV[7]) - redis.call('ZCARD', KEYS[3])
+local admitted = 0
+if ahead < math.min(free_slots, math.floor(model_tokens)) and tier_tokens >= 1 then
+  redis.call('ZREM', KEYS[1], ticket)
+  redis.call('ZREM', KEYS[2], ticket)
+  redis.call('ZADD', KEYS[3], now + tonumber(ARGV[8]), ticket)
+  model_tokens = model_tokens - 1
+  tier_tokens = tier_tokens - 1
+  free_slots = free_slots - 1
+  admitted = 1
+end
+redis.call('HSET', KEYS[4], 'tokens', model_tokens, 'ts', now)
+redis.call('HSET', KEYS[5], 'tokens', tier_tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[4], ARGV[10])
+redis.call('EXPIRE', KEYS[5], ARGV[10])
+return {admitted, ahead, free_slots, tostring(model_tokens), tostring(tier_tokens)}
+"""
+
+_script: AsyncScript | None = None
+# Per-process moving average of call duration per model, for wait estimates
+call_seconds: dict[str, float] = {}
+
+
+class LLMOverloadedError(Exception):
+    """A call was turned away because its expected wait exceeds its tier's budget."""
+
+    def __init__(self, model: str, tier: UserTier, wait: float):
+        super().__init__(f"{model} is saturated for {tier.value} users (~{wait:.0f}s wait)")
+        self.model = model
+        self.tier = tier
+        self.wait = wait
+
+
+def _keys(model: str, tier: UserTier) -> list[str]:
+    base = f"{KEY_PREFIX}:{model}"
+    return [f"{base}:queue", f"{base}:seen", f"{base}:leases", f"{base}:bucket", f"{base}:bucket:{tier.value}"]
+
+
+def estimate_wait(
+    ahead: int, free_slots: int, model_tokens: float, tier_tokens: float, model: str, tier: UserTier
+) -> float:
+    """Seconds until a caller with *ahead* waiters in front of it should be admitted."""
+    needed = ahead + 1
+    model_rate = settings.llm_requests_per_minute / 60
+    tier_rate = settings.llm_tier_requests_per_minute[tier.value] / 60
+    waits = [max(0.0, needed - model_tokens) / model_rate, max(0.0, needed - tier_tokens) / tier_rate]
+    if needed > free_slots:
+        rounds = math.ceil((needed - max(free_slots, 0)) / settings.llm_max_concurrency)
+        waits.append(rounds * call_seconds.get(model, DEFAULT_CALL_SECONDS))
+    return max(waits)
+
+
+async def _acquire(r, model: str, tier: UserTier, ticket: str, on_wait: Callable[[int, float], None] | None) -> None:
+    global _script
+    if _script is None:
+        _script = r.register_script(ADMIT)
+    keys = _keys(model, tier)
+    score = TIER_PRIORITY[tier] * 1e13 + time.time() * 1000
+    args = [
+        ticket,
+        score,
+        settings.llm_requests_per_minute / 60,
+        settings.llm_burst,
+        settings.llm_tier_requests_per_minute[tier.value] / 60,
+        settings.llm_burst,
+        settings.llm_max_concurrency,
+        LEASE_TTL,
+        STALE_AFTER,
+        KEY_TTL,
+    ]
+    max_wait = settings.llm_tier_max_wait[tier.value]
+    started = time.monotonic()
+    reported = None
+    try:
+        while True:
+            admitted, ahead, free_slots, model_tokens, tier_tokens = await _script(keys=keys, args=args)
+            waited = time.monotonic() - started
+            if admitted:
+                llm_queue_seconds.labels(model, tier.value, "admitted").observe(waited)
+                return
+            wait = estimate_wait(ahead, free_slots, float(model_tokens), float(tier_tokens), model, tier)
+            if waited + wait > max_wait:
+                llm_queue_seconds.labels(model, tier.value, "shed").observe(waited)
+                raise LLMOverloadedError(model, tier, wait)
+            if on_wait is not None and (ahead, round(wait)) != reported:
+                reported = ahead, round(wait)
+                on_wait(ahead, wait)
+            await asyncio.sleep(POLL_INTERVAL * random.uniform(0.8, 1.2))
+    except BaseException:
+        # Leave the queue at once rather than blocking the callers behind until STALE_AFTER
+        await r.zrem(keys[0], ticket)
+        raise
+
+
+@asynccontextmanager
+async def admit(model: str, tier: UserTier, on_wait: Callable[[int, float], None] | None = None) -> AsyncIterator[None]:
+    """Wait for a slot to call *model* on behalf of a *tier* user and hold it for the block.
+
+    ``on_wait(waiters_ahead, estimated_seconds)`` is called whenever either
+    changes while queued.  Raises ``LLMOverloadedError`` if the wait would
+    exceed the tier's budget.
+    """
+    if not settings.llm_scheduler_enabled:
+        yield
+        return
+
+    ticket = uuid.uuid4().hex
+    r = None
+    try:
+        r = await get_redis()
+        await _acquire(r, model, tier, ticket, on_wait)
+    except RedisError:
+        logger.warning("LLM scheduler unavailable; calling %s unscheduled", model, exc_info=True)
+        r = None
+
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        elapsed = time.monotonic() - start
+        call_seconds[model] = 0.8 * call_seconds.get(model, elapsed) + 0.2 * elapsed
+        if r is not None:
+            try:
+                await r.zrem(_keys(model, tier)[2], ticket)
+            except RedisError:
+                logger.debug("LLM slot release failed; it expires after %ds", LEASE_TTL, exc_info=True)
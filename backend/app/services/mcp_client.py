@@ -1,7 +1,10 @@
 """Lightweight async MCP client using httpx.
 
 Implements the MCP streamable-http protocol (initialize → notify → tools/call)
-for calling MCP server tools from the backend orchestrator.
+for calling MCP server tools from the backend orchestrator.  Calls to the same
+server are sent together as one JSON-RPC batch to its ``/mcp/batch`` route
+(one request instead of three per call); servers without that route fall back
+to one session per call.
 
 Uses httpx (already a backend dependency) — no new packages required.
 """
@@ -9,14 +12,23 @@ Uses httpx (already a backend dependency) — no new packages required.
 import asyncio
 import json
 import logging
+import time
 
 import httpx
 
+from app.core.metrics import mcp_call_seconds
+from app.core.tracing import inject, span, traced
+
 logger = logging.getLogger(__name__)
 
 # JSON-RPC id counter (module-level, not critical to be thread-safe for our use)
 _next_id = 0
 
+# Servers that answered 404/405 on /mcp/batch (older builds), mapped to when batching is next tried;
+# retried periodically so an upgraded or restarted server is batched again
+UNBATCHED_RETRY_SECONDS = 300
+_unbatched: dict[str, float] = {}
+
 
 def _rpc_id() -> int:
     global _next_id
@@ -46,6 +58,26 @@ def _parse_sse_result(text: str) -> dict | None:
     return None
 
 
+def _decode_tool_result(result: dict | None, base_url: str, tool_name: str) -> dict | None:
+    """Unwrap a tools/call result; tool-side errors (isError) become None."""
+    if result and result.get("isError"):
+        logger.warning("MCP tool error: %s/%s: %s", base_url, tool_name, result.get("content"))
+        return None
+    if result and "content" in result:
+        # MCP tools/call wraps the return value in content[].text
+        for item in result["content"]:
+            if item.get("type") == "text":
+                try:
+                    return json.loads(item["text"])
+                except (json.JSONDecodeError, TypeError):
+                    return {"raw": item["text"]}
+    return result
+
+
+def _observe(base_url: str, tool_name: str, ok: bool, seconds: float) -> None:
+    mcp_call_seconds.labels(base_url, tool_name, "ok" if ok else "error").observe(seconds)
+
+
 async def call_mcp_tool(
     base_url: str,
     tool_name: str,
@@ -56,75 +88,129 @@ async def call_mcp_tool(
     Lifecycle: initialize → notifications/initialized → tools/call.
     Returns the tool result dict, or None on any failure.
     """
-    mcp_url = f"{base_url}/mcp"
-    headers = {"Content-Type": "application/json", "Accept": "application/json, text/event-stream"}
+    with span("mcp.call_tool", server=base_url, tool=tool_name) as s:
+        mcp_url = f"{base_url}/mcp"
+        headers = inject({"Content-Type": "application/json", "Accept": "application/json, text/event-stream"})
+        result = None
+        start = time.perf_counter()
 
-    try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            # 1) Initialize
-            init_resp = await client.post(
-                mcp_url,
-                headers=headers,
-                json={
-                    "jsonrpc": "2.0",
-                    "id": _rpc_id(),
-                    "method": "initialize",
-                    "params": {
-                        "protocolVersion": "2025-03-26",
-                        "capabilities": {},
-                        "clientInfo": {"name": "trip-backend", "version": "1.0.0"},
+        try:
+            async with httpx.AsyncClient(timeout=15.0) as client:
+                # 1) Initialize
+                init_resp = await client.post(
+                    mcp_url,
+                    headers=headers,
+                    json={
+                        "jsonrpc": "2.0",
+                        "id": _rpc_id(),
+                        "method": "initialize",
+                        "params": {
+                            "protocolVersion": "2025-03-26",
+                            "capabilities": {},
+                            "clientInfo": {"name": "trip-backend", "version": "1.0.0"},
+                        },
+                    },
+                )
+                session_id = init_resp.headers.get("mcp-session-id")
+                if session_id:
+                    headers["Mcp-Session-Id"] = session_id
+
+                # 2) Notify initialized (fire-and-forget, no id field)
+                await client.post(
+                    mcp_url,
+                    headers=headers,
+                    json={
+                        "jsonrpc": "2.0",
+                        "method": "notifications/initialized",
                     },
-                },
-            )
-            session_id = init_resp.headers.get("mcp-session-id")
-            if session_id:
-                headers["Mcp-Session-Id"] = session_id
-
-            # 2) Notify initialized (fire-and-forget, no id field)
-            await client.post(
-                mcp_url,
-                headers=headers,
-                json={
-                    "jsonrpc": "2.0",
-                    "method": "notifications/initialized",
-                },
-            )
-
-            # 3) Call the tool
-            call_resp = await client.post(
-                mcp_url,
-                headers=headers,
-                json={
-                    "jsonrpc": "2.0",
-                    "id": _rpc_id(),
-                    "method": "tools/call",
-                    "params": {
-                        "name": tool_name,
-                        "arguments": arguments or {},
+                )
+
+                # 3) Call the tool
+                call_resp = await client.post(
+                    mcp_url,
+                    headers=headers,
+                    json={
+                        "jsonrpc": "2.0",
+                        "id": _rpc_id(),
+                        "method": "tools/call",
+                        "params": {
+                            "name": tool_name,
+                            "arguments": arguments or {},
+                        },
                     },
-                },
-            )
-
-            result = _parse_sse_result(call_resp.text)
-            if result and "content" in result:
-                # MCP tools/call wraps the return value in content[].text
-                for item in result["content"]:
-                    if item.get("type") == "text":
-                        try:
-                            return json.loads(item["text"])
-                        except (json.JSONDecodeError, TypeError):
-                            return {"raw": item["text"]}
-            return result
+                )
 
-    except Exception:
-        logger.warning("MCP call failed: %s/%s", base_url, tool_name, exc_info=True)
-        return None
+                result = _decode_tool_result(_parse_sse_result(call_resp.text), base_url, tool_name)
+                if result is None:
+                    s.fail("no result")
+                return result
+
+        except Exception:
+            logger.warning("MCP call failed: %s/%s", base_url, tool_name, exc_info=True)
+            s.fail("request failed")
+            return None
+        finally:
+            _observe(base_url, tool_name, result is not None, time.perf_counter() - start)
 
 
+async def call_mcp_tools_batch(
+    base_url: str,
+    calls: list[tuple[str, dict]],
+) -> list[dict | None]:
+    """Call several tools on one MCP server in a single JSON-RPC batch request.
+
+    Each element is (tool_name, arguments).  Returns results in the same order;
+    items that fail return None without affecting the others.  Falls back to
+    one ``call_mcp_tool`` per item if the server has no batch route.
+    """
+    if _unbatched.get(base_url, 0.0) > time.monotonic():
+        return list(await asyncio.gather(*(call_mcp_tool(base_url, name, args) for name, args in calls)))
+
+    requests = [
+        {
+            "jsonrpc": "2.0",
+            "id": _rpc_id(),
+            "method": "tools/call",
+            "params": {"name": name, "arguments": args or {}},
+        }
+        for name, args in calls
+    ]
+    start = time.perf_counter()
+    try:
+        with span("mcp.call_batch", server=base_url, calls=len(calls)):
+            async with httpx.AsyncClient(timeout=15.0) as client:
+                resp = await client.post(f"{base_url}/mcp/batch", json=requests, headers=inject({}))
+        if resp.status_code in (404, 405):
+            logger.info("MCP server %s has no batch route; calling tools one by one", base_url)
+            _unbatched[base_url] = time.monotonic() + UNBATCHED_RETRY_SECONDS
+            return await call_mcp_tools_batch(base_url, calls)
+        resp.raise_for_status()
+        by_id = {msg.get("id"): msg for msg in resp.json() if isinstance(msg, dict)}
+    except Exception:
+        logger.warning("MCP batch call failed: %s (%d calls)", base_url, len(calls), exc_info=True)
+        elapsed = time.perf_counter() - start
+        for name, _ in calls:
+            _observe(base_url, name, False, elapsed)
+        return [None] * len(calls)
+
+    elapsed = time.perf_counter() - start
+    results = []
+    for request, (name, _) in zip(requests, calls, strict=True):
+        msg = by_id.get(request["id"], {})
+        if "error" in msg or "result" not in msg:
+            logger.warning("MCP call failed: %s/%s: %s", base_url, name, msg.get("error", "no response"))
+            results.append(None)
+        else:
+            results.append(_decode_tool_result(msg["result"], base_url, name))
+        _observe(base_url, name, results[-1] is not None, elapsed)
+    return results
+
+
+@traced("mcp.enrichment")
 async def call_mcp_tools_parallel(
     calls: list[tuple[str, str, dict]],
 ) -> list[dict | None]:
-    """Call multiple MCP tools in parallel.
+    """Call multiple MCP tools in parallel, one batch request per server.
 
     Each element is (base_url, tool_name, arguments).
     Returns results in the same order. Failed calls return None.
@@ -132,5 +218,15 @@ async def call_mcp_tools_parallel(
     if not calls:
         return []
 
-    tasks = [call_mcp_tool(url, name, args) for url, name, args in calls]
-    return list(await asyncio.gather(*tasks))
+    by_server: dict[str, list[int]] = {}
+    for i, (url, _, _) in enumerate(calls):
+        by_server.setdefault(url, []).append(i)
+
+    batches = await asyncio.gather(
+        *(call_mcp_tools_batch(url, [calls[i][1:] for i in indices]) for url, indices in by_server.items())
+    )
+    results: list[dict | None] = [None] * len(calls)
+    for indices, batch in zip(by_server.values(), batches, strict=True):
+        for i, result in zip(indices, batch, strict=True):
+            results[i] = result
+    return results
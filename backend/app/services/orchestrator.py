@@ -11,11 +11,17 @@ import json
 import logging
 import os
 import re
+import time
 import uuid
+from datetime import date
 
 import httpx
 
 from app.config import settings
+from app.core.metrics import llm_request_seconds, record_llm_usage
+from app.core.tracing import span, traced
+from app.models.user import UserTier
+from app.services import llm_scheduler
 from app.services.flow_events import emit as flow_emit
 from app.services.mcp_client import call_mcp_tools_parallel
 
@@ -183,6 +189,7 @@ _CHILDREN_RE = re.compile(r"(?:小孩|孩子|兒童|children?|kids?)\D*(\d+)\s*(
 _DATE_RE = re.compile(r"(\d{4})[/\-.](\d{1,2})[/\-.](\d{1,2})")
 
 
+@traced("orchestrator.extract_slots")
 def _extract_slots_from_message(user_message: str) -> dict:
     """Extract slots from the raw user message using pattern matching.
 
@@ -275,33 +282,45 @@ def _missing_fields(slots: dict | None) -> list[str]:
 
 async def _call_llm(client: httpx.AsyncClient, model: str, messages: list[dict]) -> str | None:
     """Call OpenRouter with a specific model. Returns content or None on failure."""
-    try:
-        resp = await client.post(
-            f"{settings.openrouter_base_url}/chat/completions",
-            headers={
-                "Authorization": f"Bearer {settings.openrouter_api_key}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": model,
-                "messages": messages,
-                "temperature": 0.7,
-                "max_tokens": 4000,
-            },
-        )
-        if resp.status_code != 200:
-            logger.warning("LLM %s returned %d: %s", model, resp.status_code, resp.text[:200])
+    start = time.perf_counter()
+    outcome = "error"
+    with span("llm.call", model=model) as s:
+        try:
+            resp = await client.post(
+                f"{settings.openrouter_base_url}/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {settings.openrouter_api_key}",
+                    "Content-Type": "application/json",
+                },
+                json={
+                    "model": model,
+                    "messages": messages,
+                    "temperature": 0.7,
+                    "max_tokens": 4000,
+                },
+            )
+            s.set("status_code", resp.status_code)
+            if resp.status_code != 200:
+                logger.warning("LLM %s returned %d: %s", model, resp.status_code, resp.text[:200])
+                s.fail(f"HTTP {resp.status_code}")
+                return None
+
+            result = resp.json()
+            record_llm_usage(model, result.get("usage"))
+            content = result["choices"][0]["message"]["content"]
+            outcome = "ok"
+            return content
+
+        except (KeyError, IndexError) as e:
+            logger.warning("LLM %s response parse error: %s", model, e)
+            s.fail("parse error")
             return None
-
-        result = resp.json()
-        return result["choices"][0]["message"]["content"]
-
-    except (KeyError, IndexError) as e:
-        logger.warning("LLM %s response parse error: %s", model, e)
-        return None
-    except httpx.HTTPError as e:
-        logger.warning("LLM %s HTTP error: %s", model, e)
-        return None
+        except httpx.HTTPError as e:
+            logger.warning("LLM %s HTTP error: %s", model, e)
+            s.fail(type(e).__name__)
+            return None
+        finally:
+            llm_request_seconds.labels(model, outcome).observe(time.perf_counter() - start)
 
 
 # ---------------------------------------------------------------------------
@@ -367,13 +386,18 @@ def _select_mcp_calls(slots: dict) -> list[tuple[str, str, dict]]:
     # Utility tools — always include when destination is known
     if dest:
         target_currency = "JPY" if dest in ("japan", "tokyo", "kyoto", "osaka", "hokkaido") else "TWD"
-        calls.append(
-            (
-                settings.mcp_utilities_url,
-                "convert_currency",
-                {"amount": 1000, "from_currency": "USD", "to_currency": target_currency},
-            )
-        )
+        # Convert the traveller's own budget (total and per day) rather than a placeholder amount
+        amounts = [1000]
+        if slots.get("budget_usd"):
+            amounts = [slots["budget_usd"], round(slots["budget_usd"] / max(duration, 1), 2)]
+        conversion = {"amounts": amounts, "to_currencies": [target_currency], "from_currency": "USD"}
+        if start_date := slots.get("start_date"):
+            try:
+                # Slots come from the LLM; an impossible date would fail the whole conversion
+                conversion["date"] = date.fromisoformat(start_date).isoformat()
+            except (TypeError, ValueError):
+                logger.debug("ignoring invalid start_date %r for currency conversion", start_date)
+        calls.append((settings.mcp_utilities_url, "convert_currency_bulk", conversion))
         country = "Japan" if target_currency == "JPY" else "Taiwan"
         calls.append(
             (
@@ -443,6 +467,7 @@ def _build_user_prompt(user_message: str, intent_slots: dict | None, mcp_context
 _LINK_MAX_CONCURRENCY = min(os.cpu_count() or 4, 16) * 2
 
 
+@traced("orchestrator.validate_links")
 async def _validate_links(content: str) -> str:
     """Validate URLs in markdown content. Remove dead links.
 
@@ -473,17 +498,23 @@ async def _validate_links(content: str) -> str:
     ) as client:
         results = await asyncio.gather(*[check_url(client, u) for u in urls])
 
-    dead_urls = {url for url, ok in results if not ok}
+    return _strip_dead_links(content, {url for url, ok in results if not ok})
+
+
+def _strip_dead_links(content: str, dead_urls: set[str]) -> str:
+    """Remove reference lines citing *dead_urls* and unlink inline links to them.
 
+    All dead URLs go into one alternation, so the content is scanned twice in
+    total instead of twice per dead URL.
+    """
     if not dead_urls:
         return content
 
-    for url in dead_urls:
-        # Remove lines containing dead URLs from References section
-        content = re.sub(rf"\n\[?\d*\]?:?\s*{re.escape(url)}[^\n]*", "", content)
-        # Convert inline dead links to plain text: [text](url) → text
-        content = re.sub(rf"\[([^\]]+)\]\({re.escape(url)}\)", r"\1", content)
-
+    urls = "|".join(re.escape(url) for url in sorted(dead_urls, key=len, reverse=True))
+    # Remove lines containing dead URLs from References section
+    content = re.sub(rf"\n\[?\d*\]?:?\s*(?:{urls})[^\n]*", "", content)
+    # Convert inline dead links to plain text: [text](url) → text
+    content = re.sub(rf"\[([^\]]+)\]\((?:{urls})\)", r"\1", content)
     return content.strip()
 
 
@@ -492,9 +523,9 @@ async def _validate_links(content: str) -> str:
 # ---------------------------------------------------------------------------
 
 
-async def _emit(session_id, **kwargs) -> None:
+def _emit(session_id, **kwargs) -> None:
     try:
-        await flow_emit(session_id, **kwargs)
+        flow_emit(session_id, **kwargs)
     except Exception:
         logger.debug("flow_emit failed (non-critical)", exc_info=True)
 
@@ -504,11 +535,14 @@ async def _emit(session_id, **kwargs) -> None:
 # ---------------------------------------------------------------------------
 
 
+@traced("orchestrator.process_user_message")
 async def process_user_message(
     session_id: uuid.UUID,
     user_message: str,
     intent_slots: dict | None,
     locale: str = "en",
+    emit_complete: bool = True,
+    tier: UserTier = UserTier.free,
 ) -> tuple[str, dict]:
     """Process a chat message and return (visible_reply, updated_slots).
 
@@ -518,11 +552,14 @@ async def process_user_message(
     Both are merged into the accumulated slots.
 
     The caller is responsible for persisting the updated slots to the DB.
+    With ``emit_complete=False`` the terminal ``complete`` flow event is left
+    to the caller, which can then announce the reply once it is persisted.
+    LLM calls are admitted by ``llm_scheduler`` according to the user's *tier*.
     """
-    await _emit(session_id, step="received", status="active", message="Message received")
+    _emit(session_id, step="received", status="active", message="Message received")
 
     # Layer 1: rule-based extraction from user message (reliable)
-    await _emit(
+    _emit(
         session_id,
         step="intent_parsing",
         crew="intent",
@@ -532,7 +569,7 @@ async def process_user_message(
     regex_slots = _extract_slots_from_message(user_message)
     merged = _merge_slots(intent_slots, regex_slots)
     logger.info("Regex extraction: %s | after merge: %s", regex_slots, merged)
-    await _emit(
+    _emit(
         session_id,
         step="intent_parsing",
         crew="intent",
@@ -542,7 +579,7 @@ async def process_user_message(
     )
 
     # Check completeness → routing decision
-    await _emit(
+    _emit(
         session_id,
         step="routing",
         crew="router",
@@ -551,7 +588,7 @@ async def process_user_message(
     )
     dest = merged.get("destination")
     dest_crew = dest if dest in ("japan", "taiwan") else None
-    await _emit(
+    _emit(
         session_id,
         step="routing",
         crew="router",
@@ -564,7 +601,7 @@ async def process_user_message(
     mcp_context = ""
     if dest and slots_complete(merged):
         try:
-            await _emit(
+            _emit(
                 session_id,
                 step="mcp_enrichment",
                 crew="mcp",
@@ -576,7 +613,7 @@ async def process_user_message(
             mcp_context = _format_mcp_context(mcp_results, mcp_calls)
             successful = sum(1 for r in mcp_results if r is not None)
             logger.info("MCP enrichment: %d calls, %d successful", len(mcp_calls), successful)
-            await _emit(
+            _emit(
                 session_id,
                 step="mcp_enrichment",
                 crew="mcp",
@@ -585,7 +622,7 @@ async def process_user_message(
             )
         except Exception:
             logger.warning("MCP enrichment failed, continuing without", exc_info=True)
-            await _emit(
+            _emit(
                 session_id,
                 step="mcp_enrichment",
                 crew="mcp",
@@ -609,7 +646,7 @@ async def process_user_message(
 
     # LLM call → planning phase
     planning_crew = dest_crew or "japan"
-    await _emit(
+    _emit(
         session_id,
         step="planning",
         crew=planning_crew,
@@ -617,13 +654,30 @@ async def process_user_message(
         message="Waiting for LLM response",
     )
 
+    def report_wait(ahead: int, wait: float) -> None:
+        _emit(
+            session_id,
+            step="queued",
+            crew=planning_crew,
+            status="waiting",
+            message=f"{ahead} requests ahead, about {wait:.0f}s",
+            result={"ahead": ahead, "wait_s": round(wait, 1)},
+        )
+
+    shed: llm_scheduler.LLMOverloadedError | None = None
     async with httpx.AsyncClient(timeout=120.0) as client:
         for model in LLM_MODELS:
             logger.info("Trying model: %s for session %s", model, session_id)
-            content = await _call_llm(client, model, messages)
+            try:
+                async with llm_scheduler.admit(model, tier, on_wait=report_wait):
+                    content = await _call_llm(client, model, messages)
+            except llm_scheduler.LLMOverloadedError as e:
+                logger.warning("%s; trying the next model", e)
+                shed = e
+                continue
             if content:
                 logger.info("Success with model: %s", model)
-                await _emit(
+                _emit(
                     session_id,
                     step="planning",
                     crew=planning_crew,
@@ -632,7 +686,7 @@ async def process_user_message(
                 )
 
                 # Layer 2: LLM SLOTS_JSON (bonus) → post-processing
-                await _emit(
+                _emit(
                     session_id,
                     step="post_processing",
                     crew=["booking", "advisory"],
@@ -643,7 +697,7 @@ async def process_user_message(
                 if llm_slots:
                     merged = _merge_slots(merged, llm_slots)
                     logger.info("LLM slots: %s | final: %s", llm_slots, merged)
-                await _emit(
+                _emit(
                     session_id,
                     step="post_processing",
                     crew=["booking", "advisory"],
@@ -653,7 +707,7 @@ async def process_user_message(
                 )
 
                 # Link validation
-                await _emit(
+                _emit(
                     session_id,
                     step="link_validation",
                     crew="link_validator",
@@ -661,7 +715,7 @@ async def process_user_message(
                     message="Validating links",
                 )
                 visible = await _validate_links(visible)
-                await _emit(
+                _emit(
                     session_id,
                     step="link_validation",
                     crew="link_validator",
@@ -675,7 +729,7 @@ async def process_user_message(
                     slots_complete(merged),
                 )
 
-                await _emit(
+                _emit(
                     session_id,
                     step="synthesizing",
                     crew="synthesis",
@@ -683,14 +737,23 @@ async def process_user_message(
                     slots=merged,
                     message="Response ready",
                 )
-                await _emit(session_id, step="complete", status="done", slots=merged, message="All done")
+                if emit_complete:
+                    _emit(session_id, step="complete", status="done", slots=merged, message="All done")
                 return visible, merged
 
-    await _emit(
-        session_id,
-        step="complete",
-        status="error",
-        slots=merged,
-        message="All LLM models unavailable",
-    )
+    if shed is not None:
+        if emit_complete:
+            _emit(session_id, step="complete", status="error", slots=merged, message="LLM capacity exhausted")
+        return (
+            f"We're handling a lot of requests right now. Please try again in about {max(shed.wait, 10):.0f} seconds."
+        ), merged
+
+    if emit_complete:
+        _emit(
+            session_id,
+            step="complete",
+            status="error",
+            slots=merged,
+            message="All LLM models unavailable",
+        )
     return ("I'm sorry, all AI models are currently unavailable. Please try again in a few minutes."), merged
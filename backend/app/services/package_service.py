@@ -1,36 +1,176 @@
-from sqlalchemy import select
+import uuid
+
+from sqlalchemy import Float, and_, cast, delete, func, literal, literal_column, null, select, true, tuple_, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.config import settings
 from app.core.exceptions import NotFoundError
-from app.models.package import PackageDay, PackageTag, TravelPackage
+from app.models.embedding import TravelEmbedding
+from app.models.package import PackageDay, PackageLocalized, PackageTag, TravelPackage
+from app.services.embedding_service import set_search_params
+from app.services.search_text import index_terms, parse_query, query_terms, to_tsquery_text
+
+DEFAULT_LOCALE = "en"
+PROJECTION_LOCK_ID = 0x7061636B  # pg advisory lock held while projections are rebuilt
 
 # Fields that can be translated on each model
 _PACKAGE_I18N_FIELDS = ("title", "summary", "description", "highlights")
 _DAY_I18N_FIELDS = ("title", "description")
 _TAG_I18N_FIELDS = ("tag",)
 
+# Facet bands: (label, lower bound inclusive, upper bound exclusive or None)
+PRICE_BANDS: tuple[tuple[str, float, float | None], ...] = (
+    ("under_1000", 0, 1000),
+    ("1000_2000", 1000, 2000),
+    ("2000_3000", 2000, 3000),
+    ("3000_plus", 3000, None),
+)
+DURATION_BANDS: tuple[tuple[str, int, int | None], ...] = (
+    ("1_3", 0, 4),
+    ("4_6", 4, 7),
+    ("7_plus", 7, None),
+)
+_FACET_FIELDS = ("destination", "category", "price_band", "duration_band")
+
+# Must match the ix_package_localized_search expression for the GIN index to be used
+SEARCH_VECTOR = func.to_tsvector(literal_column("'simple'"), PackageLocalized.search_text)
+_RANK_SOURCES = ("lexical", "vector")
+HNSW_MAX_EF_SEARCH = 1000  # pgvector's upper limit for hnsw.ef_search
+
+
+def _band(value: float, bands: tuple[tuple[str, float, float | None], ...]) -> str:
+    for label, low, high in bands:
+        if value >= low and (high is None or value < high):
+            return label
+    return bands[-1][0]
 
-def _apply_locale(
+
+def _localized_fields(
     obj: TravelPackage | PackageDay | PackageTag,
-    locale: str | None,
+    locale: str,
     fields: tuple[str, ...],
-) -> None:
-    """Overlay translated values onto a model instance (mutates in-place).
+) -> dict:
+    """Return *fields* of a model instance with translations overlaid.
 
-    If *locale* is None or "en", no-op (English is the base language).
-    For any other locale, look up ``obj.translations[locale][field]`` and
-    overwrite the base field when a translation exists.
+    English is the base language; for any other locale, values from
+    ``obj.translations[locale][field]`` win when present.  The instance
+    itself is never modified.
     """
-    if not locale or locale == "en":
-        return
-    translations = getattr(obj, "translations", None)
-    if not translations or locale not in translations:
-        return
-    locale_data: dict = translations[locale]
+    values = {field: getattr(obj, field) for field in fields}
+    if locale == DEFAULT_LOCALE:
+        return values
+    locale_data: dict = (obj.translations or {}).get(locale) or {}
     for field in fields:
         if field in locale_data:
-            setattr(obj, field, locale_data[field])
+            values[field] = locale_data[field]
+    return values
+
+
+def _resolve_locale(locale: str | None) -> str:
+    """Map a requested locale onto one that has a projection."""
+    if locale and locale in settings.package_locales:
+        return locale
+    return DEFAULT_LOCALE
+
+
+def build_projection(package: TravelPackage, locale: str) -> PackageLocalized:
+    """Render one package (with days and tags loaded) for *locale*."""
+    text = _localized_fields(package, locale, _PACKAGE_I18N_FIELDS)
+    listing = {
+        "id": str(package.id),
+        "title": text["title"],
+        "slug": package.slug,
+        "destination": package.destination,
+        "category": package.category,
+        "summary": text["summary"],
+        "duration_days": package.duration_days,
+        "price_usd": package.price_usd,
+        "cover_image_url": package.cover_image_url,
+        "highlights": text["highlights"],
+    }
+    detail = {
+        **listing,
+        "description": text["description"],
+        "is_published": package.is_published,
+        "created_at": package.created_at.isoformat() if package.created_at else None,
+        "days": [
+            {
+                "id": str(day.id),
+                "day_number": day.day_number,
+                "activities": day.activities,
+                **_localized_fields(day, locale, _DAY_I18N_FIELDS),
+            }
+            for day in sorted(package.days, key=lambda d: d.day_number)
+        ],
+        "tags": [{"id": str(tag.id), **_localized_fields(tag, locale, _TAG_I18N_FIELDS)} for tag in package.tags],
+    }
+    search_parts = [package.destination, package.category, text["title"], text["summary"], text["description"]]
+    search_parts += [*(text["highlights"] or []), *(day["title"] for day in detail["days"])]
+    search_parts += [tag["tag"] for tag in detail["tags"]]
+    if locale != DEFAULT_LOCALE:
+        # English text too, so "snorkeling" still finds a zh listing
+        search_parts += [package.title, package.summary, *(package.highlights or []), *(t.tag for t in package.tags)]
+    search_text = " ".join(index_terms(" ".join(part for part in search_parts if part)))
+
+    return PackageLocalized(
+        package_id=package.id,
+        locale=locale,
+        slug=package.slug,
+        destination=package.destination,
+        category=package.category,
+        duration_days=package.duration_days,
+        price_usd=package.price_usd,
+        price_band=_band(package.price_usd, PRICE_BANDS),
+        duration_band=_band(package.duration_days, DURATION_BANDS),
+        is_published=package.is_published,
+        created_at=package.created_at,
+        search_text=search_text,
+        listing=listing,
+        detail=detail,
+    )
+
+
+async def refresh_localized_packages(
+    db: AsyncSession,
+    package_ids: list[uuid.UUID] | None = None,
+) -> int:
+    """Rebuild per-locale projections for *package_ids* (or the whole catalog).
+
+    Call after seeding or editing packages.  Returns the number of rows written.
+    """
+    # Serialize concurrent rebuilds (a seed script and a starting API) so their deletes and inserts don't interleave
+    await db.execute(select(func.pg_advisory_xact_lock(PROJECTION_LOCK_ID)))
+    stmt = select(TravelPackage).options(selectinload(TravelPackage.days), selectinload(TravelPackage.tags))
+    clear = delete(PackageLocalized)
+    if package_ids is not None:
+        stmt = stmt.where(TravelPackage.id.in_(package_ids))
+        clear = clear.where(PackageLocalized.package_id.in_(package_ids))
+
+    packages = (await db.execute(stmt)).scalars().all()
+    await db.execute(clear)
+    rows = [build_projection(pkg, locale) for pkg in packages for locale in settings.package_locales]
+    db.add_all(rows)
+    await db.commit()
+    return len(rows)
+
+
+async def refresh_missing_projections(db: AsyncSession) -> int:
+    """Build projections for packages lacking one in any of ``settings.package_locales``.
+
+    Run at startup, so a catalog seeded without a refresh or a newly added
+    locale is served without waiting for ``scripts.refresh_package_projections``.
+    """
+    complete = (
+        select(PackageLocalized.package_id)
+        .where(PackageLocalized.locale.in_(settings.package_locales))
+        .group_by(PackageLocalized.package_id)
+        .having(func.count() == len(set(settings.package_locales)))
+    )
+    missing = (await db.execute(select(TravelPackage.id).where(TravelPackage.id.not_in(complete)))).scalars().all()
+    if not missing:
+        return 0
+    return await refresh_localized_packages(db, list(missing))
 
 
 async def list_packages(
@@ -44,49 +184,269 @@ async def list_packages(
     limit: int = 20,
     offset: int = 0,
     locale: str | None = None,
-) -> list[TravelPackage]:
-    stmt = select(TravelPackage).where(TravelPackage.is_published.is_(True))
+) -> list[dict]:
+    stmt = select(PackageLocalized.listing).where(
+        PackageLocalized.locale == _resolve_locale(locale),
+        PackageLocalized.is_published.is_(True),
+    )
 
     if destination:
-        stmt = stmt.where(TravelPackage.destination == destination)
+        stmt = stmt.where(PackageLocalized.destination == destination)
     if category:
-        stmt = stmt.where(TravelPackage.category == category)
+        stmt = stmt.where(PackageLocalized.category == category)
     if min_price is not None:
-        stmt = stmt.where(TravelPackage.price_usd >= min_price)
+        stmt = stmt.where(PackageLocalized.price_usd >= min_price)
     if max_price is not None:
-        stmt = stmt.where(TravelPackage.price_usd <= max_price)
+        stmt = stmt.where(PackageLocalized.price_usd <= max_price)
     if min_duration is not None:
-        stmt = stmt.where(TravelPackage.duration_days >= min_duration)
+        stmt = stmt.where(PackageLocalized.duration_days >= min_duration)
     if max_duration is not None:
-        stmt = stmt.where(TravelPackage.duration_days <= max_duration)
+        stmt = stmt.where(PackageLocalized.duration_days <= max_duration)
 
-    stmt = stmt.order_by(TravelPackage.created_at.desc()).offset(offset).limit(limit)
+    stmt = stmt.order_by(PackageLocalized.created_at.desc()).offset(offset).limit(limit)
     result = await db.execute(stmt)
-    packages = list(result.scalars().all())
-    for pkg in packages:
-        _apply_locale(pkg, locale, _PACKAGE_I18N_FIELDS)
-    return packages
+    return list(result.scalars().all())
+
+
+def _facet_filters(
+    destination: str | None,
+    category: str | None,
+    price_band: str | None,
+    duration_band: str | None,
+) -> dict:
+    return {
+        "destination": PackageLocalized.destination == destination if destination else None,
+        "category": PackageLocalized.category == category if category else None,
+        "price_band": PackageLocalized.price_band == price_band if price_band else None,
+        "duration_band": PackageLocalized.duration_band == duration_band if duration_band else None,
+    }
+
+
+def _range_filters(
+    min_price: float | None,
+    max_price: float | None,
+    min_duration: int | None,
+    max_duration: int | None,
+) -> list:
+    clauses = []
+    if min_price is not None:
+        clauses.append(PackageLocalized.price_usd >= min_price)
+    if max_price is not None:
+        clauses.append(PackageLocalized.price_usd <= max_price)
+    if min_duration is not None:
+        clauses.append(PackageLocalized.duration_days >= min_duration)
+    if max_duration is not None:
+        clauses.append(PackageLocalized.duration_days <= max_duration)
+    return clauses
+
+
+async def search_packages(
+    db: AsyncSession,
+    destination: str | None = None,
+    category: str | None = None,
+    price_band: str | None = None,
+    duration_band: str | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    min_duration: int | None = None,
+    max_duration: int | None = None,
+    limit: int = 20,
+    offset: int = 0,
+    locale: str | None = None,
+) -> dict:
+    """List packages together with facet counts for the catalog filters.
+
+    Facets are disjunctive: each facet's counts apply every active filter
+    *except* its own, so the UI can offer the alternatives for a selected
+    value.  All four facets plus the total come from one GROUPING SETS scan.
+    """
+    base = and_(PackageLocalized.locale == _resolve_locale(locale), PackageLocalized.is_published.is_(True))
+
+    facet_filters = _facet_filters(destination, category, price_band, duration_band)
+    range_filters = _range_filters(min_price, max_price, min_duration, max_duration)
+
+    def _filters(exclude: str | None = None) -> list:
+        clauses = [c for name, c in facet_filters.items() if c is not None and name != exclude]
+        return clauses + range_filters
+
+    # Page of results with every filter applied
+    stmt = (
+        select(PackageLocalized.listing)
+        .where(base, *_filters())
+        .order_by(PackageLocalized.created_at.desc())
+        .offset(offset)
+        .limit(limit)
+    )
+    results = list((await db.execute(stmt)).scalars().all())
+
+    # Facet counts + total in a single grouped scan
+    columns = [getattr(PackageLocalized, name) for name in _FACET_FIELDS]
+    facet_stmt = (
+        select(
+            *columns,
+            *[func.grouping(col).label(f"g_{name}") for name, col in zip(_FACET_FIELDS, columns)],
+            *[func.count().filter(and_(true(), *_filters(name))).label(f"n_{name}") for name in _FACET_FIELDS],
+            func.count().filter(and_(true(), *_filters())).label("n_total"),
+        )
+        .where(base)
+        .group_by(func.grouping_sets(*[tuple_(col) for col in columns], tuple_()))
+    )
+    facets: dict[str, list[dict]] = {name: [] for name in _FACET_FIELDS}
+    total = 0
+    for row in (await db.execute(facet_stmt)).mappings():
+        grouped = [name for name in _FACET_FIELDS if row[f"g_{name}"] == 0]
+        if not grouped:
+            total = row["n_total"]
+            continue
+        name = grouped[0]
+        if row[f"n_{name}"]:
+            facets[name].append({"value": row[name], "count": row[f"n_{name}"]})
+
+    for name in ("destination", "category"):
+        facets[name].sort(key=lambda f: (-f["count"], f["value"]))
+    for name, bands in (("price_band", PRICE_BANDS), ("duration_band", DURATION_BANDS)):
+        order = {label: i for i, (label, _, _) in enumerate(bands)}
+        facets[name].sort(key=lambda f: order.get(f["value"], len(order)))
+
+    return {"results": results, "total": total, "facets": facets}
+
+
+async def hybrid_search_packages(
+    db: AsyncSession,
+    q: str,
+    query_embedding: list[float] | None = None,
+    destination: str | None = None,
+    category: str | None = None,
+    price_band: str | None = None,
+    duration_band: str | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    min_duration: int | None = None,
+    max_duration: int | None = None,
+    limit: int = 20,
+    offset: int = 0,
+    locale: str | None = None,
+) -> dict:
+    """Free-text package search fusing full-text and vector rankings.
+
+    Price phrases in *q* ("under $1500", "2000美元以下") become filters unless
+    given explicitly.  Full-text matching runs on the locale's pre-tokenized
+    ``search_text`` (CJK bigrams); vector matching on the package's
+    ``travel_embeddings`` chunks (skipped when *query_embedding* is None).
+    Every filter is applied inside both candidate queries, and the two lists
+    are merged by reciprocal rank fusion: ``score = sum(1 / (k + rank))``.
+    """
+    parsed = parse_query(q)
+    min_price = parsed.min_price if min_price is None else min_price
+    max_price = parsed.max_price if max_price is None else max_price
+    resolved = _resolve_locale(locale)
+
+    scope = [
+        PackageLocalized.locale == resolved,
+        PackageLocalized.is_published.is_(True),
+        *[c for c in _facet_filters(destination, category, price_band, duration_band).values() if c is not None],
+        *_range_filters(min_price, max_price, min_duration, max_duration),
+    ]
+    candidates = settings.hybrid_candidates
+    ranked: dict[str, object] = {}  # source name -> CTE of (package_id, rank)
+
+    terms = query_terms(parsed.text)
+    if terms:
+        ts_query = func.to_tsquery(literal_column("'simple'"), to_tsquery_text(terms))
+        lexical_score = func.ts_rank_cd(SEARCH_VECTOR, ts_query)
+        ranked["lexical"] = (
+            select(
+                PackageLocalized.package_id,
+                func.row_number().over(order_by=lexical_score.desc()).label("rank"),
+            )
+            .where(*scope, SEARCH_VECTOR.op("@@")(ts_query))
+            .order_by(lexical_score.desc())
+            .limit(candidates)
+            .cte("lexical_hits")
+        )
+
+    if query_embedding is not None:
+        # The catalog filters are applied after the ANN scan; search wide enough to fill the candidate list
+        ef_search = min(max(settings.vector_ef_search, candidates * 2), HNSW_MAX_EF_SEARCH)
+        await set_search_params(db, ef_search, filtered=True)
+        distance = TravelEmbedding.embedding.cosine_distance(query_embedding)
+        nearest = (
+            select(PackageLocalized.package_id, distance.label("distance"))
+            .join(PackageLocalized, PackageLocalized.package_id == TravelEmbedding.source_id)
+            .where(TravelEmbedding.source_type == "package", TravelEmbedding.embedding.is_not(None), *scope)
+            .order_by(distance)
+            .limit(candidates * 2)  # long overviews are split into several chunks
+            .subquery("nearest")
+        )
+        ranked["vector"] = (
+            select(nearest.c.package_id, func.row_number().over(order_by=func.min(nearest.c.distance)).label("rank"))
+            .group_by(nearest.c.package_id)
+            .cte("vector_hits")
+        )
+
+    if ranked:
+        hits = union_all(
+            *[select(cte.c.package_id, cte.c.rank, literal(name).label("source")) for name, cte in ranked.items()]
+        ).subquery("hits")
+        fused = (
+            select(
+                hits.c.package_id,
+                func.sum(1.0 / (settings.hybrid_rrf_k + cast(hits.c.rank, Float))).label("score"),
+                *[func.min(hits.c.rank).filter(hits.c.source == name).label(f"{name}_rank") for name in _RANK_SOURCES],
+            )
+            .group_by(hits.c.package_id)
+            .cte("fused")
+        )
+        stmt = (
+            select(PackageLocalized.listing, *[c for c in fused.c if c.name != "package_id"])
+            .join(fused, fused.c.package_id == PackageLocalized.package_id)
+            .where(PackageLocalized.locale == resolved)
+            .order_by(fused.c.score.desc(), PackageLocalized.created_at.desc())
+        )
+    else:
+        # Nothing to rank by (q held only a price phrase): filtered catalog, newest first
+        stmt = (
+            select(
+                PackageLocalized.listing,
+                literal(0.0).label("score"),
+                *[null().label(f"{name}_rank") for name in _RANK_SOURCES],
+            )
+            .where(*scope)
+            .order_by(PackageLocalized.created_at.desc())
+        )
+
+    stmt = stmt.add_columns(func.count().over().label("total")).offset(offset).limit(limit)
+    rows = (await db.execute(stmt)).all()
+    return {
+        "query": parsed.text,
+        "mode": "+".join(ranked) or "filter",
+        "min_price": min_price,
+        "max_price": max_price,
+        "total": rows[0].total if rows else 0,
+        "results": [
+            {
+                **row.listing,
+                "score": float(row.score),
+                **{f"{name}_rank": getattr(row, f"{name}_rank") for name in _RANK_SOURCES},
+            }
+            for row in rows
+        ],
+    }
 
 
 async def get_package_by_slug(
     db: AsyncSession,
     slug: str,
     locale: str | None = None,
-) -> TravelPackage:
-    stmt = (
-        select(TravelPackage)
-        .where(TravelPackage.slug == slug)
-        .options(selectinload(TravelPackage.days), selectinload(TravelPackage.tags))
+) -> dict:
+    stmt = select(PackageLocalized.detail).where(
+        PackageLocalized.locale == _resolve_locale(locale),
+        PackageLocalized.slug == slug,
     )
     result = await db.execute(stmt)
     package = result.scalar_one_or_none()
     if not package:
         raise NotFoundError("Package not found")
-    _apply_locale(package, locale, _PACKAGE_I18N_FIELDS)
-    for day in package.days:
-        _apply_locale(day, locale, _DAY_I18N_FIELDS)
-    for tag in package.tags:
-        _apply_locale(tag, locale, _TAG_I18N_FIELDS)
     return package
 
 
@@ -0,0 +1,93 @@
+"""Tokenization and query parsing for lexical package search.
+
+Postgres' ``simple`` text-search config splits on whitespace/punctuation, which
+leaves a Chinese or Japanese title as one giant token.  Text is therefore
+pre-tokenized here: Latin words are case-folded, CJK runs are indexed as
+unigrams plus overlapping bigrams and queried as bigrams (unigrams for a
+single character), the usual approach for languages without word breaks.
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+
+# Hiragana/Katakana, CJK ideographs (+ext. A, compatibility), Hangul
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+_TOKEN_RE = re.compile(rf"[{_CJK}]+|[^\W_{_CJK}]+")
+_CJK_RE = re.compile(rf"^[{_CJK}]+$")
+
+# A bound needs a currency marker or a bare number, never a count of days, people, ... ("within 7 days")
+_UNIT = (
+    r"(?:days?|nights?|weeks?|months?|hours?|hrs?|people|persons?|pax|adults?|kids?|children|guests?"
+    r"|天|晚|夜|日|人|位|週|周)"
+)
+_AMOUNT = rf"(?:(?:us)?\$\s*(\d[\d,]*)|(\d[\d,]*)(?:\s*(?:usd|dollars?))?(?![\d,])(?!\s*{_UNIT}))"
+
+# "under $1500", "below 1,500 usd", "< 1500", "1500美元以下"
+_MAX_PRICE_RE = re.compile(
+    rf"(?:\b(?:under|below|less\s+than|up\s+to|max(?:imum)?|within)|<=?)\s*{_AMOUNT}"
+    r"|(?:us)?\$?\s*(\d[\d,]*)\s*(?:usd|美元|美金|元)?\s*(?:以下|以內|以内)",
+    re.IGNORECASE,
+)
+# "over $2000", "at least 2000", "> 2000", "2000美元以上"
+_MIN_PRICE_RE = re.compile(
+    rf"(?:\b(?:over|above|more\s+than|at\s+least|min(?:imum)?|from)|>=?)\s*{_AMOUNT}"
+    r"|(?:us)?\$?\s*(\d[\d,]*)\s*(?:usd|美元|美金|元)?\s*以上",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class ParsedQuery:
+    text: str
+    min_price: float | None = None
+    max_price: float | None = None
+
+
+def _normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def _tokens(text: str) -> list[str]:
+    return _TOKEN_RE.findall(_normalize(text))
+
+
+def index_terms(text: str) -> list[str]:
+    """Terms stored for a document: words, CJK unigrams and bigrams."""
+    terms: list[str] = []
+    for token in _tokens(text):
+        if _CJK_RE.match(token):
+            terms.extend(token)
+            terms.extend(token[i : i + 2] for i in range(len(token) - 1))
+        else:
+            terms.append(token)
+    return terms
+
+
+def query_terms(text: str) -> list[str]:
+    """Terms looked up for a query: words and CJK bigrams, de-duplicated."""
+    terms: list[str] = []
+    for token in _tokens(text):
+        if _CJK_RE.match(token) and len(token) > 1:
+            terms.extend(token[i : i + 2] for i in range(len(token) - 1))
+        else:
+            terms.append(token)
+    return list(dict.fromkeys(terms))
+
+
+def to_tsquery_text(terms: list[str]) -> str:
+    """OR-query for ``to_tsquery('simple', ...)``; ranking rewards documents matching more terms."""
+    return " | ".join("'" + term.replace("'", "''") + "'" for term in terms)
+
+
+def parse_query(query: str) -> ParsedQuery:
+    """Pull price constraints out of free text, e.g. "沖繩 snorkeling under $1500"."""
+    normalized = unicodedata.normalize("NFKC", query)
+    bounds: dict[str, float] = {}
+    for name, pattern in (("max_price", _MAX_PRICE_RE), ("min_price", _MIN_PRICE_RE)):
+        match = pattern.search(normalized)
+        if match:
+            amount = next(group for group in match.groups() if group)
+            bounds[name] = float(amount.replace(",", ""))
+            normalized = normalized[: match.start()] + " " + normalized[match.end() :]
+    return ParsedQuery(text=" ".join(normalized.split()), **bounds)
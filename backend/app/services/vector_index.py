@@ -0,0 +1,82 @@
+"""ANN indexes on ``travel_embeddings.embedding``.
+
+One global index serves unfiltered searches; a partial index per source type
+serves ``WHERE source_type = ...`` searches, which a global HNSW/IVFFlat index
+handles poorly (the filter is applied after the ANN scan, so selective types
+return short or empty result sets).  Build parameters come from settings;
+``hnsw.ef_search`` / ``ivfflat.probes`` are tuned per query by
+``embedding_service.set_search_params``.
+"""
+
+import logging
+import re
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+TABLE = "travel_embeddings"
+INDEX_PREFIX = "ix_travel_embeddings_embedding"
+METHODS = ("hnsw", "ivfflat")
+
+# Index names and WHERE clauses are DDL and cannot be bound, so only plain
+# identifiers are accepted as source types.
+_SOURCE_TYPE_RE = re.compile(r"^[a-z][a-z0-9_]{0,40}$")
+
+
+def index_name(source_type: str | None = None) -> str:
+    return f"{INDEX_PREFIX}_{source_type}" if source_type else INDEX_PREFIX
+
+
+def index_ddl(source_type: str | None = None, method: str | None = None) -> str:
+    """``CREATE INDEX`` statement for the global (or one partial) index."""
+    method = method or settings.vector_index_method
+    if method == "hnsw":
+        params = f"m = {int(settings.vector_hnsw_m)}, ef_construction = {int(settings.vector_hnsw_ef_construction)}"
+    elif method == "ivfflat":
+        params = f"lists = {int(settings.vector_ivfflat_lists)}"
+    else:
+        raise ValueError(f"Unknown vector index method: {method!r}")
+
+    where = ""
+    if source_type:
+        if not _SOURCE_TYPE_RE.match(source_type):
+            raise ValueError(f"Invalid source type for index: {source_type!r}")
+        where = f" WHERE source_type = '{source_type}'"
+    return (
+        f"CREATE INDEX IF NOT EXISTS {index_name(source_type)} ON {TABLE} "
+        f"USING {method} (embedding vector_cosine_ops) WITH ({params}){where}"
+    )
+
+
+async def ensure_vector_indexes(conn: AsyncConnection, *, rebuild: bool = False) -> list[str]:
+    """Create any missing ANN indexes; with *rebuild*, drop and recreate them.
+
+    Rebuild IVFFlat indexes after bulk loads: their centroids are computed
+    from the rows present at build time.  Returns the index names touched.
+    """
+    targets: list[str | None] = [None, *settings.vector_index_source_types]
+    names = []
+    for source_type in targets:
+        name = index_name(source_type)
+        if rebuild:
+            await conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        await conn.execute(text(index_ddl(source_type)))
+        names.append(name)
+    logger.info("Vector indexes ready (%s): %s", settings.vector_index_method, ", ".join(names))
+    return names
+
+
+async def drop_vector_indexes(conn: AsyncConnection) -> list[str]:
+    """Drop every ANN index on the embedding column (e.g. before a bulk load)."""
+    rows = await conn.execute(
+        text("SELECT indexname FROM pg_indexes WHERE tablename = :table AND indexname LIKE :prefix"),
+        {"table": TABLE, "prefix": f"{INDEX_PREFIX}%"},
+    )
+    names = [row.indexname for row in rows]
+    for name in names:
+        await conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    return names
@@ -1,5 +1,9 @@
 """E2E: Auth endpoints — guards and redirects."""
 
+import uuid
+
+from app.core.security import create_access_token
+
 
 class TestAuthGuard:
     def test_users_me_requires_auth(self, client):
@@ -18,6 +22,21 @@ class TestAuthGuard:
         resp = client.get("/api/v1/chat/sessions")
         assert resp.status_code == 401
 
+    def test_flow_timeline_requires_auth(self, client):
+        resp = client.get("/api/v1/chat/sessions/00000000-0000-0000-0000-000000000000/flow-timeline")
+        assert resp.status_code == 401
+
+    def test_flow_events_require_session_owner(self, client):
+        token = create_access_token(uuid.uuid4())
+        resp = client.get(f"/api/v1/chat/sessions/{uuid.uuid4()}/flow-events", params={"token": token})
+        assert resp.status_code == 404
+
+    def test_chat_jobs_require_auth(self, client):
+        resp = client.post("/api/v1/chat/sessions/00000000-0000-0000-0000-000000000000/jobs", json={"content": "hi"})
+        assert resp.status_code == 401
+        resp = client.get("/api/v1/chat/jobs/00000000-0000-0000-0000-000000000000")
+        assert resp.status_code == 401
+
     def test_itineraries_requires_auth(self, client):
         resp = client.get("/api/v1/itineraries")
         assert resp.status_code == 401
@@ -1,4 +1,4 @@
-"""E2E: Health endpoint."""
+"""E2E: Health and metrics endpoints."""
 
 
 def test_health_returns_ok(client):
@@ -7,3 +7,12 @@ def test_health_returns_ok(client):
     data = resp.json()
     assert data["status"] == "ok"
     assert data["service"] == "AI Trip Planner"
+
+
+def test_metrics_exposes_prometheus_text(client):
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    body = resp.text
+    for name in ("llm_request_seconds", "mcp_call_seconds", "db_pool_checkout_seconds", "db_pool_checked_out"):
+        assert f"# TYPE {name} " in body
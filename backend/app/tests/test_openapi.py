@@ -22,7 +22,9 @@ def test_openapi_has_expected_paths(client):
         "/api/v1/chat/sessions",
         "/api/v1/packages",
         "/api/v1/packages/categories",
+        "/api/v1/packages/search",
         "/api/v1/packages/search/semantic",
+        "/api/v1/packages/search/hybrid",
         "/api/v1/itineraries",
     ]
     for path in expected:
@@ -36,6 +38,8 @@ def test_openapi_has_expected_schemas(client):
     expected = [
         "PackageListRead",
         "PackageDetailRead",
+        "PackageSearchRead",
+        "PackageHybridSearchRead",
         "ChatSessionRead",
         "ChatMessageRead",
         "UserRead",
@@ -0,0 +1,22 @@
+"""Orchestrator turn planning: which MCP tools are called with which arguments (no services needed)."""
+
+import pytest
+
+from app.services.orchestrator import _select_mcp_calls
+
+JAPAN_SLOTS = {"destination": "japan", "duration_days": 5, "num_travelers": 2, "budget_usd": 3000.0}
+
+
+def conversion_args(slots: dict) -> dict:
+    return next(args for _, tool, args in _select_mcp_calls(slots) if tool == "convert_currency_bulk")
+
+
+class TestCurrencyConversion:
+    def test_converts_budget_total_and_per_day(self):
+        assert conversion_args(JAPAN_SLOTS)["amounts"] == [3000.0, 600.0]
+
+    @pytest.mark.parametrize(
+        ("start_date", "date"), [("2026-02-14", "2026-02-14"), ("2026-02-31", None), ("soon", None)]
+    )
+    def test_only_valid_start_dates_are_passed(self, start_date, date):
+        assert conversion_args({**JAPAN_SLOTS, "start_date": start_date}).get("date") == date
@@ -1,5 +1,13 @@
 """E2E: Packages API endpoints."""
 
+import re
+import uuid
+
+import pytest
+
+from app.config import settings
+from app.services.search_text import parse_query
+
 
 class TestListPackages:
     def test_returns_list(self, client):
@@ -65,6 +73,32 @@ class TestGetPackageBySlug:
         resp = client.get("/api/v1/packages/nonexistent-package")
         assert resp.status_code == 404
 
+    def test_days_ordered(self, client):
+        resp = client.get("/api/v1/packages/tokyo-explorer-5day")
+        numbers = [d["day_number"] for d in resp.json()["days"]]
+        assert numbers == sorted(numbers)
+
+
+class TestLocalizedPackages:
+    def test_zh_detail_is_translated(self, client):
+        resp = client.get("/api/v1/packages/tokyo-explorer-5day", params={"locale": "zh"})
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["title"] == "東京探索：5日都市冒險"
+        assert data["days"][0]["title"] == "抵達 & 新宿"
+        assert any(t["tag"] == "東京" for t in data["tags"])
+
+    def test_zh_list_is_translated(self, client):
+        en = client.get("/api/v1/packages", params={"destination": "Japan"}).json()
+        zh = client.get("/api/v1/packages", params={"destination": "Japan", "locale": "zh"}).json()
+        assert [p["slug"] for p in en] == [p["slug"] for p in zh]
+        assert any(a["title"] != b["title"] for a, b in zip(en, zh))
+
+    def test_unknown_locale_falls_back_to_english(self, client):
+        en = client.get("/api/v1/packages/tokyo-explorer-5day").json()
+        xx = client.get("/api/v1/packages/tokyo-explorer-5day", params={"locale": "xx"}).json()
+        assert xx["title"] == en["title"] == "Tokyo Explorer: 5-Day Urban Adventure"
+
 
 class TestCategories:
     def test_returns_list_of_strings(self, client):
@@ -76,3 +110,120 @@ class TestCategories:
         assert all(isinstance(c, str) for c in data)
         assert "Skiing" in data
         assert "Culture" in data
+
+
+class TestSearchPackages:
+    def test_returns_results_and_facets(self, client):
+        resp = client.get("/api/v1/packages/search")
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["total"] >= len(data["results"]) > 0
+        for facet in ("destination", "category", "price_band", "duration_band"):
+            assert facet in data["facets"]
+        destinations = {f["value"]: f["count"] for f in data["facets"]["destination"]}
+        assert destinations.keys() >= {"Japan", "Taiwan"}
+        assert sum(destinations.values()) == data["total"]
+
+    def test_facets_are_disjunctive(self, client):
+        data = client.get("/api/v1/packages/search", params={"destination": "Japan"}).json()
+        assert all(p["destination"] == "Japan" for p in data["results"])
+        # The selected facet still offers the other destinations
+        assert {f["value"] for f in data["facets"]["destination"]} >= {"Japan", "Taiwan"}
+        # Other facets are narrowed to Japan packages
+        assert sum(f["count"] for f in data["facets"]["category"]) == data["total"]
+
+    def test_filter_by_price_band(self, client):
+        data = client.get("/api/v1/packages/search", params={"price_band": "under_1000"}).json()
+        assert data["total"] > 0
+        assert all(p["price_usd"] < 1000 for p in data["results"])
+
+
+class TestHybridSearch:
+    def test_returns_ranked_results(self, client):
+        resp = client.get("/api/v1/packages/search/hybrid", params={"q": "Hokkaido skiing"})
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["total"] >= len(data["results"]) > 0
+        scores = [p["score"] for p in data["results"]]
+        assert scores == sorted(scores, reverse=True)
+        assert any(p["lexical_rank"] is not None for p in data["results"])
+
+    def test_price_phrase_becomes_filter(self, client):
+        data = client.get("/api/v1/packages/search/hybrid", params={"q": "japan under $1500"}).json()
+        assert data["query"] == "japan"
+        assert data["max_price"] == 1500
+        assert all(p["price_usd"] <= 1500 for p in data["results"])
+
+    def test_cjk_query_on_zh_locale(self, client):
+        data = client.get("/api/v1/packages/search/hybrid", params={"q": "沖繩", "locale": "zh"}).json()
+        assert any(p["lexical_rank"] is not None for p in data["results"])
+
+    def test_structured_filters_apply(self, client):
+        data = client.get("/api/v1/packages/search/hybrid", params={"q": "culture", "destination": "Taiwan"}).json()
+        assert all(p["destination"] == "Taiwan" for p in data["results"])
+
+
+def embedding_cache_lookups(client) -> dict[str, float]:
+    body = client.get("/metrics").text
+    return {
+        result: float(value)
+        for result, value in re.findall(r'^query_embedding_cache_lookups_total\{result="(\w+)"\} (\S+)$', body, re.M)
+    }
+
+
+@pytest.mark.skipif(not settings.openrouter_api_key, reason="semantic search needs an embeddings API key")
+class TestSemanticSearch:
+    def test_repeated_query_hits_embedding_cache(self, client):
+        query = f"Temples near Kyoto {uuid.uuid4().hex[:8]}"
+        before = embedding_cache_lookups(client)
+        assert client.get("/api/v1/packages/search/semantic", params={"q": query}).status_code == 200
+        # Same query after normalization: case and whitespace differ
+        resp = client.get("/api/v1/packages/search/semantic", params={"q": f"  {query.upper()} "})
+        assert resp.status_code == 200
+        after = embedding_cache_lookups(client)
+        assert after["misses"] >= before["misses"] + 1
+        assert after["hits"] >= before["hits"] + 1
+
+
+class TestQueryParsing:
+    @pytest.mark.parametrize(
+        "q",
+        [
+            "okinawa within 7 days",
+            "hokkaido up to 10 days ski",
+            "kyoto trip for 2 people from 5 nights",
+            "3天以內 台北",
+        ],
+    )
+    def test_durations_and_counts_are_not_prices(self, q):
+        parsed = parse_query(q)
+        assert parsed.min_price is None and parsed.max_price is None
+        assert parsed.text == q
+
+    @pytest.mark.parametrize(
+        ("q", "bounds"),
+        [
+            ("japan under $1500", {"max_price": 1500}),
+            ("tokyo below 1,500 usd", {"max_price": 1500}),
+            ("hokkaido up to 2000", {"max_price": 2000}),
+            ("沖繩 1500美元以下", {"max_price": 1500}),
+            ("taipei from $800", {"min_price": 800}),
+            ("kyoto at least 2000 dollars", {"min_price": 2000}),
+        ],
+    )
+    def test_price_phrases(self, q, bounds):
+        parsed = parse_query(q)
+        assert parsed.max_price == bounds.get("max_price")
+        assert parsed.min_price == bounds.get("min_price")
+
+
+class TestRateLimitHeaders:
+    def test_responses_report_remaining_quota(self, client):
+        first = client.get("/api/v1/packages")
+        second = client.get("/api/v1/packages")
+        assert first.headers["RateLimit-Limit"] == second.headers["RateLimit-Limit"]
+        assert int(second.headers["RateLimit-Remaining"]) < int(first.headers["RateLimit-Remaining"])
+        assert "RateLimit-Reset" in second.headers
+
+    def test_health_is_not_limited(self, client):
+        assert "RateLimit-Limit" not in client.get("/health").headers
@@ -0,0 +1,38 @@
+"""Chat job worker: ``python -m app.worker``.
+
+Runs queued chat turns (see ``app.services.chat_jobs``) with
+``settings.chat_worker_concurrency`` consumers.  SIGTERM / SIGINT let the
+running turns finish, then flush their flow events and exit.
+"""
+
+import asyncio
+import logging
+import signal
+
+from app.config import settings
+from app.core.redis import close_redis
+from app.database import engine
+from app.services.chat_jobs import ChatJobWorker
+from app.services.flow_events import emitter as flow_event_emitter
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    try:
+        await ChatJobWorker(settings.chat_worker_concurrency).run(stop)
+    finally:
+        await flow_event_emitter.close()
+        await close_redis()
+        await engine.dispose()
+        logger.info("Chat worker stopped")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
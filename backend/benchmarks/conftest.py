@@ -0,0 +1,92 @@
+"""Fixtures for the orchestrator micro-benchmarks.
+
+``measure(fn, *args, budget_us=...)`` benchmarks *fn* with pytest-benchmark
+and fails if its mean exceeds the budget (times ``BENCH_BUDGET_SCALE``, for
+slow CI machines).  Budgets catch blow-ups such as a regex going quadratic;
+finer regressions are caught by comparing with a saved run:
+
+    pytest benchmarks --benchmark-autosave
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:15%
+
+``--flamegraph DIR`` profiles each benchmarked call instead of timing it and
+writes ``DIR/<test>.folded`` (collapsed stacks, microseconds) for
+speedscope or flamegraph.pl.
+"""
+
+import os
+import re
+import sys
+import time
+from collections import Counter
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+BUDGET_SCALE = float(os.getenv("BENCH_BUDGET_SCALE", "1"))
+
+_UNSAFE_RE = re.compile(r"[^\w.-]+")
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption("--flamegraph", metavar="DIR", help="write collapsed-stack profiles instead of timing")
+    parser.addoption("--flamegraph-iterations", type=int, default=200, help="calls per profile (default 200)")
+
+
+def _frame_name(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+
+def _c_name(func) -> str:
+    return f"{getattr(func, '__module__', None) or 'builtins'}:{getattr(func, '__qualname__', repr(func))}"
+
+
+def folded_stacks(fn: Callable, args: tuple, iterations: int) -> Counter[str]:
+    """Self time (ns) per call stack over *iterations* calls of ``fn(*args)``, via ``sys.setprofile``."""
+    totals: Counter[str] = Counter()
+    stack: list[str] = []
+    last = time.perf_counter_ns()
+
+    def profile(frame, event: str, arg: Any) -> None:
+        nonlocal last
+        now = time.perf_counter_ns()
+        if stack:
+            totals[";".join(stack)] += now - last
+        if event == "call":
+            stack.append(_frame_name(frame))
+        elif event == "c_call":
+            stack.append(_c_name(arg))
+        elif stack and event in ("return", "c_return", "c_exception"):
+            stack.pop()
+        last = time.perf_counter_ns()
+
+    sys.setprofile(profile)
+    try:
+        for _ in range(iterations):
+            fn(*args)
+    finally:
+        sys.setprofile(None)
+    return totals
+
+
+@pytest.fixture
+def measure(request: pytest.FixtureRequest, benchmark) -> Callable:
+    flamegraph_dir = request.config.getoption("--flamegraph")
+
+    def run(fn: Callable, *args: Any, budget_us: float) -> Any:
+        if flamegraph_dir:
+            stacks = folded_stacks(fn, args, request.config.getoption("--flamegraph-iterations"))
+            path = Path(flamegraph_dir) / f"{_UNSAFE_RE.sub('_', request.node.name)}.folded"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("".join(f"{stack} {ns // 1000}\n" for stack, ns in stacks.items() if ns >= 1000))
+            return fn(*args)
+
+        result = benchmark(fn, *args)
+        if not benchmark.disabled:
+            mean_us = benchmark.stats.stats.mean * 1e6
+            limit = budget_us * BUDGET_SCALE
+            assert mean_us <= limit, f"{request.node.name}: mean {mean_us:.1f}µs over budget {limit:.0f}µs"
+        return result
+
+    return run
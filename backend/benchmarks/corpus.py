@@ -0,0 +1,121 @@
+"""Inputs for the orchestrator micro-benchmarks.
+
+Messages mix English, Traditional Chinese and Japanese, short and long, with
+and without extractable slots.  LLM outputs are synthetic 3- to 30-day
+itineraries (~2.5-25 KB) with inline links, a References section and the
+trailing SLOTS_JSON line.
+"""
+
+import json
+import random
+
+MESSAGES = [
+    "Hi!",
+    "I want to go to Japan",
+    "我想去日本玩",
+    "東京に行きたいです",
+    "We are 2 adults going to Tokyo for 5 days",
+    "我們2人要去台北玩4天，預算 1500 美金",
+    "Family trip to Hokkaido, 4 people, kids 5 years old and 8 years old, budget $6,000",
+    "小孩5歲跟7歲，想去北海道滑雪 6天5夜",
+    "Planning Kyoto from 2026-04-01 to 2026-04-06, 3 people",
+    "2026/10/10 出發去台中，2026/10/14 回來，3位",
+    "Can you swap day 3 for Nara and add a tea ceremony?",
+    "預算大概 3000 美元，想要住溫泉旅館，喜歡寺廟跟美食",
+    "大阪で3日間、2人、予算は$2500くらい",
+    "Is the JR Pass worth it for a 7-day Tokyo-Kyoto-Osaka-Hiroshima loop with 2 adults?",
+    "We land at Taoyuan at 6am and leave from Kaohsiung 10 days later, 2 people, love night markets and hiking",
+    (
+        "Hello! My partner and I (2 adults) are planning our honeymoon. We're thinking Japan for about 12 days "
+        "in late March to catch the cherry blossoms — Tokyo, Hakone, Kyoto and maybe Osaka. Our budget is "
+        "$9,000 for everything except flights. We'd love a ryokan with a private onsen, some Michelin-starred "
+        "sushi, a day at teamLab, and a quiet temple morning in Kyoto before the crowds. Is that realistic?"
+    ),
+    (
+        "我們一家四口，兩個大人兩個小孩（小孩6歲和9歲），想在寒假去台灣環島大約10天，從台北出發，"
+        "經過花蓮、台東、高雄、台南、台中再回台北。預算大概 5000 美金，希望行程不要太趕，"
+        "小孩喜歡動物園和海邊，大人想吃夜市和看古蹟，請幫我們規劃一下交通和住宿。"
+    ),
+    "ok",
+    "sounds good, go ahead",
+    "Actually make it 3 people, my sister is joining",
+]
+
+SLOTS = {
+    "partial": {"destination": "japan"},
+    "japan": {"destination": "japan", "duration_days": 5, "num_travelers": 2, "budget_usd": 3000.0},
+    "taiwan_family": {
+        "destination": "taiwan",
+        "duration_days": 10,
+        "num_travelers": 4,
+        "budget_usd": 5000.0,
+        "start_date": "2027-01-20",
+        "end_date": "2027-01-30",
+        "children_ages": [6, 9],
+        "preferences": ["night markets", "zoo", "beach", "temples"],
+        "trip_style": "family",
+    },
+}
+
+_PLACES = [
+    ("Sensō-ji", "https://www.senso-ji.jp/"),
+    ("Meiji Jingu", "https://www.meijijingu.or.jp/en/"),
+    ("teamLab Planets", "https://www.teamlab.art/e/planets/"),
+    ("Fushimi Inari Taisha", "http://inari.jp/en/"),
+    ("Kiyomizu-dera", "https://www.kiyomizudera.or.jp/en/"),
+    ("Osaka Castle", "https://www.osakacastle.net/english/"),
+    ("Taipei 101", "https://www.taipei-101.com.tw/en/"),
+    ("National Palace Museum", "https://www.npm.gov.tw/en/"),
+    ("Shilin Night Market", "https://www.travel.taipei/en/attraction/details/1515"),
+    ("Taroko Gorge", "https://www.taroko.gov.tw/en/"),
+    ("Japan Rail Pass", "https://japanrailpass.net/en/"),
+    ("Klook", "https://www.klook.com/"),
+]
+
+
+def llm_output(days: int, seed: int = 1) -> tuple[str, set[str]]:
+    """A *days*-day itinerary response and the set of URLs it cites."""
+    rng = random.Random(seed)
+    lines, references = ["## Your itinerary", ""], []
+    for day in range(1, days + 1):
+        lines += [f"### Day {day} — {rng.choice(['Tokyo', 'Kyoto', 'Osaka', 'Taipei', 'Hualien'])}", ""]
+        for part in ("Morning", "Afternoon", "Evening"):
+            name, url = rng.choice(_PLACES)
+            page = f"{url}visit/{day}-{part.lower()}"
+            references.append((name, page))
+            lines.append(
+                f"- **{part}**: Start at [{name}]({page}) [{len(references)}], then walk to a local izakaya "
+                f"for lunch (¥1,800 / ~$12). 早上人比較少，建議提早出發。"
+            )
+        lines += ["", "| Item | JPY | USD |", "|---|---|---|"]
+        lines += [
+            f"| {item} | ¥{rng.randint(2, 40) * 1000:,} | ${rng.randint(15, 280)} |" for item in ("Hotel", "Food")
+        ]
+        lines.append("")
+    lines += ["**References**", ""]
+    lines += [f'[{n}]: {url} "{name}"' for n, (name, url) in enumerate(references, start=1)]
+    slots = {"destination": "japan", "duration_days": days, "num_travelers": 2, "preferences": ["temples", "food"]}
+    lines.append(f"SLOTS_JSON: {json.dumps(slots, ensure_ascii=False)}")
+    return "\n".join(lines), {url for _, url in references}
+
+
+def mcp_results(calls: list[tuple[str, str, dict]], seed: int = 1) -> list[dict | None]:
+    """Plausibly sized tool results for *calls*, with one failed call."""
+    rng = random.Random(seed)
+    results: list[dict | None] = []
+    for _, tool, arguments in calls:
+        rows = [
+            {
+                "name": f"{rng.choice(_PLACES)[0]} #{i}",
+                "area": rng.choice(["Shinjuku", "Gion", "Namba", "Xinyi", "大安區"]),
+                "price_usd": rng.randint(40, 600),
+                "rating": round(rng.uniform(3.2, 4.9), 1),
+                "amenities": rng.sample(["wifi", "onsen", "breakfast", "gym", "laundry", "kids club"], 3),
+                "notes": "近車站，步行5分鐘 / 5 min walk to the station",
+            }
+            for i in range(40)
+        ]
+        results.append({"tool": tool, "query": arguments, "results": rows})
+    if results:
+        results[-1] = None
+    return results
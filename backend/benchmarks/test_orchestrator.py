@@ -0,0 +1,63 @@
+"""Micro-benchmarks of the orchestrator functions that run on every chat turn.
+
+Run with ``make bench-orchestrator`` or ``pytest benchmarks`` (no services
+needed).  Budgets are per call of the benchmarked lambda, generous enough for
+a slow CI runner; see ``conftest.py`` for baseline comparison and
+``--flamegraph``.
+"""
+
+import pytest
+
+from app.services.orchestrator import (
+    _build_user_prompt,
+    _extract_slots_from_llm,
+    _extract_slots_from_message,
+    _format_mcp_context,
+    _select_mcp_calls,
+    _strip_dead_links,
+)
+from benchmarks.corpus import MESSAGES, SLOTS, llm_output, mcp_results
+
+LLM_OUTPUTS = {days: llm_output(days) for days in (3, 14, 30)}
+
+
+def test_extract_slots_from_message(measure):
+    slots = measure(lambda: [_extract_slots_from_message(m) for m in MESSAGES], budget_us=2_000)
+    assert slots[4] == {"destination": "japan", "duration_days": 5, "num_travelers": 2}
+    assert slots[7]["children_ages"] == [5]
+
+
+@pytest.mark.parametrize("days", LLM_OUTPUTS)
+def test_extract_slots_from_llm(measure, days):
+    content, _ = LLM_OUTPUTS[days]
+    visible, slots = measure(_extract_slots_from_llm, content, budget_us=100 * days)
+    assert slots["duration_days"] == days
+    assert "SLOTS_JSON" not in visible
+
+
+@pytest.mark.parametrize("slots", SLOTS)
+def test_select_mcp_calls(measure, slots):
+    calls = measure(_select_mcp_calls, SLOTS[slots], budget_us=50)
+    assert len(calls) == {"partial": 4, "japan": 4, "taiwan_family": 5}[slots]
+
+
+@pytest.mark.parametrize("slots", ["japan", "taiwan_family"])
+def test_format_mcp_context(measure, slots):
+    calls = _select_mcp_calls(SLOTS[slots])
+    context = measure(_format_mcp_context, mcp_results(calls), calls, budget_us=10_000)
+    assert context.count("[MCP:") == len(calls) - 1
+
+
+def test_build_user_prompt(measure):
+    calls = _select_mcp_calls(SLOTS["taiwan_family"])
+    context = _format_mcp_context(mcp_results(calls), calls)
+    prompt = measure(_build_user_prompt, MESSAGES[16], SLOTS["taiwan_family"], context, budget_us=200)
+    assert "All required info collected" in prompt
+
+
+@pytest.mark.parametrize("days", LLM_OUTPUTS)
+def test_strip_dead_links(measure, days):
+    content, urls = LLM_OUTPUTS[days]
+    dead = set(sorted(urls)[::3])
+    cleaned = measure(_strip_dead_links, content, dead, budget_us=100 * days)
+    assert not any(url in cleaned for url in dead)
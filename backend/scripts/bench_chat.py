@@ -0,0 +1,549 @@
+"""Load test of the chat path against a fake OpenRouter and fake MCP servers.
+
+    python -m scripts.bench_chat                                        # 20 users, 100 conversations, REST
+    python -m scripts.bench_chat --users 50 --conversations 400 --transport mixed --workers 4
+    python -m scripts.bench_chat --llm-ttft-ms 1500 --llm-error-rate 0.1 --mcp-latency-ms 80
+    python -m scripts.bench_chat --backend-url http://localhost:8200 --fake-port 9400
+
+Needs Postgres and Redis (the docker-compose services will do) but no network
+access: OpenRouter, the five MCP servers and every URL the fake LLM cites are
+served by this script on 127.0.0.1.  The fake LLM waits a log-normal
+time-to-first-token, then "generates" at ``--llm-tokens-per-s`` (streamed as
+SSE chunks when the request asks for ``stream``), fails ``--llm-error-rate`` of
+calls with a 429/502, and answers with a clarifying question or, once the
+prompt says all slots are collected, a day-by-day itinerary with citations and
+a SLOTS_JSON line.  The fake MCP servers answer ``/mcp/batch`` with canned
+results after ``--mcp-latency-ms``.
+
+By default the API runs as a uvicorn subprocess pointed at the fakes.  With
+``--backend-url`` an already-running API is driven instead; it must have been
+started with the OPENROUTER_BASE_URL / MCP_*_URL values printed at startup
+(use ``--fake-port`` to keep them stable) and must share this script's
+DATABASE_URL and JWT secret.
+
+Bench users (premium tier) are created directly in the database and deleted
+with their sessions, messages and usage records afterwards.  Each user works
+through scripted multi-turn conversations (English and Chinese) that end in
+itinerary generation, over REST or the WebSocket.  The report gives
+throughput, p50/p95/p99 latency per transport and kind of turn, and a
+per-stage breakdown taken from each session's flow timeline.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import re
+import socket
+import statistics
+import sys
+import time
+import uuid
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+import httpx
+import uvicorn
+import websockets
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import delete, select
+
+from app.core.security import create_access_token
+from app.database import async_session, engine
+from app.models.chat import ChatMessage, ChatSession
+from app.models.usage import UsageRecord
+from app.models.user import User, UserTier
+
+MCP_SERVERS = ("japan", "taiwan", "flights", "utilities", "knowledge")
+BENCH_EMAIL_DOMAIN = "bench.trip-planner.local"
+TURN_TIMEOUT = 300.0
+
+# (locale, turns): each conversation fills the required slots, then asks for changes
+CONVERSATIONS = [
+    (
+        "en",
+        [
+            "Hi! We're thinking about a trip to Japan.",
+            "We have 5 days in April, 2 adults.",
+            "Budget is around $3000, and we love food and temples.",
+        ],
+    ),
+    ("zh", ["我想去台灣玩", "大概4天，2人", "預算 1500 美金，喜歡夜市跟溫泉"]),
+    (
+        "en",
+        [
+            "Family trip to Hokkaido for 6 days, 4 people, kids 5 years old",
+            "Can you add a ski day and an onsen ryokan?",
+        ],
+    ),
+    ("zh", ["日本京都 3天 2人", "可以多加一些寺廟嗎？", "最後一天想去大阪吃美食"]),
+    (
+        "en",
+        [
+            "Planning Taipei from 2026-03-10 to 2026-03-14",
+            "3 people, budget $2000",
+            "Swap the last day for Jiufen and Shifen",
+        ],
+    ),
+    ("zh", ["東京自由行", "5天4夜，3個人，小孩8歲", "預算 4000 美金"]),
+]
+
+_ACCUMULATED_RE = re.compile(r"\[Accumulated travel info\]: (\{.*\})")
+_PLACES = [
+    "Sensō-ji",
+    "Meiji Shrine",
+    "Tsukiji Outer Market",
+    "Fushimi Inari",
+    "Arashiyama",
+    "Dotonbori",
+    "Shilin Night Market",
+    "Taipei 101",
+    "Jiufen Old Street",
+    "Beitou Hot Springs",
+    "Nijō Castle",
+    "Nara Park",
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _pct(ordered: list[float], p: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+# ---------------------------------------------------------------------------
+# Fake OpenRouter + MCP servers
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class FakeStats:
+    llm_calls: int = 0
+    llm_errors: int = 0
+    llm_streamed: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    mcp_batches: int = 0
+    mcp_calls: int = 0
+    mcp_errors: int = 0
+    link_checks: int = 0
+
+
+class Fakes:
+    """One local HTTP app standing in for OpenRouter, the MCP servers and cited websites."""
+
+    def __init__(self, args: argparse.Namespace, port: int):
+        self.args = args
+        self.base_url = f"http://127.0.0.1:{port}"
+        self.rng = random.Random(args.seed)
+        self.stats = FakeStats()
+        self.app = FastAPI()
+        self.app.post("/openrouter/chat/completions")(self.chat_completions)
+        self.app.post("/mcp/{server}/mcp/batch")(self.mcp_batch)
+        self.app.api_route("/ref/{ref}", methods=["GET", "HEAD"])(self.reference)
+
+    @property
+    def env(self) -> dict[str, str]:
+        """Settings overrides that point the API at the fakes."""
+        env = {"OPENROUTER_BASE_URL": f"{self.base_url}/openrouter", "OPENROUTER_API_KEY": "bench"}
+        for server in MCP_SERVERS:
+            env[f"MCP_{server.upper()}_URL"] = f"{self.base_url}/mcp/{server}"
+        return env
+
+    def _latency(self, median_ms: float) -> float:
+        return median_ms * self.rng.lognormvariate(0, self.args.jitter) / 1000
+
+    def _reply(self, prompt: str) -> str:
+        match = _ACCUMULATED_RE.search(prompt)
+        slots = json.loads(match.group(1)) if match else {}
+        if "All required info collected" not in prompt:
+            body = (
+                "Great choice! To put your plan together I still need a few details:\n\n"
+                "- **When** are you travelling, or for how many days?\n"
+                "- **How many** travellers, and any children?\n"
+                "- Any **budget** or interests (food, temples, onsen, hiking)?"
+            )
+        else:
+            days, refs, lines = int(slots.get("duration_days") or 3), [], ["## Your itinerary", ""]
+            for day in range(1, days + 1):
+                lines.append(f"### Day {day}")
+                for part in ("Morning", "Afternoon", "Evening"):
+                    refs.append(self.rng.choice(_PLACES))
+                    lines.append(f"- **{part}**: Visit {refs[-1]} [{len(refs)}], then lunch nearby (¥1,500 / $10).")
+                lines.append("")
+            lines += ["| Item | Cost (USD) |", "|---|---|"]
+            lines += [
+                f"| {item} | ${self.rng.randint(80, 900)} |" for item in ("Flights", "Hotels", "Transport", "Food")
+            ]
+            lines += ["", "**References**"]
+            lines += [f'[{n}]: {self.base_url}/ref/{n} "{place}"' for n, place in enumerate(refs, start=1)]
+            body = "\n".join(lines)
+        return f"{body}\nSLOTS_JSON: {json.dumps(slots, ensure_ascii=False)}"
+
+    async def chat_completions(self, request: Request) -> Response:
+        payload = await request.json()
+        self.stats.llm_calls += 1
+        await asyncio.sleep(self._latency(self.args.llm_ttft_ms))
+        if self.rng.random() < self.args.llm_error_rate:
+            self.stats.llm_errors += 1
+            status = self.rng.choice((429, 502))
+            return JSONResponse({"error": {"code": status, "message": "injected failure"}}, status_code=status)
+
+        prompt = "\n".join(m.get("content", "") for m in payload.get("messages", []))
+        content = self._reply(prompt)
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        self.stats.prompt_tokens += usage["prompt_tokens"]
+        self.stats.completion_tokens += usage["completion_tokens"]
+        seconds_per_token = 1 / self.args.llm_tokens_per_s
+
+        if payload.get("stream"):
+            self.stats.llm_streamed += 1
+
+            async def chunks():
+                for start in range(0, len(content), 16):
+                    await asyncio.sleep(4 * seconds_per_token)  # 16 characters ~ 4 tokens
+                    delta = {"choices": [{"index": 0, "delta": {"content": content[start : start + 16]}}]}
+                    yield f"data: {json.dumps(delta, ensure_ascii=False)}\n\n"
+                final = {"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage}
+                yield f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n"
+
+            return StreamingResponse(chunks(), media_type="text/event-stream")
+
+        await asyncio.sleep(usage["completion_tokens"] * seconds_per_token)
+        return JSONResponse(
+            {
+                "id": f"gen-{uuid.uuid4().hex[:12]}",
+                "model": payload.get("model"),
+                "choices": [
+                    {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+                ],
+                "usage": usage,
+            }
+        )
+
+    def _tool_result(self, name: str, arguments: dict) -> dict:
+        return {
+            "tool": name,
+            "query": arguments,
+            "results": [
+                {"name": place, "rating": round(self.rng.uniform(3.5, 5), 1), "price_usd": self.rng.randint(20, 400)}
+                for place in self.rng.sample(_PLACES, 5)
+            ],
+        }
+
+    async def mcp_batch(self, server: str, request: Request) -> Response:
+        items = await request.json()
+        self.stats.mcp_batches += 1
+        self.stats.mcp_calls += len(items)
+        # The real servers run batch items concurrently: the batch takes as long as its slowest tool
+        await asyncio.sleep(max(self._latency(self.args.mcp_latency_ms) for _ in items))
+        responses = []
+        for item in items:
+            params = item.get("params") or {}
+            if self.rng.random() < self.args.mcp_error_rate:
+                self.stats.mcp_errors += 1
+                result = {"content": [{"type": "text", "text": "injected failure"}], "isError": True}
+            else:
+                text = json.dumps(self._tool_result(params.get("name", ""), params.get("arguments") or {}))
+                result = {"content": [{"type": "text", "text": text}], "isError": False}
+            responses.append({"jsonrpc": "2.0", "id": item.get("id"), "result": result})
+        return JSONResponse(responses)
+
+    async def reference(self, ref: str) -> Response:
+        self.stats.link_checks += 1
+        return Response(status_code=404 if self.rng.random() < self.args.dead_link_rate else 200)
+
+
+# ---------------------------------------------------------------------------
+# API under test
+# ---------------------------------------------------------------------------
+
+
+async def _start_backend(args: argparse.Namespace, fakes: Fakes) -> tuple[asyncio.subprocess.Process, str]:
+    port = _free_port()
+    env = {
+        **os.environ,
+        **fakes.env,
+        "DAILY_LIMIT_PREMIUM": str(10**9),
+        # Nothing to protect here and simulated users exceed per-user quotas; opt in to measure these
+        "LLM_SCHEDULER_ENABLED": os.environ.get("LLM_SCHEDULER_ENABLED", "false"),
+        "RATE_LIMIT_ENABLED": os.environ.get("RATE_LIMIT_ENABLED", "false"),
+        "TRACING_EXPORTER": "none",
+    }
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "app.main:app",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--workers",
+        str(args.workers),
+        "--log-level",
+        "warning",
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    async with httpx.AsyncClient(base_url=base_url, timeout=2) as client:
+        for _ in range(120):
+            if proc.returncode is not None:
+                raise SystemExit(f"API exited with status {proc.returncode}")
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return proc, base_url
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.5)
+    proc.terminate()
+    raise SystemExit("API did not become healthy within 60s")
+
+
+async def _create_users(count: int) -> list[User]:
+    async with async_session() as db:
+        run = uuid.uuid4().hex[:8]
+        users = [
+            User(email=f"bench-{run}-{i}@{BENCH_EMAIL_DOMAIN}", display_name=f"Bench {i}", tier=UserTier.premium)
+            for i in range(count)
+        ]
+        db.add_all(users)
+        await db.commit()
+        return users
+
+
+async def _delete_users(users: list[User]) -> None:
+    user_ids = [user.id for user in users]
+    async with async_session() as db:
+        sessions = select(ChatSession.id).where(ChatSession.user_id.in_(user_ids))
+        await db.execute(delete(ChatMessage).where(ChatMessage.session_id.in_(sessions)))
+        await db.execute(delete(ChatSession).where(ChatSession.user_id.in_(user_ids)))
+        await db.execute(delete(UsageRecord).where(UsageRecord.user_id.in_(user_ids)))
+        await db.execute(delete(User).where(User.id.in_(user_ids)))
+        await db.commit()
+
+
+# ---------------------------------------------------------------------------
+# Load generator
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class Results:
+    turns: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    stages: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    failures: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    conversations: int = 0
+
+    def turn(self, transport: str, content: str | None, seconds: float) -> None:
+        if content is None:
+            self.failures[transport] += 1
+        else:
+            kind = "itinerary" if "## Your itinerary" in content else "question"
+            self.turns[f"{transport}/{kind}"].append(seconds * 1000)
+
+
+async def _rest_turns(
+    client: httpx.AsyncClient,
+    session_id: str,
+    locale: str,
+    messages: list[str],
+    think: Callable[[], Awaitable[None]],
+    results: Results,
+) -> None:
+    for message in messages:
+        start = time.perf_counter()
+        try:
+            resp = await client.post(
+                f"/api/v1/chat/sessions/{session_id}/messages",
+                json={"content": message, "locale": locale},
+                timeout=TURN_TIMEOUT,
+            )
+            content = resp.json()["content"] if resp.status_code == 200 else None
+        except httpx.HTTPError:
+            content = None
+        results.turn("rest", content, time.perf_counter() - start)
+        await think()
+
+
+async def _ws_turns(ws_url: str, messages: list[str], think: Callable[[], Awaitable[None]], results: Results) -> None:
+    try:
+        async with websockets.connect(ws_url, max_size=None) as ws:
+            for message in messages:
+                start = time.perf_counter()
+                await ws.send(json.dumps({"content": message}))
+                content = None
+                async with asyncio.timeout(TURN_TIMEOUT):
+                    while True:
+                        frame = json.loads(await ws.recv())
+                        if frame["type"] in ("message", "error"):
+                            content = frame["content"] if frame["type"] == "message" else None
+                            break
+                results.turn("ws", content, time.perf_counter() - start)
+                await think()
+    except (OSError, TimeoutError, websockets.WebSocketException):
+        results.failures["ws"] += 1
+
+
+async def _user(
+    args: argparse.Namespace, base_url: str, user: User, queue: itertools.count, rng: random.Random, results: Results
+) -> None:
+    token = create_access_token(user.id)
+    ws_base = base_url.replace("http", "ws", 1)
+
+    async def think() -> None:
+        if args.think_ms:
+            await asyncio.sleep(args.think_ms * rng.lognormvariate(0, 0.5) / 1000)
+
+    async with httpx.AsyncClient(base_url=base_url, headers={"Authorization": f"Bearer {token}"}) as client:
+        while (n := next(queue)) < args.conversations:
+            locale, messages = CONVERSATIONS[n % len(CONVERSATIONS)]
+            transport = args.transport if args.transport != "mixed" else rng.choice(("rest", "ws"))
+            resp = await client.post("/api/v1/chat/sessions", json={"title": f"bench {n}"})
+            if resp.status_code != 200:
+                results.failures["session"] += 1
+                continue
+            session_id = resp.json()["id"]
+
+            if transport == "rest":
+                await _rest_turns(client, session_id, locale, messages, think, results)
+            else:
+                await _ws_turns(f"{ws_base}/api/v1/ws/chat/{session_id}?token={token}", messages, think, results)
+            results.conversations += 1
+
+            timeline = await client.get(f"/api/v1/chat/sessions/{session_id}/flow-timeline")
+            if timeline.status_code == 200:
+                for event in timeline.json()["events"]:
+                    if event["status"] in ("done", "error") and event["step"] != "complete":
+                        results.stages[event["step"]].append(event["stage_ms"])
+                    elif event["step"] == "complete":
+                        results.stages["(turn total)"].append(event["elapsed_ms"])
+
+
+# ---------------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------------
+
+
+def _summary(results: Results, fakes: Fakes, elapsed: float) -> dict:
+    def latency(values: list[float]) -> dict:
+        ordered = sorted(values)
+        return {
+            "n": len(ordered),
+            "p50": statistics.median(ordered),
+            "p95": _pct(ordered, 0.95),
+            "p99": _pct(ordered, 0.99),
+            "max": ordered[-1],
+        }
+
+    turns = sum(len(v) for v in results.turns.values())
+    return {
+        "elapsed_s": elapsed,
+        "conversations": results.conversations,
+        "turns": turns,
+        "failures": dict(results.failures),
+        "turns_per_s": turns / elapsed,
+        "latency_ms": {k: latency(v) for k, v in sorted(results.turns.items())},
+        "stages_ms": {k: latency(v) for k, v in results.stages.items() if v},
+        "fakes": vars(fakes.stats),
+    }
+
+
+def _print(summary: dict) -> None:
+    failed = sum(summary["failures"].values())
+    print(
+        f"\n{summary['turns']} turns ({failed} failed) in {summary['conversations']} conversations, "
+        f"{summary['elapsed_s']:.1f}s: {summary['turns_per_s']:.2f} turns/s"
+    )
+    for title, rows in (("Turn latency", summary["latency_ms"]), ("Per stage (flow timeline)", summary["stages_ms"])):
+        print(f"\n{title:<28} {'n':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  ms")
+        for label, row in rows.items():
+            quantiles = " ".join(f"{row[q]:>9.1f}" for q in ("p50", "p95", "p99", "max"))
+            print(f"  {label:<26} {row['n']:>6} {quantiles}")
+    stats = summary["fakes"]
+    print(
+        f"\nFake LLM: {stats['llm_calls']} calls ({stats['llm_errors']} injected errors), "
+        f"{stats['prompt_tokens']} prompt + {stats['completion_tokens']} completion tokens"
+    )
+    print(
+        f"Fake MCP: {stats['mcp_batches']} batches, {stats['mcp_calls']} tool calls "
+        f"({stats['mcp_errors']} injected errors); {stats['link_checks']} link checks"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    fake_port = args.fake_port or _free_port()
+    fakes = Fakes(args, fake_port)
+    fake_server = uvicorn.Server(uvicorn.Config(fakes.app, host="127.0.0.1", port=fake_port, log_level="warning"))
+    fake_task = asyncio.create_task(fake_server.serve())
+    while not fake_server.started:
+        if fake_task.done():
+            fake_task.result()  # re-raises the startup error, if any
+            raise SystemExit(f"Could not start the fakes on port {fake_port}")
+        await asyncio.sleep(0.05)
+    print(f"Fakes on {fakes.base_url}:")
+    for key, value in fakes.env.items():
+        print(f"  {key}={value}")
+
+    proc = None
+    if args.backend_url:
+        base_url = args.backend_url.rstrip("/")
+    else:
+        proc, base_url = await _start_backend(args, fakes)
+        print(f"API on {base_url} ({args.workers} worker{'s' if args.workers > 1 else ''})")
+
+    users = await _create_users(args.users)
+    results = Results()
+    try:
+        print(f"Running {args.conversations} conversations with {args.users} concurrent users ({args.transport})...")
+        queue = itertools.count()
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(_user(args, base_url, user, queue, random.Random(rng.random()), results) for user in users)
+        )
+        summary = _summary(results, fakes, time.perf_counter() - start)
+    finally:
+        await _delete_users(users)
+        await engine.dispose()
+        if proc is not None:
+            proc.terminate()
+            await proc.wait()
+        fake_server.should_exit = True
+        await fake_task
+
+    _print(summary)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="concurrent simulated users")
+    parser.add_argument("--conversations", type=int, default=100, help="conversations in total")
+    parser.add_argument("--transport", choices=("rest", "ws", "mixed"), default="rest")
+    parser.add_argument("--think-ms", type=float, default=0, help="median pause between turns")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the API subprocess")
+    parser.add_argument("--backend-url", help="drive this running API instead of starting one")
+    parser.add_argument("--fake-port", type=int, default=0, help="port for the fakes (default: any free port)")
+    parser.add_argument("--llm-ttft-ms", type=float, default=800, help="median time to first token")
+    parser.add_argument("--llm-tokens-per-s", type=float, default=120)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--mcp-latency-ms", type=float, default=40, help="median MCP tool latency")
+    parser.add_argument("--mcp-error-rate", type=float, default=0.0)
+    parser.add_argument("--dead-link-rate", type=float, default=0.05, help="share of cited URLs answering 404")
+    parser.add_argument("--jitter", type=float, default=0.5, help="sigma of the log-normal latency multiplier")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="also write the summary to this file")
+    asyncio.run(main(parser.parse_args()))
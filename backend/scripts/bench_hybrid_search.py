@@ -0,0 +1,205 @@
+"""Latency of hybrid package search over a synthetic catalog.
+
+    python -m scripts.bench_hybrid_search                  # 100k packages
+    python -m scripts.bench_hybrid_search --packages 20000 --no-vectors
+
+Synthetic packages (plus per-locale projections and one embedding each) are
+inserted inside a transaction that is rolled back at the end, so the real
+catalog is untouched.  Each query runs full-text only and full-text + vector,
+with and without structured filters; p50/p95/p99 latencies are reported.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.database import register_vector_codec
+from app.models.embedding import EMBEDDING_DIM, TravelEmbedding
+from app.models.package import PackageLocalized, TravelPackage
+from app.services.package_service import DURATION_BANDS, PRICE_BANDS, _band, hybrid_search_packages
+from app.services.search_text import index_terms
+
+DESTINATIONS = {
+    "Japan": [("tokyo", "東京"), ("kyoto", "京都"), ("osaka", "大阪"), ("hokkaido", "北海道"), ("okinawa", "沖繩")],
+    "Taiwan": [("taipei", "台北"), ("tainan", "台南"), ("hualien", "花蓮"), ("kenting", "墾丁"), ("alishan", "阿里山")],
+}
+ACTIVITIES = [
+    ("snorkeling", "浮潛"),
+    ("skiing", "滑雪"),
+    ("temples", "寺廟"),
+    ("hot springs", "溫泉"),
+    ("street food", "小吃"),
+    ("hiking", "健行"),
+    ("cycling", "單車"),
+    ("shopping", "購物"),
+    ("sushi", "壽司"),
+    ("night market", "夜市"),
+]
+CATEGORIES = ["Culture", "Adventure", "Food", "Beach", "Skiing", "Family"]
+
+QUERIES = [
+    ("okinawa snorkeling", {}),
+    ("沖繩 snorkeling under $1500", {}),
+    ("京都 寺廟", {}),
+    ("hokkaido skiing hot springs", {"category": "Skiing"}),
+    ("台北 夜市 小吃", {"destination": "Taiwan"}),
+    ("family hiking", {"min_duration": 4, "max_duration": 6}),
+]
+
+
+def _synthetic_package(i: int, rng: random.Random) -> tuple[dict, list[dict]]:
+    destination = rng.choice(list(DESTINATIONS))
+    (city_en, city_zh), activities = rng.choice(DESTINATIONS[destination]), rng.sample(ACTIVITIES, 3)
+    category = rng.choice(CATEGORIES)
+    duration, price = rng.randint(2, 12), round(rng.uniform(400, 5000), 2)
+    package_id = uuid.uuid4()
+    title_en = f"{city_en.title()} {activities[0][0]} {category} tour #{i}"
+    title_zh = f"{city_zh}{activities[0][1]}之旅 #{i}"
+    summary_en = f"{duration} days of {', '.join(a[0] for a in activities)} in {city_en.title()}"
+    summary_zh = f"{city_zh}{duration}天：{'、'.join(a[1] for a in activities)}"
+    package = {
+        "id": package_id,
+        "title": title_en,
+        "slug": f"bench-{package_id.hex}",
+        "destination": destination,
+        "category": category,
+        "summary": summary_en,
+        "description": summary_en,
+        "duration_days": duration,
+        "price_usd": price,
+        "is_published": True,
+    }
+    texts = {
+        "en": [destination, category, title_en, summary_en],
+        "zh": [destination, category, title_zh, summary_zh, title_en, summary_en],
+    }
+    projections = [
+        {
+            "id": uuid.uuid4(),
+            "package_id": package_id,
+            "locale": locale,
+            "slug": package["slug"],
+            "destination": destination,
+            "category": category,
+            "duration_days": duration,
+            "price_usd": price,
+            "price_band": _band(price, PRICE_BANDS),
+            "duration_band": _band(duration, DURATION_BANDS),
+            "is_published": True,
+            "search_text": " ".join(index_terms(" ".join(texts.get(locale, texts["en"])))),
+            "listing": {
+                "id": str(package_id),
+                "title": title_zh if locale == "zh" else title_en,
+                "slug": package["slug"],
+                "destination": destination,
+                "category": category,
+                "summary": summary_zh if locale == "zh" else summary_en,
+                "duration_days": duration,
+                "price_usd": price,
+                "cover_image_url": None,
+                "highlights": None,
+            },
+            "detail": {},
+        }
+        for locale in settings.package_locales
+    ]
+    return package, projections
+
+
+def _vector_pool(size: int, rng: random.Random) -> list[list[float]]:
+    return [[rng.gauss(0, 1) for _ in range(EMBEDDING_DIM)] for _ in range(size)]
+
+
+def _jitter(base: list[float], rng: random.Random) -> list[float]:
+    vec = list(base)
+    for j in rng.sample(range(EMBEDDING_DIM), 16):
+        vec[j] += rng.gauss(0, 0.5)
+    return vec
+
+
+async def _load(db: AsyncSession, count: int, with_vectors: bool, rng: random.Random, pool: list) -> None:
+    batch = 2000
+    for start in range(0, count, batch):
+        packages, projections, embeddings = [], [], []
+        for i in range(start, min(start + batch, count)):
+            package, rows = _synthetic_package(i, rng)
+            packages.append(package)
+            projections.extend(rows)
+            if with_vectors:
+                embeddings.append(
+                    {
+                        "id": uuid.uuid4(),
+                        "source_type": "package",
+                        "source_id": package["id"],
+                        "content_text": package["title"],
+                        "embedding": _jitter(rng.choice(pool), rng),
+                    }
+                )
+        await db.execute(insert(TravelPackage), packages)
+        await db.execute(insert(PackageLocalized), projections)
+        if embeddings:
+            await db.execute(insert(TravelEmbedding), embeddings)
+        print(f"  {min(start + batch, count)}/{count}", end="\r", flush=True)
+    print()
+    await db.execute(text("ANALYZE travel_packages"))
+    await db.execute(text("ANALYZE package_localized"))
+    await db.execute(text("ANALYZE travel_embeddings"))
+
+
+def _report(label: str, latencies: list[float]) -> None:
+    ordered = sorted(latencies)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+    print(f"{label:<44} p50 {statistics.median(ordered):7.2f}  p95 {pct(0.95):7.2f}  p99 {pct(0.99):7.2f} ms")
+
+
+async def main(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    engine = register_vector_codec(create_async_engine(settings.database_url))
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    pool = _vector_pool(256, rng) if args.vectors else []
+
+    async with session_factory() as db:
+        try:
+            print(f"Loading {args.packages} synthetic packages (rolled back afterwards)...")
+            t0 = time.perf_counter()
+            await _load(db, args.packages, args.vectors, rng, pool)
+            print(f"Loaded in {time.perf_counter() - t0:.1f}s")
+
+            for q, filters in QUERIES:
+                for locale in ("en", "zh"):
+                    modes = [("lexical", None)]
+                    if args.vectors:
+                        modes.append(("hybrid", _jitter(rng.choice(pool), rng)))
+                    for mode, embedding in modes:
+                        latencies, total = [], 0
+                        for _ in range(args.repeat):
+                            t0 = time.perf_counter()
+                            result = await hybrid_search_packages(
+                                db, q, query_embedding=embedding, locale=locale, **filters
+                            )
+                            latencies.append((time.perf_counter() - t0) * 1000)
+                            total = result["total"]
+                        _report(f"[{locale}/{mode}] {q} ({total} hits)", latencies)
+        finally:
+            await db.rollback()
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--packages", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--no-vectors", dest="vectors", action="store_false", help="full-text only, skip embeddings")
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,133 @@
+"""Recall@k and latency of ANN search vs exact search on travel_embeddings.
+
+    python -m scripts.bench_vector_search                      # existing rows
+    python -m scripts.bench_vector_search --synthetic 100000   # + random rows, rolled back
+    python -m scripts.bench_vector_search --ef 20 40 80 160 --source-type package
+
+Queries are perturbed copies of stored vectors.  Exact neighbours come from a
+sequential scan (index scans disabled for that transaction); ANN results use
+the HNSW/IVFFlat indexes at each ``--ef`` value (ef_search or probes).
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from app.config import settings
+from app.database import register_vector_codec
+from app.models.embedding import EMBEDDING_DIM, TravelEmbedding
+from app.services.vector_index import ensure_vector_indexes
+
+
+def _random_unit(dim: int, rng: random.Random) -> list[float]:
+    vec = [rng.gauss(0, 1) for _ in range(dim)]
+    norm = sum(x * x for x in vec) ** 0.5
+    return [x / norm for x in vec]
+
+
+def _perturb(vec: list[float], rng: random.Random, noise: float = 0.05) -> list[float]:
+    return [x + rng.gauss(0, noise) for x in vec]
+
+
+async def _insert_synthetic(conn: AsyncConnection, count: int, rng: random.Random) -> None:
+    source_types = settings.vector_index_source_types
+    batch = 1000
+    for start in range(0, count, batch):
+        rows = [
+            {
+                "source_type": rng.choice(source_types),
+                "source_id": uuid.uuid4(),
+                "content_text": f"synthetic {start + i}",
+                "embedding": _random_unit(EMBEDDING_DIM, rng),
+            }
+            for i in range(min(batch, count - start))
+        ]
+        await conn.execute(TravelEmbedding.__table__.insert(), rows)
+    # Rebuild so IVFFlat centroids / HNSW graph reflect the synthetic rows
+    await ensure_vector_indexes(conn, rebuild=True)
+    await conn.execute(text("ANALYZE travel_embeddings"))
+
+
+async def _knn(conn: AsyncConnection, query: list[float], k: int, source_type: str | None) -> list:
+    distance = TravelEmbedding.embedding.cosine_distance(query)
+    stmt = select(TravelEmbedding.id).where(TravelEmbedding.embedding.is_not(None))
+    if source_type:
+        stmt = stmt.where(TravelEmbedding.source_type == source_type)
+    stmt = stmt.order_by(distance).limit(k)
+    return [row.id for row in await conn.execute(stmt)]
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def main(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    engine = register_vector_codec(create_async_engine(settings.database_url))
+    param = "hnsw.ef_search" if settings.vector_index_method == "hnsw" else "ivfflat.probes"
+    label = param.split(".")[-1]
+
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            if args.synthetic:
+                print(f"Inserting {args.synthetic} synthetic vectors (rolled back afterwards)...")
+                await _insert_synthetic(conn, args.synthetic, rng)
+
+            sample = select(TravelEmbedding.embedding).where(TravelEmbedding.embedding.is_not(None))
+            if args.source_type:
+                sample = sample.where(TravelEmbedding.source_type == args.source_type)
+            sample = sample.order_by(func.random()).limit(args.queries)
+            queries = [_perturb(list(row.embedding), rng) for row in await conn.execute(sample)]
+            if not queries:
+                print("No embeddings to query; run `make embed` or pass --synthetic N")
+                return
+
+            # Ground truth from a sequential scan
+            await conn.execute(text("SET LOCAL enable_indexscan = off"))
+            await conn.execute(text("SET LOCAL enable_bitmapscan = off"))
+            exact, exact_ms = [], []
+            for q in queries:
+                t0 = time.perf_counter()
+                exact.append(set(await _knn(conn, q, args.k, args.source_type)))
+                exact_ms.append((time.perf_counter() - t0) * 1000)
+            await conn.execute(text("SET LOCAL enable_indexscan = on"))
+            await conn.execute(text("SET LOCAL enable_bitmapscan = on"))
+
+            print(f"method={settings.vector_index_method} k={args.k} queries={len(queries)}")
+            print(f"{'setting':>16} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+            print(f"{'exact':>16} {1.0:>9.3f} {statistics.median(exact_ms):>8.2f} {_percentile(exact_ms, 0.95):>8.2f}")
+            for ef in args.ef:
+                await conn.execute(select(func.set_config(param, str(ef), True)))
+                recalls, latencies = [], []
+                for q, truth in zip(queries, exact):
+                    t0 = time.perf_counter()
+                    found = await _knn(conn, q, args.k, args.source_type)
+                    latencies.append((time.perf_counter() - t0) * 1000)
+                    recalls.append(len(truth.intersection(found)) / max(len(truth), 1))
+                print(
+                    f"{f'{label}={ef}':>16} {statistics.mean(recalls):>9.3f} "
+                    f"{statistics.median(latencies):>8.2f} {_percentile(latencies, 0.95):>8.2f}"
+                )
+        finally:
+            await trans.rollback()
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--ef", type=int, nargs="+", default=[10, 20, 40, 80, 160])
+    parser.add_argument("--source-type", default=None)
+    parser.add_argument("--synthetic", type=int, default=0, help="insert N random vectors inside the transaction")
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,34 @@
+"""Embed package content into travel_embeddings (incremental by content hash).
+
+python -m scripts.embed_packages
+"""
+
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from app.config import settings
+from app.database import register_vector_codec
+from app.models import *  # noqa: F401,F403 — ensure all models are registered
+from app.services.embedding_pipeline import embed_packages
+
+
+async def main():
+    engine = register_vector_codec(create_async_engine(settings.database_url))
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as db:
+        stats = await embed_packages(db)
+        print(
+            f"Embedded {stats['embedded']} chunks, skipped {stats['skipped']} unchanged, "
+            f"deleted {stats['deleted']} stale"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
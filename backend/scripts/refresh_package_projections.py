@@ -0,0 +1,31 @@
+"""Rebuild the per-locale package projections (``package_localized``).
+
+Run after editing packages or adding a locale to ``PACKAGE_LOCALES``:
+    python -m scripts.refresh_package_projections
+"""
+
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from app.config import settings
+from app.models import *  # noqa: F401,F403 — ensure all models are registered
+from app.services.package_service import refresh_localized_packages
+
+
+async def main():
+    engine = create_async_engine(settings.database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as db:
+        rows = await refresh_localized_packages(db)
+        print(f"Built {rows} localized package projections for locales {settings.package_locales}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -7,6 +7,7 @@ from sqlmodel import SQLModel
 
 from app.config import settings
 from app.models.package import PackageDay, PackageTag, TravelPackage
+from app.services.package_service import refresh_localized_packages
 
 # Shared tag translation lookup — add new languages as needed
 TAG_TRANSLATIONS: dict[str, dict[str, dict[str, str]]] = {
@@ -1379,6 +1380,11 @@ async def seed():
         await db.commit()
         print(f"Seeded {len(PACKAGES)} travel packages successfully!")
 
+    # Fresh session so server-side defaults (created_at) are loaded for the projections
+    async with session_factory() as db:
+        rows = await refresh_localized_packages(db)
+        print(f"Built {rows} localized package projections")
+
     await engine.dispose()
 
 
@@ -1,9 +1,11 @@
 import { DESTINATIONS, CATEGORIES } from "../../lib/constants";
 import { useT } from "../../i18n";
+import type { PackageFacetCount, PackageFacets } from "../../lib/types";
 
 interface PackageFilterProps {
   destination?: string;
   category?: string;
+  facets?: PackageFacets;
   onDestinationChange: (val: string | undefined) => void;
   onCategoryChange: (val: string | undefined) => void;
 }
@@ -11,11 +13,20 @@ interface PackageFilterProps {
 export function PackageFilter({
   destination,
   category,
+  facets,
   onDestinationChange,
   onCategoryChange,
 }: PackageFilterProps) {
   const t = useT();
 
+  // Prefer server facets (with counts); fall back to the static lists
+  const options = (facet: PackageFacetCount[] | undefined, fallback: readonly string[]) =>
+    facet
+      ? facet.map((f) => ({ value: f.value, label: `${f.value} (${f.count})` }))
+      : fallback.map((v) => ({ value: v, label: v }));
+  const destinationOptions = options(facets?.destination, DESTINATIONS);
+  const categoryOptions = options(facets?.category, CATEGORIES);
+
   return (
     <div className="flex flex-wrap gap-3">
       <select
@@ -24,8 +35,8 @@ export function PackageFilter({
         className="input"
       >
         <option value="">{t("packages.allDestinations")}</option>
-        {DESTINATIONS.map((d: string) => (
-          <option key={d} value={d}>{d}</option>
+        {destinationOptions.map((d) => (
+          <option key={d.value} value={d.value}>{d.label}</option>
         ))}
       </select>
 
@@ -35,8 +46,8 @@ export function PackageFilter({
         className="input"
       >
         <option value="">{t("packages.allCategories")}</option>
-        {CATEGORIES.map((c: string) => (
-          <option key={c} value={c}>{c}</option>
+        {categoryOptions.map((c) => (
+          <option key={c.value} value={c.value}>{c.label}</option>
         ))}
       </select>
     </div>
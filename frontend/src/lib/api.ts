@@ -7,6 +7,8 @@ import type {
   Itinerary,
   ItineraryDetail,
   PackageDetail,
+  PackageHybridSearchResult,
+  PackageSearchResult,
   TokenResponse,
   TravelPackage,
   UsageInfo,
@@ -98,6 +100,10 @@ export const packageApi = {
     api.get<TravelPackage[]>("/packages", {
       params: { ...params, locale: getLocale() },
     }),
+  search: (params?: Record<string, string | number>) =>
+    api.get<PackageSearchResult>("/packages/search", {
+      params: { ...params, locale: getLocale() },
+    }),
   getBySlug: (slug: string) =>
     api.get<PackageDetail>(`/packages/${slug}`, {
       params: { locale: getLocale() },
@@ -106,6 +112,10 @@ export const packageApi = {
   getDestinations: () => api.get<string[]>("/packages/destinations"),
   semanticSearch: (q: string, limit = 10) =>
     api.get("/packages/search/semantic", { params: { q, limit } }),
+  hybridSearch: (q: string, params?: Record<string, string | number>) =>
+    api.get<PackageHybridSearchResult>("/packages/search/hybrid", {
+      params: { ...params, q, locale: getLocale() },
+    }),
 };
 
 // ─── Itineraries ─────────────────────────────────
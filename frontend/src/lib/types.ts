@@ -87,6 +87,39 @@ export interface PackageTag {
   tag: string;
 }
 
+export interface PackageFacetCount {
+  value: string;
+  count: number;
+}
+
+export interface PackageFacets {
+  destination: PackageFacetCount[];
+  category: PackageFacetCount[];
+  price_band: PackageFacetCount[];
+  duration_band: PackageFacetCount[];
+}
+
+export interface PackageSearchResult {
+  results: TravelPackage[];
+  total: number;
+  facets: PackageFacets;
+}
+
+export interface PackageHybridHit extends TravelPackage {
+  score: number;
+  lexical_rank: number | null;
+  vector_rank: number | null;
+}
+
+export interface PackageHybridSearchResult {
+  query: string;
+  mode: string;
+  min_price: number | null;
+  max_price: number | null;
+  total: number;
+  results: PackageHybridHit[];
+}
+
 export interface PackageDetail extends TravelPackage {
   description: string;
   is_published: boolean;
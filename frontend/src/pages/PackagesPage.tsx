@@ -1,6 +1,6 @@
 import { useEffect, useState } from "react";
 import { packageApi } from "../lib/api";
-import type { TravelPackage } from "../lib/types";
+import type { PackageFacets, TravelPackage } from "../lib/types";
 import { PackageGrid } from "../components/packages/PackageGrid";
 import { PackageFilter } from "../components/packages/PackageFilter";
 import { useT, useI18nStore } from "../i18n";
@@ -9,6 +9,7 @@ export function PackagesPage() {
   const t = useT();
   const locale = useI18nStore((s) => s.locale);
   const [packages, setPackages] = useState<TravelPackage[]>([]);
+  const [facets, setFacets] = useState<PackageFacets | undefined>();
   const [isLoading, setIsLoading] = useState(true);
   const [destination, setDestination] = useState<string | undefined>();
   const [category, setCategory] = useState<string | undefined>();
@@ -20,9 +21,13 @@ export function PackagesPage() {
     if (destination) params.destination = destination;
     if (category) params.category = category;
 
+    // One request returns both the page of results and the filter facets
     packageApi
-      .list(params)
-      .then((res) => setPackages(res.data))
+      .search(params)
+      .then((res) => {
+        setPackages(res.data.results);
+        setFacets(res.data.facets);
+      })
       .catch(() => {})
       .finally(() => setIsLoading(false));
   }, [destination, category, locale]);
@@ -51,6 +56,7 @@ export function PackagesPage() {
         <PackageFilter
           destination={destination}
           category={category}
+          facets={facets}
           onDestinationChange={setDestination}
           onCategoryChange={setCategory}
         />